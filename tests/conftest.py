@@ -13,13 +13,14 @@ from website.models import User, BlockSchedule, Presentation, Grade, AbstractGra
 from website import db, create_app
 
 @pytest.fixture
-def app():
+def app(tmp_path):
     """Create a new Flask app instance for testing."""
     test_config = {
         'TESTING': True,
         'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
         'SQLALCHEMY_TRACK_MODIFICATIONS': False,
-        'SECRET_KEY': 'test-secret-key'
+        'SECRET_KEY': 'test-secret-key',
+        'FILE_OFFLOAD_ROOT': str(tmp_path / 'offload'),
     }
     app_instance = create_app(test_config)
 
@@ -0,0 +1,60 @@
+# pylint: disable=unused-argument
+"""Tests for gzip response compression."""
+import gzip
+import zlib
+
+from website.compression import _compress_stream, clear_compression_cache
+
+
+def test_large_json_is_gzipped_when_accepted(client, app, sample_presentation_fixture):
+    """JSON over the size threshold is gzipped for clients that accept it."""
+    app.config['COMPRESS_MIN_SIZE'] = 10
+    clear_compression_cache()
+    plain = client.get("/api/v1/block-schedule/")
+    res = client.get("/api/v1/block-schedule/", headers={"Accept-Encoding": "gzip"})
+
+    assert res.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in res.headers["Vary"]
+    assert gzip.decompress(res.get_data()) == plain.get_data()
+
+
+def test_repeat_bodies_reuse_cached_compression(client, app, sample_presentation_fixture):
+    """Identical cacheable bodies return identical compressed bytes."""
+    app.config['COMPRESS_MIN_SIZE'] = 10
+    clear_compression_cache()
+    first = client.get("/api/v1/block-schedule/", headers={"Accept-Encoding": "gzip"})
+    second = client.get("/api/v1/block-schedule/", headers={"Accept-Encoding": "gzip"})
+    assert first.get_data() == second.get_data()
+
+
+def test_small_or_unaccepted_responses_are_not_compressed(client, app):
+    """Bodies under the threshold, or clients without gzip, get plain responses."""
+    res = client.get("/api/v1/block-schedule/", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in res.headers
+
+    app.config['COMPRESS_MIN_SIZE'] = 1
+    res = client.get("/api/v1/block-schedule/")
+    assert "Content-Encoding" not in res.headers
+
+
+def test_streamed_json_is_compressed(client, app, sample_presentation_fixture):
+    """Streamed list responses are compressed chunk by chunk."""
+    res = client.get("/overview/all", headers={"Accept-Encoding": "gzip"})
+    assert res.headers["Content-Encoding"] == "gzip"
+    assert b"A test abstract" in gzip.decompress(res.get_data())
+
+
+def test_zip_downloads_are_not_recompressed(client, sample_presentation_fixture):
+    """Already-compressed file downloads pass through untouched."""
+    res = client.get("/api/v1/presentations/download-all", headers={"Accept-Encoding": "gzip"})
+    assert res.mimetype == "application/zip"
+    assert "Content-Encoding" not in res.headers
+
+
+def test_streamed_chunks_are_flushed_as_they_arrive():
+    """Every input chunk is decodable from the output before the stream ends."""
+    chunks = [b'[' + b'1,' * 5000, b'2,' * 5000, b'3]']
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    stream = _compress_stream(iter(chunks), 'gzip')
+    for chunk in chunks:
+        assert decoder.decompress(next(stream)) == chunk
@@ -0,0 +1,95 @@
+# pylint: disable=unused-argument
+"""Tests for read-only conference-day mode."""
+import pytest
+
+from website import db
+from website.models import Presentation, User
+
+
+@pytest.fixture
+def conference_client(client, app, tmp_path):
+    """A client whose app keeps its conference snapshot under tmp_path."""
+    app.config["CONFERENCE_SNAPSHOT_PATH"] = str(tmp_path / "snapshot.bin")
+    yield client
+    client.post("/api/v1/block-schedule/conference-mode", json={"enabled": False})
+
+
+def test_public_reads_come_from_the_snapshot(conference_client, sample_presentation_fixture):
+    """While on, public payloads are served as compiled, even if the database changes."""
+    live = conference_client.get("/api/v1/block-schedule/day/Day 1/full").get_json()
+
+    res = conference_client.post("/api/v1/block-schedule/conference-mode", json={"enabled": True})
+    assert res.status_code == 200
+    status = res.get_json()
+    assert status["enabled"] is True and status["entries"] > 0
+
+    db.session.get(Presentation, sample_presentation_fixture.id).title = "Changed Underneath"
+    db.session.commit()
+
+    res = conference_client.get("/api/v1/block-schedule/day/Day%201/full")
+    assert res.headers["X-Conference-Snapshot"] == status["version"]
+    assert res.get_json() == live
+
+    posters = conference_client.get("/program/list?type=Poster")
+    assert posters.headers["X-Conference-Snapshot"] == status["version"]
+    assert [row["title"] for row in posters.get_json()] == ["Test Presentation"]
+
+    cached = conference_client.get("/program/list?type=Poster", headers={"If-None-Match": posters.headers["ETag"]})
+    assert cached.status_code == 304
+
+    conference_client.post("/api/v1/block-schedule/conference-mode", json={"enabled": False})
+    res = conference_client.get("/program/list?type=Poster")
+    assert "X-Conference-Snapshot" not in res.headers
+    assert [row["title"] for row in res.get_json()] == ["Changed Underneath"]
+
+
+def test_schedule_writes_are_frozen(conference_client, sample_block_fixture):
+    """Schedule and presentation writes are refused until the mode is turned off."""
+    conference_client.post("/api/v1/block-schedule/conference-mode", json={"enabled": True})
+
+    res = conference_client.delete(f"/api/v1/block-schedule/{sample_block_fixture.id}")
+    assert res.status_code == 423
+    res = conference_client.post("/api/v1/presentations/", json={"title": "Late Entry"})
+    assert res.status_code == 423
+    assert conference_client.get("/api/v1/block-schedule/conference-mode").get_json()["enabled"] is True
+
+    conference_client.post("/api/v1/block-schedule/conference-mode", json={"enabled": False})
+    res = conference_client.delete(f"/api/v1/block-schedule/{sample_block_fixture.id}")
+    assert res.status_code == 200
+
+
+def test_presenter_changes_are_frozen(conference_client, sample_presentation_fixture):
+    """User writes that would change presenters in the snapshot are refused; others go through."""
+    presenter = User(firstname="Ada", lastname="Lovelace", email="ada@example.com",
+                     presentation_id=sample_presentation_fixture.id)
+    attendee = User(firstname="Bo", lastname="Baker", email="bo@example.com")
+    db.session.add_all([presenter, attendee])
+    db.session.commit()
+    conference_client.post("/api/v1/block-schedule/conference-mode", json={"enabled": True})
+
+    res = conference_client.put(f"/api/v1/users/{presenter.id}", json={"lastname": "Byron"})
+    assert res.status_code == 423
+    res = conference_client.put(f"/api/v1/users/{attendee.id}",
+                                json={"presentation_id": sample_presentation_fixture.id})
+    assert res.status_code == 423
+    assert conference_client.delete(f"/api/v1/users/{presenter.id}").status_code == 423
+    res = conference_client.post("/api/v1/users/", json={
+        "firstname": "Cy", "lastname": "Cole", "email": "cy@example.com",
+        "presentation_id": sample_presentation_fixture.id})
+    assert res.status_code == 423
+
+    # Unchanged presenter fields and attendee edits are not frozen.
+    res = conference_client.put(f"/api/v1/users/{presenter.id}", json={
+        "firstname": "Ada", "lastname": "Lovelace", "presentation_id": str(sample_presentation_fixture.id),
+        "activity": "Hiking"})
+    assert res.status_code == 200
+    assert conference_client.put(f"/api/v1/users/{attendee.id}", json={"lastname": "Brown"}).status_code == 200
+    res = conference_client.post("/api/v1/users/", json={
+        "firstname": "Di", "lastname": "Dunn", "email": "di@example.com"})
+    assert res.status_code == 201
+
+
+def test_conference_mode_requires_boolean(conference_client):
+    """The toggle rejects anything but an explicit boolean."""
+    res = conference_client.post("/api/v1/block-schedule/conference-mode", json={"enabled": "yes"})
+    assert res.status_code == 400
@@ -95,3 +95,14 @@ def test_get_average_grades_by_presentation(client, multiple_grades_fixture):
         g.criteria_1 + g.criteria_2 + g.criteria_3 for g in multiple_grades_fixture
     ) / len(multiple_grades_fixture), 2)
     assert data[0]["average_score"] == avg_score
+
+
+def test_get_grades_keyset_pagination(client, multiple_grades_fixture):
+    """GET /api/v1/grades/?limit= pages grades by id."""
+    page = client.get("/api/v1/grades/?limit=2").get_json()
+    assert [row["id"] for row in page["results"]] == [g.id for g in multiple_grades_fixture[:2]]
+    assert page["next"] == multiple_grades_fixture[1].id
+
+    rest = client.get(f"/api/v1/grades/?limit=2&after={page['next']}").get_json()
+    assert [row["id"] for row in rest["results"]] == [multiple_grades_fixture[2].id]
+    assert rest["next"] is None
@@ -0,0 +1,109 @@
+# pylint: disable=unused-argument
+"""Tests for the cross-worker cache invalidation bus."""
+from flask import session as flask_session
+from sqlalchemy import text
+
+from website import db, invalidation
+from website.invalidation import (
+    InvalidationBus,
+    TaggedCache,
+    VERSION_TABLE,
+    all_tags,
+    invalidation_tag,
+    tagged_cache,
+)
+from website.models import BlockSchedule, Presentation, User
+from website.security import IDENTITY_MAX_AGE, _current_user
+
+
+def _published_tags():
+    return {row[0] for row in db.session.execute(text(f"SELECT tag FROM {VERSION_TABLE}"))}
+
+
+def test_commits_publish_typed_tags(app, sample_presentation_fixture):
+    """ORM writes tag the presentation and the day it is scheduled on."""
+    presentation = db.session.get(Presentation, sample_presentation_fixture.id)
+    presentation.title = "Retitled"
+    db.session.commit()
+
+    assert {f"presentation:{presentation.id}", "block:Day 1"} <= _published_tags()
+
+
+def test_moving_a_block_tags_both_days(app, sample_block_fixture):
+    """A block moved to another day invalidates the old and the new day."""
+    block = db.session.get(BlockSchedule, sample_block_fixture.id)
+    block.day = "Day 2"
+    db.session.commit()
+
+    assert {"block:Day 1", "block:Day 2"} <= _published_tags()
+
+
+def test_rolled_back_writes_publish_nothing(app, sample_presentation_fixture):
+    """Tags only leave the worker with a committed transaction."""
+    before = db.session.execute(text(f"SELECT COALESCE(MAX(version), 0) FROM {VERSION_TABLE}")).scalar()
+    db.session.get(Presentation, sample_presentation_fixture.id).title = "Never Saved"
+    db.session.flush()
+    db.session.rollback()
+
+    after = db.session.execute(text(f"SELECT COALESCE(MAX(version), 0) FROM {VERSION_TABLE}")).scalar()
+    assert after == before
+
+
+def test_other_workers_drop_stale_entries(app, sample_presentation_fixture):
+    """A second worker polling the version table sees this worker's writes."""
+    app.config["INVALIDATION_POLL_SECONDS"] = 0
+    other = InvalidationBus(app)
+    cache = other.cache("program_ids")
+    other.sync()
+    cache.get_or_compute("visible", lambda: ({"stale": True}, all_tags("presentation")))
+    cache.get_or_compute("day", lambda: ({"day": 2}, {"block:Day 2"}))
+
+    db.session.get(Presentation, sample_presentation_fixture.id).title = "Changed Elsewhere"
+    db.session.commit()
+    other.sync()
+
+    assert "visible" not in cache.entries
+    assert "day" in cache.entries
+    assert other.status()["dispatched"] >= 2
+
+
+def test_visibility_change_drops_program_ids(client, app, sample_presentation_fixture):
+    """Raw-SQL visibility writes invalidate the cached program numbering."""
+    cache = tagged_cache("program_ids")
+    cache.get_or_compute("visible", lambda: ({1: "poster-1"}, all_tags("presentation", "block")))
+
+    res = client.put(f"/api/v1/presentations/{sample_presentation_fixture.id}", json={"show_on_schedule": False})
+    assert res.status_code == 200
+    assert "visible" not in cache.entries
+    assert invalidation_tag("presentation", sample_presentation_fixture.id) in _published_tags()
+
+
+def test_values_computed_across_an_invalidation_are_not_stored():
+    """A slow computation that races an invalidation is returned but not cached."""
+    cache = TaggedCache()
+
+    def compute():
+        cache.invalidate({"user:1"})
+        return "old", {"user:1"}
+
+    assert cache.get_or_compute("jane@example.com", compute) == "old"
+    assert "jane@example.com" not in cache.entries
+
+
+def test_identity_cache_expires_writes_the_bus_never_saw(app, monkeypatch, sample_user_fixture):
+    """A role revoked outside the ORM stops authorizing once the identity entry ages out."""
+    clock = [1000.0]
+    monkeypatch.setattr(invalidation.time, "monotonic", lambda: clock[0])
+    db.session.execute(text("UPDATE users SET auth = 'organizer' WHERE id = :id"), {"id": sample_user_fixture.id})
+    db.session.commit()
+
+    with app.test_request_context():
+        flask_session["user"] = {"email": sample_user_fixture.email}
+        assert _current_user(User).auth == "organizer"
+
+        db.session.execute(text("UPDATE users SET auth = 'attendee' WHERE id = :id"), {"id": sample_user_fixture.id})
+        db.session.commit()
+        assert _current_user(User).auth == "organizer"
+
+        clock[0] += IDENTITY_MAX_AGE
+        assert _current_user(User).auth == "attendee"
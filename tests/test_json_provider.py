@@ -0,0 +1,48 @@
+"""Tests for the app JSON provider."""
+from datetime import date, datetime
+
+import pytest
+from flask.json.provider import DefaultJSONProvider
+
+from website import json_provider
+
+
+PAYLOAD = [
+    {
+        "title": "Café \U0001F600   </script> \x7f\x01\n\t\"\\",
+        "time": datetime(2026, 11, 6, 9, 30, 15, 123456),
+        "day": date(2026, 11, 6),
+        "score": 4.57,
+        "none": None,
+        "nested": {"b": [1, 2.5, True], "a": "x"},
+    },
+]
+
+
+def _stdlib_dumps(app, obj):
+    return DefaultJSONProvider.dumps(app.json, obj, separators=(',', ':'))
+
+
+def test_datetimes_use_naive_iso_format(app):
+    """Datetimes encode without microseconds or timezone suffix."""
+    encoded = app.json.dumps({"time": datetime(2026, 11, 6, 9, 30, 15, 999)})
+    assert encoded == '{"time": "2026-11-06T09:30:15"}'
+
+
+def test_compact_output_matches_stdlib(app):
+    """The compact encoder path produces the same bytes as the stdlib encoder."""
+    assert app.json.dumps(PAYLOAD, separators=(',', ':')) == _stdlib_dumps(app, PAYLOAD)
+
+
+def test_non_string_keys_fall_back_to_stdlib(app):
+    """Payloads the fast encoder rejects still encode like the stdlib."""
+    payload = {1: "int key", 2: [1, 2]}
+    assert app.json.dumps(payload, separators=(',', ':')) == _stdlib_dumps(app, payload)
+
+
+def test_fast_encoder_escapes_like_stdlib(app):
+    """orjson output is escaped to the stdlib's ensure_ascii form."""
+    if json_provider.orjson is None:
+        pytest.skip("orjson is not installed")
+    # pylint: disable=protected-access
+    assert app.json._fast_dumps(PAYLOAD) == _stdlib_dumps(app, PAYLOAD)
@@ -0,0 +1,71 @@
+# pylint: disable=unused-argument
+"""Tests for normalizing legacy presentation_file encodings."""
+import base64
+import json
+
+from sqlalchemy import text
+
+from website import db
+from website.models import Presentation
+
+
+def _store_raw(presentation_id, value):
+    """Write a value without the LargeBinary type, as older code paths did."""
+    db.session.execute(
+        text("UPDATE presentations SET presentation_file = :value WHERE id = :pid"),
+        {"pid": presentation_id, "value": value}
+    )
+    db.session.commit()
+
+
+def _add_presentations(count):
+    presentations = [Presentation(title=f"Deck {index}") for index in range(count)]
+    db.session.add_all(presentations)
+    db.session.commit()
+    return [presentation.id for presentation in presentations]
+
+
+def test_normalize_converts_legacy_encodings(runner, app):
+    """Hex, data-URL and base64 text become raw bytes with recorded metadata."""
+    pdf = b"%PDF-1.4 legacy deck"
+    raw_id, hex_id, data_url_id, b64_id, bad_id = _add_presentations(5)
+    _store_raw(raw_id, b"PK\x03\x04already raw")
+    _store_raw(hex_id, "\\x" + pdf.hex())
+    _store_raw(data_url_id, "data:application/pdf;base64," + base64.b64encode(pdf).decode())
+    _store_raw(b64_id, base64.b64encode(pdf).decode())
+    _store_raw(bad_id, "not a presentation")
+
+    result = runner.invoke(args=["normalize-presentation-files"])
+    assert result.exit_code == 0
+    report = json.loads(result.output[:result.output.rindex("}") + 1])
+    assert report["encodings"] == {"raw": 1, "hex": 1, "data-url": 1, "base64": 1, "unreadable": 1}
+    assert report["converted"] == 3
+    assert report["unreadable"] == [bad_id]
+
+    for presentation_id in (hex_id, data_url_id, b64_id):
+        stored = db.session.execute(
+            text("SELECT typeof(presentation_file), presentation_file FROM presentations WHERE id = :pid"),
+            {"pid": presentation_id}
+        ).fetchone()
+        assert stored == ("blob", pdf)
+
+    metadata = db.session.execute(
+        text("SELECT filename, file_format, byte_size FROM presentation_uploads WHERE presentation_id = :pid"),
+        {"pid": hex_id}
+    ).fetchone()
+    assert metadata == ("", "pdf", len(pdf))
+
+
+def test_normalize_dry_run_changes_nothing(runner, app):
+    """--dry-run reports encodings without rewriting rows."""
+    (presentation_id,) = _add_presentations(1)
+    legacy = base64.b64encode(b"%PDF-1.4 deck").decode()
+    _store_raw(presentation_id, legacy)
+
+    result = runner.invoke(args=["normalize-presentation-files", "--dry-run"])
+    assert result.exit_code == 0
+    assert '"base64": 1' in result.output
+    stored = db.session.execute(
+        text("SELECT presentation_file FROM presentations WHERE id = :pid"), {"pid": presentation_id}
+    ).scalar()
+    assert stored == legacy
@@ -1,8 +1,15 @@
 # pylint: disable=duplicate-code,unused-argument
 """Tests for the /api/v1/presentations endpoints."""
 
+import base64
+import hashlib
 import io
-from datetime import datetime, timedelta
+import json
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote
+
+import pytest
+from sqlalchemy import event, text
 
 from website import db
 from website.models import BlockSchedule, Presentation, User
@@ -23,6 +30,23 @@ def test_get_presentations_nonempty(client, sample_presentation_fixture):
     assert data[0]["title"] == "Test Presentation"
 
 
+def test_get_presentations_checks_upload_table_once(client, app, sample_presentation_fixture):
+    """The upload metadata table is created and inspected once per app, not once per row."""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    client.get("/api/v1/presentations/")
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            client.get("/api/v1/presentations/")
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+    assert not [sql for sql in statements if "CREATE TABLE IF NOT EXISTS presentation_uploads" in sql]
+
+
 def test_get_presentations_includes_non_presentation_blocks(client, app):
     """GET /api/v1/presentations/ includes presentations on non-presentation blocks."""
     with app.app_context():
@@ -332,18 +356,19 @@ def test_upload_presentation_file_success(client, sample_presentation_fixture):
     """POST /api/v1/presentations/<id>/upload successfully uploads a file."""
     pres = sample_presentation_fixture
     data = {
-        "file": (io.BytesIO(b"dummy content"), "test.pptx")
+        "file": (io.BytesIO(b"PK\x03\x04dummy content"), "test.pptx")
     }
 
     res = client.post(f"/api/v1/presentations/{pres.id}/upload", data=data,
                       content_type="multipart/form-data")
     assert res.status_code == 200
     assert res.get_json()["message"] == "File uploaded successfully"
+    assert res.get_json()["size"] == 17
 
     # Verify DB updated
     uploaded_pres = Presentation.query.get(pres.id)
     assert uploaded_pres.presentation_file is not None
-    assert uploaded_pres.presentation_file.startswith(b"dummy")
+    assert uploaded_pres.presentation_file.startswith(b"PK\x03\x04dummy")
 
 
 def test_upload_presentation_file_invalid_type(client, sample_presentation_fixture):
@@ -384,7 +409,7 @@ def test_upload_presentation_file_too_large(client, sample_presentation_fixture)
     """Rejects files over 20MB."""
     pres = sample_presentation_fixture
     data = {
-        "file": (io.BytesIO(b"0" * (20 * 1024 * 1024 + 1)), "big.pptx")
+        "file": (io.BytesIO(b"PK\x03\x04" + b"0" * (20 * 1024 * 1024 - 3)), "big.pptx")
     }
     res = client.post(f"/api/v1/presentations/{pres.id}/upload", data=data,
                       content_type="multipart/form-data")
@@ -392,6 +417,26 @@ def test_upload_presentation_file_too_large(client, sample_presentation_fixture)
     assert "File exceeds 20MB" in res.get_json()["error"]
 
 
+def test_upload_presentation_file_rejects_spoofed_content(client, sample_presentation_fixture):
+    """A .pptx name is not enough; the leading bytes must match a presentation format."""
+    pres = sample_presentation_fixture
+    data = {"file": (io.BytesIO(b"<html>not a deck</html>"), "deck.pptx")}
+    res = client.post(f"/api/v1/presentations/{pres.id}/upload", data=data,
+                      content_type="multipart/form-data")
+    assert res.status_code == 400
+    assert "Invalid file type" in res.get_json()["error"]
+
+
+def test_upload_presentation_file_body_over_limit(client, sample_presentation_fixture):
+    """Bodies far past the file limit are cut off while being read with a JSON 413."""
+    pres = sample_presentation_fixture
+    data = {"file": (io.BytesIO(b"PK\x03\x04" + b"0" * (21 * 1024 * 1024)), "big.pptx")}
+    res = client.post(f"/api/v1/presentations/{pres.id}/upload", data=data,
+                      content_type="multipart/form-data")
+    assert res.status_code == 413
+    assert "maximum request size" in res.get_json()["error"]
+
+
 def test_download_all_presentations(client, sample_presentation_fixture):
     """GET /api/v1/presentations/download-all returns a ZIP with all presentations."""
     pres = sample_presentation_fixture
@@ -433,3 +478,534 @@ def test_download_all_presentations_skips_empty(client, sample_presentation_fixt
     with zipfile.ZipFile(zip_bytes, 'r') as zipf:
         # No files in ZIP
         assert zipf.namelist() == []
+
+
+def test_download_single_presentation_file(client, sample_presentation_fixture):
+    """GET /api/v1/presentations/<id>/file streams the deck with an ETag and range support."""
+    pres = sample_presentation_fixture
+    payload = b"%PDF-1.4 single deck"
+    upload = client.post(f"/api/v1/presentations/{pres.id}/upload",
+                         data={"file": (io.BytesIO(payload), "deck.pdf")},
+                         content_type="multipart/form-data")
+    sha256 = upload.get_json()["sha256"]
+
+    res = client.get(f"/api/v1/presentations/{pres.id}/file")
+    assert res.status_code == 200
+    assert res.data == payload
+    assert res.mimetype == "application/pdf"
+    assert res.headers["ETag"] == f'"{sha256}"'
+    assert res.headers["Accept-Ranges"] == "bytes"
+    assert ".pdf" in res.headers["Content-Disposition"]
+
+    cached = client.get(f"/api/v1/presentations/{pres.id}/file",
+                        headers={"If-None-Match": f'"{sha256}"'})
+    assert cached.status_code == 304
+
+    partial = client.get(f"/api/v1/presentations/{pres.id}/file", headers={"Range": "bytes=0-3"})
+    assert partial.status_code == 206
+    assert partial.data == b"%PDF"
+
+
+def test_download_single_presentation_file_legacy_and_missing(client, sample_presentation_fixture):
+    """Files stored before hashes were recorded still get an ETag; empty ones 404."""
+    pres = sample_presentation_fixture
+    res = client.get(f"/api/v1/presentations/{pres.id}/file")
+    assert res.status_code == 404
+
+    pres.presentation_file = b"PK\x03\x04legacy deck"
+    db.session.commit()
+    res = client.get(f"/api/v1/presentations/{pres.id}/file")
+    assert res.status_code == 200
+    assert res.mimetype.endswith("presentationml.presentation")
+    assert res.headers["ETag"]
+
+
+def test_download_single_presentation_file_offloaded(client, app, sample_presentation_fixture):
+    """With FILE_OFFLOAD set, the deck is handed to the web server instead of streamed."""
+    pres = sample_presentation_fixture
+    client.post(f"/api/v1/presentations/{pres.id}/upload",
+                data={"file": (io.BytesIO(b"%PDF-1.4 offloaded"), "deck.pdf")},
+                content_type="multipart/form-data")
+
+    app.config["FILE_OFFLOAD"] = "x-accel-redirect"
+    res = client.get(f"/api/v1/presentations/{pres.id}/file", headers={"Range": "bytes=0-3"})
+    assert res.status_code == 200
+    assert res.data == b""
+    assert res.headers["X-Accel-Redirect"].startswith(f"/_offload/decks/{pres.id}-")
+    assert "X-Sendfile" not in res.headers
+
+    app.config["FILE_OFFLOAD"] = "x-sendfile"
+    res = client.get("/api/v1/presentations/download-all")
+    assert res.status_code == 200
+    assert res.headers["X-Sendfile"].endswith(".zip")
+    assert res.mimetype == "application/zip"
+
+
+def test_download_all_presentations_filters(client, sample_presentation_fixture, sample_block_fixture):
+    """day, schedule_id, type and updated_since narrow the ZIP before any file is read."""
+    import zipfile
+
+    poster = sample_presentation_fixture
+    poster.presentation_file = b"%PDF poster"
+    talk_block = BlockSchedule(day="Day 2", start_time=datetime.now(), end_time=datetime.now(),
+                               title="Talks", block_type="Presentation", sub_length=15)
+    db.session.add(talk_block)
+    db.session.flush()
+    talk = Presentation(title="Talk", schedule_id=talk_block.id, presentation_file=b"PK\x03\x04talk")
+    db.session.add(talk)
+    db.session.commit()
+
+    def names(query):
+        res = client.get(f"/api/v1/presentations/download-all?{query}")
+        assert res.status_code == 200
+        with zipfile.ZipFile(io.BytesIO(res.data)) as zipf:
+            return zipf.namelist()
+
+    assert len(names("")) == 2
+    assert names("day=Day%201") == [f"presentation-{poster.id} - Test Presentation.pdf"]
+    assert names(f"schedule_id={talk_block.id}") == [f"presentation-{talk.id} - Talk.pptx"]
+    assert names("type=Poster") == [f"presentation-{poster.id} - Test Presentation.pdf"]
+
+    client.post(f"/api/v1/presentations/{talk.id}/upload",
+                data={"file": (io.BytesIO(b"PK\x03\x04new talk"), "talk.pptx")},
+                content_type="multipart/form-data")
+    since = (datetime.utcnow() - timedelta(minutes=5)).isoformat()
+    assert names(f"updated_since={since}") == [f"presentation-{talk.id} - Talk.pptx"]
+    # Aware values are compared in UTC: 5 minutes ago at UTC+05:00 is the same instant.
+    local = datetime.now(timezone(timedelta(hours=5))) - timedelta(minutes=5)
+    assert names(f"updated_since={quote(local.isoformat())}") == [f"presentation-{talk.id} - Talk.pptx"]
+    later = quote((datetime.now(timezone.utc) + timedelta(minutes=5)).isoformat())
+    assert names(f"updated_since={later}") == []
+
+    res = client.get("/api/v1/presentations/download-all?updated_since=yesterday")
+    assert res.status_code == 400
+
+
+def test_download_all_serves_maintained_archive(client, sample_presentation_fixture):
+    """Unfiltered downloads serve the prebuilt archive and report how stale it is."""
+    import zipfile
+    from website.routes.presentation_archive import rebuild_presentations_archive
+
+    pres = sample_presentation_fixture
+    client.post(f"/api/v1/presentations/{pres.id}/upload",
+                data={"file": (io.BytesIO(b"%PDF first deck"), "first.pdf")},
+                content_type="multipart/form-data")
+    assert client.get("/api/v1/presentations/download-all/status").get_json()["built"] is False
+    res = client.get("/api/v1/presentations/download-all")
+    assert res.status_code == 200
+    assert "X-Archive-Stale" not in res.headers
+
+    rebuild_presentations_archive()
+    res = client.get("/api/v1/presentations/download-all")
+    assert res.headers["X-Archive-Stale"] == "false"
+    assert res.headers["X-Archive-Pending-Changes"] == "0"
+
+    pres.title = "Renamed"
+    second = Presentation(title="Second", presentation_file=b"PK\x03\x04second deck")
+    db.session.add(second)
+    db.session.commit()
+    status = client.get("/api/v1/presentations/download-all/status").get_json()
+    assert status["stale"] is True
+    assert status["pending_changes"] == 2
+    res = client.get("/api/v1/presentations/download-all")
+    assert res.headers["X-Archive-Stale"] == "true"
+    with zipfile.ZipFile(io.BytesIO(res.data)) as zipf:
+        assert zipf.namelist() == [f"presentation-{pres.id} - Test Presentation.pdf"]
+
+    rebuild_presentations_archive()
+    res = client.get("/api/v1/presentations/download-all")
+    assert res.headers["X-Archive-Stale"] == "false"
+    with zipfile.ZipFile(io.BytesIO(res.data)) as zipf:
+        assert zipf.read(f"presentation-{pres.id} - Renamed.pdf") == b"%PDF first deck"
+        assert zipf.read(f"presentation-{second.id} - Second.pptx") == b"PK\x03\x04second deck"
+
+
+def test_archive_rebuilds_in_the_background_after_commits(client, app, sample_presentation_fixture):
+    """Commits that change the archive queue a rebuild; downloads only read the change counter."""
+    import zipfile
+    from website.background import BackgroundJobs
+    from website.routes.presentation_archive import REBUILDER_KEY
+
+    jobs = app.extensions[REBUILDER_KEY] = BackgroundJobs(app, "presentation-archive")
+    sample_presentation_fixture.presentation_file = b"%PDF background deck"
+    db.session.commit()
+    # The single worker runs jobs in order, so this returns once the rebuild is done.
+    jobs.executor.submit(lambda: None).result()
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        res = client.get("/api/v1/presentations/download-all")
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    assert res.headers["X-Archive-Stale"] == "false"
+    with zipfile.ZipFile(io.BytesIO(res.data)) as zipf:
+        assert zipf.namelist() == [f"presentation-{sample_presentation_fixture.id} - Test Presentation.pdf"]
+    assert not [sql for sql in statements if "presentation_file" in sql or sql.lstrip().startswith("UPDATE")]
+    jobs.executor.shutdown(wait=True)
+
+
+def test_upload_diagnostics_use_stored_metadata(client, sample_presentation_fixture, sample_user_fixture):
+    """Diagnostics report upload metadata and search presenters and titles in SQL."""
+    pres = sample_presentation_fixture
+    sample_user_fixture.presentation_id = pres.id
+    db.session.add(Presentation(title="No Upload Yet"))
+    db.session.commit()
+    payload = b"%PDF-1.4 diagnostics"
+    client.post(f"/api/v1/presentations/{pres.id}/upload",
+                data={"file": (io.BytesIO(payload), "slides.pdf")},
+                content_type="multipart/form-data")
+
+    body = client.get("/api/v1/presentations/upload-diagnostics").get_json()
+    assert body["count"] == 2
+    missing, uploaded = body["results"]
+    assert missing["included_in_zip"] is False
+    assert uploaded["presentation_file_bytes"] == len(payload)
+    assert uploaded["file_format"] == "pdf"
+    assert uploaded["uploaded_filename_metadata"] == "slides.pdf"
+    assert uploaded["zip_filename"] == "Jane Doe - Test Presentation.pdf"
+
+    by_presenter = client.get("/api/v1/presentations/upload-diagnostics?q=jane doe").get_json()
+    assert [row["presentation_id"] for row in by_presenter["results"]] == [pres.id]
+    by_filename = client.get("/api/v1/presentations/upload-diagnostics?q=SLIDES").get_json()
+    assert by_filename["count"] == 1
+    assert client.get("/api/v1/presentations/upload-diagnostics?q=100%").get_json()["count"] == 0
+
+
+def test_get_presentations_keyset_pagination(client, app):
+    """GET /api/v1/presentations/?limit= pages by id and returns a next cursor."""
+    with app.app_context():
+        db.session.add_all([Presentation(title=f"Paged {index}") for index in range(3)])
+        db.session.commit()
+
+    first = client.get("/api/v1/presentations/?limit=2")
+    assert first.status_code == 200
+    page = first.get_json()
+    assert [row["title"] for row in page["results"]] == ["Paged 0", "Paged 1"]
+    assert page["next"] == page["results"][-1]["id"]
+
+    second = client.get(f"/api/v1/presentations/?limit=2&after={page['next']}").get_json()
+    assert [row["title"] for row in second["results"]] == ["Paged 2"]
+    assert second["next"] is None
+
+
+def test_get_presentations_invalid_pagination(client):
+    """GET /api/v1/presentations/ rejects non-numeric pagination params."""
+    res = client.get("/api/v1/presentations/?limit=abc")
+    assert res.status_code == 400
+
+
+def _upload_abstract_image(client, sample_user_fixture, payload=b"\x89PNG\r\n\x1a\nimage-bytes",
+                           filename="figure.png"):
+    with client.session_transaction() as sess:
+        sess["user"] = {"email": sample_user_fixture.email}
+    res = client.post("/api/v1/presentations/abstract-images",
+                      data={"files": (io.BytesIO(payload), filename)},
+                      content_type="multipart/form-data")
+    assert res.status_code == 200
+    return res.get_json()["uploaded"][0]["url"]
+
+
+def test_abstract_image_stored_as_raw_bytes_with_immutable_caching(client, app, sample_user_fixture):
+    """Uploaded abstract images are stored raw and served with validators."""
+    payload = b"\x89PNG\r\n\x1a\nimage-bytes"
+    url = _upload_abstract_image(client, sample_user_fixture, payload)
+
+    with app.app_context():
+        data, data_base64 = db.session.execute(
+            text("SELECT data, data_base64 FROM abstract_images")).fetchone()
+    assert bytes(data) == payload
+    assert data_base64 == ""
+
+    res = client.get(url)
+    assert res.status_code == 200
+    assert res.data == payload
+    assert res.cache_control.immutable
+    assert res.cache_control.max_age == 365 * 24 * 60 * 60
+    assert res.headers["Accept-Ranges"] == "bytes"
+    assert res.last_modified is not None
+
+    res = client.get(url, headers={"If-None-Match": res.headers["ETag"]})
+    assert res.status_code == 304
+
+    res = client.get(url, headers={"Range": "bytes=0-3"})
+    assert res.status_code == 206
+    assert res.data == payload[:4]
+
+
+def test_legacy_base64_abstract_images_are_migrated(client, app, runner):
+    """Rows written before binary storage are served decoded, and the CLI moves them into data."""
+    with app.app_context():
+        db.session.execute(text("""
+            CREATE TABLE abstract_images (
+                id VARCHAR(64) PRIMARY KEY,
+                filename VARCHAR(255) NOT NULL,
+                mime_type VARCHAR(120) NOT NULL,
+                data_base64 TEXT NOT NULL,
+                uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+        db.session.execute(text("""
+            INSERT INTO abstract_images (id, filename, mime_type, data_base64)
+            VALUES ('legacy-image', 'old.png', 'image/png', :encoded)
+        """), {"encoded": base64.b64encode(b"legacy-bytes").decode("ascii")})
+        db.session.commit()
+
+    res = client.get("/api/v1/presentations/abstract-images/legacy-image")
+    assert res.status_code == 200
+    assert res.data == b"legacy-bytes"
+
+    result = runner.invoke(args=["migrate-abstract-images"])
+    assert result.exit_code == 0
+    assert json.loads(result.output)["converted"] == 1
+
+    with app.app_context():
+        data, data_base64 = db.session.execute(
+            text("SELECT data, data_base64 FROM abstract_images WHERE id = 'legacy-image'")).fetchone()
+    assert bytes(data) == b"legacy-bytes"
+    assert data_base64 == ""
+
+
+def test_abstract_image_derivatives(client, sample_user_fixture):
+    """Raster uploads lose metadata and are served in web and print sizes."""
+    from PIL import Image  # pylint: disable=import-outside-toplevel
+
+    exif = Image.Exif()
+    exif[0x010F] = "Camera Maker"
+    buffer = io.BytesIO()
+    Image.new("RGB", (3000, 2000), "teal").save(buffer, format="JPEG", exif=exif)
+    url = _upload_abstract_image(client, sample_user_fixture, buffer.getvalue())
+
+    original = Image.open(io.BytesIO(client.get(url).data))
+    assert original.size == (3000, 2000)
+    assert not original.getexif()
+
+    res = client.get(f"{url}?size=web", headers={"Accept": "image/jpeg"})
+    assert res.status_code == 200
+    assert res.mimetype == "image/jpeg"
+    assert "Accept" in res.vary
+    assert Image.open(io.BytesIO(res.data)).size == (1280, 853)
+
+    res = client.get(f"{url}?size=web", headers={"Accept": "image/webp,image/*"})
+    assert res.mimetype == "image/webp"
+
+    # Wildcards alone are what browsers without WebP support send.
+    res = client.get(f"{url}?size=web", headers={"Accept": "image/png,image/svg+xml,image/*;q=0.8,*/*;q=0.5"})
+    assert res.mimetype == "image/jpeg"
+    res = client.get(f"{url}?size=web", headers={"Accept": "image/webp;q=0,image/*"})
+    assert res.mimetype == "image/jpeg"
+
+    res = client.get(f"{url}?size=print")
+    assert max(Image.open(io.BytesIO(res.data)).size) == 2400
+
+    assert client.get(f"{url}?size=huge").status_code == 400
+
+
+def test_abstract_image_metadata_strip_avoids_a_lossy_pass(client, sample_user_fixture):
+    """Upright JPEGs keep their quantization and color profile; lossy WebP stays lossy."""
+    from PIL import Image, ImageCms  # pylint: disable=import-outside-toplevel
+
+    icc = ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB")).tobytes()
+    exif = Image.Exif()
+    exif[0x010F] = "Camera Maker"
+    photo = Image.effect_noise((200, 200), 60).convert("RGB")
+
+    buffer = io.BytesIO()
+    photo.save(buffer, format="JPEG", quality=70, exif=exif, icc_profile=icc)
+    url = _upload_abstract_image(client, sample_user_fixture, buffer.getvalue(), "photo.jpg")
+    stored = Image.open(io.BytesIO(client.get(url).data))
+    assert stored.quantization == Image.open(buffer).quantization
+    assert stored.info["icc_profile"] == icc
+    assert not stored.getexif()
+
+    buffer = io.BytesIO()
+    photo.save(buffer, format="WEBP", quality=60, exif=exif)
+    url = _upload_abstract_image(client, sample_user_fixture, buffer.getvalue(), "photo.webp")
+    data = client.get(url).data
+    assert data[12:16] == b"VP8X" and b"VP8 " in data
+    assert b"EXIF" not in data
+    assert len(data) < len(buffer.getvalue())
+
+
+def test_abstract_image_derivatives_are_backfilled_by_the_cli(client, app, runner, sample_user_fixture):
+    """Reads never write derivatives; images from before them are derived by the CLI."""
+    from PIL import Image  # pylint: disable=import-outside-toplevel
+    from website.routes.abstract_images import clear_abstract_image_cache  # pylint: disable=import-outside-toplevel
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (3000, 2000), "teal").save(buffer, format="JPEG")
+    url = _upload_abstract_image(client, sample_user_fixture, buffer.getvalue())
+    with app.app_context():
+        db.session.execute(text("DELETE FROM abstract_image_variants"))
+        db.session.commit()
+    clear_abstract_image_cache()
+
+    assert Image.open(io.BytesIO(client.get(f"{url}?size=web").data)).size == (3000, 2000)
+    with app.app_context():
+        assert db.session.execute(text("SELECT COUNT(*) FROM abstract_image_variants")).scalar() == 0
+
+    result = runner.invoke(args=["migrate-abstract-images"])
+    assert json.loads(result.output)["derived"] == 1
+    clear_abstract_image_cache()
+    assert Image.open(io.BytesIO(client.get(f"{url}?size=web").data)).size == (1280, 853)
+
+
+def test_abstract_image_without_derivatives_falls_back_to_original(client, sample_user_fixture):
+    """Uploads Pillow cannot rasterize are served unchanged for every size."""
+    svg = b'<svg xmlns="http://www.w3.org/2000/svg" width="4" height="4"></svg>'
+    url = _upload_abstract_image(client, sample_user_fixture, svg, "figure.svg")
+    res = client.get(f"{url}?size=web")
+    assert res.status_code == 200
+    assert res.mimetype == "image/svg+xml"
+    assert res.data == svg
+
+
+def test_abstract_image_upload_is_all_or_nothing(client, app, sample_user_fixture):
+    """One bad file rejects the whole batch without storing the good ones."""
+    with client.session_transaction() as sess:
+        sess["user"] = {"email": sample_user_fixture.email}
+    res = client.post("/api/v1/presentations/abstract-images", data={"files": [
+        (io.BytesIO(b"\x89PNG\r\n\x1a\nfine"), "good.png"),
+        (io.BytesIO(b"MZ\x90\x00 executable"), "evil.png"),
+    ]}, content_type="multipart/form-data")
+    assert res.status_code == 400
+    assert "evil.png" in res.get_json()["error"]
+
+    with app.app_context():
+        tables = db.session.execute(text(
+            "SELECT name FROM sqlite_master WHERE name = 'abstract_images'")).fetchall()
+        if tables:
+            assert db.session.execute(text("SELECT COUNT(*) FROM abstract_images")).scalar() == 0
+
+
+def test_resumable_presentation_upload(client, app, sample_presentation_fixture, tmp_path):
+    """Chunks are PATCHed at offsets, can be resumed, and finalize stores the file."""
+    app.config["UPLOAD_STAGING_DIR"] = str(tmp_path)
+    pres = sample_presentation_fixture
+    payload = b"PK\x03\x04" + b"slide-data" * 1000
+    base = f"/api/v1/presentations/{pres.id}/upload/sessions"
+
+    res = client.post(base, json={"filename": "deck.pptx", "size": len(payload)})
+    assert res.status_code == 201
+    upload_id = res.get_json()["upload_id"]
+    url = f"{base}/{upload_id}"
+
+    res = client.patch(url, data=payload[:4000], headers={"Upload-Offset": "0"})
+    assert res.get_json()["offset"] == 4000
+
+    # A retried chunk at a stale offset is refused with the offset to resume from.
+    res = client.patch(url, data=payload[:4000], headers={"Upload-Offset": "0"})
+    assert res.status_code == 409
+    assert res.get_json()["offset"] == 4000
+
+    assert client.post(f"{url}/finalize").status_code == 409
+
+    res = client.patch(url, data=payload[4000:], headers={"Upload-Offset": "4000"})
+    assert res.headers["Upload-Offset"] == str(len(payload))
+    assert client.get(url).get_json()["complete"] is True
+
+    res = client.post(f"{url}/finalize")
+    assert res.status_code == 200
+    assert res.get_json()["filename"] == "deck.pptx"
+    assert client.get(url).status_code == 404
+    assert list(tmp_path.iterdir()) == []
+
+    with app.app_context():
+        assert db.session.get(Presentation, pres.id).presentation_file == payload
+        filename = db.session.execute(text(
+            "SELECT filename FROM presentation_uploads WHERE presentation_id = :pid"),
+            {"pid": pres.id}).scalar()
+    assert filename == "deck.pptx"
+
+
+def test_resumable_upload_chunks_claim_their_offset(client, app, sample_presentation_fixture, tmp_path):
+    """Only one of two chunks sent at the same offset is appended; failed chunks leave the offset alone."""
+    from website.routes.uploads import UploadConflict, append_upload_chunk  # pylint: disable=import-outside-toplevel
+
+    app.config["UPLOAD_STAGING_DIR"] = str(tmp_path)
+    base = f"/api/v1/presentations/{sample_presentation_fixture.id}/upload/sessions"
+    upload_id = client.post(base, json={"filename": "deck.pptx", "size": 100}).get_json()["upload_id"]
+
+    res = client.patch(f"{base}/{upload_id}", data=b"<html>bad</html>", headers={"Upload-Offset": "0"})
+    assert res.status_code == 400
+    assert res.get_json()["offset"] == 0
+
+    with app.test_request_context():
+        assert append_upload_chunk(upload_id, io.BytesIO(b"PK\x03\x04" * 4), 0, 16, 100) == 16
+        with pytest.raises(UploadConflict):
+            append_upload_chunk(upload_id, io.BytesIO(b"PK\x03\x04" * 4), 0, 16, 100)
+    assert client.get(f"{base}/{upload_id}").get_json()["offset"] == 16
+    assert (tmp_path / f"{upload_id}.part").stat().st_size == 16
+
+
+def test_resumable_upload_offset_follows_the_staged_bytes(client, app, sample_presentation_fixture, tmp_path):
+    """A chunk interrupted mid-write never moves the offset, and offsets past the staged bytes are refused."""
+    from website.routes.uploads import (  # pylint: disable=import-outside-toplevel
+        UploadConflict,
+        append_upload_chunk,
+        locked_staged_file,
+    )
+
+    class DyingStream(io.BytesIO):
+        """Stands in for a worker killed after part of a chunk reached the disk."""
+
+        def read(self, size=-1):
+            data = super().read(size)
+            if not data:
+                raise OSError("worker killed")
+            return data
+
+    app.config["UPLOAD_STAGING_DIR"] = str(tmp_path)
+    payload = b"PK\x03\x04" + b"slide-data" * 10
+    base = f"/api/v1/presentations/{sample_presentation_fixture.id}/upload/sessions"
+    url = f"{base}/{client.post(base, json={'filename': 'deck.pptx', 'size': len(payload)}).get_json()['upload_id']}"
+    upload_id = url.rsplit("/", 1)[1]
+
+    with app.test_request_context():
+        with pytest.raises(OSError):
+            append_upload_chunk(upload_id, DyingStream(payload[:50]), 0, 50, len(payload))
+        with locked_staged_file(upload_id):
+            with pytest.raises(UploadConflict):
+                append_upload_chunk(upload_id, io.BytesIO(payload[:50]), 0, 50, len(payload))
+    assert client.get(url).get_json()["offset"] == 0
+
+    # An offset recorded ahead of the staged bytes cannot be resumed from.
+    with app.app_context():
+        db.session.execute(text("UPDATE presentation_upload_sessions SET received = 80 WHERE id = :id"),
+                           {"id": upload_id})
+        db.session.commit()
+    res = client.patch(url, data=payload[80:], headers={"Upload-Offset": "80"})
+    assert res.status_code == 409
+    assert (tmp_path / f"{upload_id}.part").stat().st_size == 50
+
+
+def test_resumable_upload_finalize_checks_the_client_digest(client, app, sample_presentation_fixture, tmp_path):
+    """A sha256 sent with finalize must match the staged bytes before anything is stored."""
+    app.config["UPLOAD_STAGING_DIR"] = str(tmp_path)
+    payload = b"%PDF-1.4 deck"
+    base = f"/api/v1/presentations/{sample_presentation_fixture.id}/upload/sessions"
+    url = f"{base}/{client.post(base, json={'filename': 'deck.pdf', 'size': len(payload)}).get_json()['upload_id']}"
+    assert client.patch(url, data=payload, headers={"Upload-Offset": "0"}).status_code == 200
+
+    res = client.post(f"{url}/finalize", json={"sha256": hashlib.sha256(b"other").hexdigest()})
+    assert res.status_code == 400
+    assert res.get_json()["error"] == "Upload checksum mismatch"
+
+    res = client.post(f"{url}/finalize", json={"sha256": hashlib.sha256(payload).hexdigest()})
+    assert res.status_code == 200
+
+
+def test_resumable_upload_rejects_bad_first_chunk(client, app, sample_presentation_fixture, tmp_path):
+    """The first chunk is sniffed before anything more is accepted."""
+    app.config["UPLOAD_STAGING_DIR"] = str(tmp_path)
+    base = f"/api/v1/presentations/{sample_presentation_fixture.id}/upload/sessions"
+    assert client.post(base, json={"filename": "deck.pptx", "size": 30 * 1024 * 1024}).status_code == 400
+
+    upload_id = client.post(base, json={"filename": "deck.pptx", "size": 10}).get_json()["upload_id"]
+    res = client.patch(f"{base}/{upload_id}", data=b"<html>bad</html>", headers={"Upload-Offset": "0"})
+    assert res.status_code == 400
+    assert res.get_json()["offset"] == 0
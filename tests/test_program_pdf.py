@@ -0,0 +1,163 @@
+# pylint: disable=unused-argument
+"""Tests for the content-hash cached program PDF."""
+import io
+import os
+from datetime import timedelta
+
+from website import db
+from website.models import BlockSchedule, Presentation
+from website.routes import program_pdf
+
+
+def _count_renders(monkeypatch):
+    calls = []
+    render = program_pdf.render_program_pdf
+
+    def counting_render(document, path):
+        calls.append(document)
+        render(document, path)
+
+    monkeypatch.setattr(program_pdf, 'render_program_pdf', counting_render)
+    return calls
+
+
+def test_program_pdf_is_served_from_cache_until_inputs_change(client, app, sample_presentation_fixture, monkeypatch):
+    """An unchanged program is not re-rendered; editing a title changes the hash."""
+    renders = _count_renders(monkeypatch)
+
+    first = client.get("/overview/download.pdf")
+    assert first.status_code == 200
+    assert first.data.startswith(b"%PDF")
+    assert first.headers["X-Program-Stale"] == "false"
+    etag = first.headers["ETag"]
+
+    second = client.get("/overview/download.pdf")
+    assert second.status_code == 200
+    assert second.headers["ETag"] == etag
+    assert len(renders) == 1
+
+    not_modified = client.get("/overview/download.pdf", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+
+    db.session.get(Presentation, sample_presentation_fixture.id).title = "Renamed Talk"
+    db.session.commit()
+
+    third = client.get("/overview/download.pdf")
+    assert third.headers["ETag"] != etag
+    assert len(renders) == 2
+    builds = os.listdir(os.path.join(app.config["FILE_OFFLOAD_ROOT"], program_pdf.PDF_NAMESPACE))
+    assert builds == [f"all--{third.headers['ETag'].strip(chr(34))}.pdf"]
+
+
+def test_program_pdf_day_and_type_variants(client, app, sample_block_fixture, monkeypatch):
+    """Day and type variants select their presentations and keep full-program ids."""
+    renders = _count_renders(monkeypatch)
+    with app.app_context():
+        other_day = BlockSchedule(
+            day="Day 2",
+            start_time=sample_block_fixture.start_time + timedelta(days=1),
+            end_time=sample_block_fixture.end_time + timedelta(days=1),
+            title="Later Posters",
+            block_type="poster",
+            is_presentation=True,
+        )
+        db.session.add(other_day)
+        db.session.flush()
+        db.session.add_all([
+            Presentation(title="First Poster", schedule_id=sample_block_fixture.id, num_in_block=0),
+            Presentation(title="Second Poster", schedule_id=other_day.id, num_in_block=0),
+        ])
+        db.session.commit()
+        first_day = sample_block_fixture.day
+
+    res = client.get("/overview/download.pdf?day=Day 2&type=poster")
+    assert res.status_code == 200
+    assert res.headers["Content-Disposition"].endswith("cusrr_program-day-day-2-type-poster.pdf")
+    document = renders[-1]
+    assert [entry["title"] for entry in document["entries"]] == ["Second Poster"]
+    assert document["entries"][0]["program_id"] == "poster-2"
+
+    res = client.get(f"/overview/download.pdf?day={first_day}")
+    assert res.status_code == 200
+    assert [entry["title"] for entry in renders[-1]["entries"]] == ["First Poster"]
+
+
+def test_program_pdf_rejects_unknown_type(client):
+    """An unknown ?type= is a client error rather than an empty PDF."""
+    res = client.get("/overview/download.pdf?type=keynote")
+    assert res.status_code == 400
+    assert "keynote" in res.get_json()["error"]
+
+
+def test_parallel_render_matches_serial_pages(app, sample_block_fixture, tmp_path):
+    """Chunks rendered on the process pool merge into the same pages as one serial render."""
+    from pypdf import PdfReader
+
+    db.session.add_all([
+        Presentation(
+            title=f"Poster {index}",
+            abstract=f"Abstract for poster {index}.\n\nSecond paragraph.",
+            schedule_id=sample_block_fixture.id,
+            num_in_block=index,
+        )
+        for index in range(5)
+    ])
+    db.session.commit()
+    document = program_pdf.program_document()
+
+    def page_texts(path):
+        return [page.extract_text() for page in PdfReader(path).pages]
+
+    app.config.update(PROGRAM_PDF_WORKERS=1)
+    program_pdf.render_program_pdf(document, str(tmp_path / "serial.pdf"))
+    app.config.update(PROGRAM_PDF_WORKERS=2, PROGRAM_PDF_CHUNK_SIZE=2)
+    program_pdf.render_program_pdf(document, str(tmp_path / "parallel.pdf"))
+
+    serial = page_texts(tmp_path / "serial.pdf")
+    parallel = page_texts(tmp_path / "parallel.pdf")
+    assert len(parallel) == len(serial) == 6
+    assert parallel == serial
+    assert "Poster 4" in parallel[-1]
+
+
+def test_abstract_images_are_fetched_in_one_query_and_downscaled(app, sample_block_fixture, tmp_path):
+    """Program images come from one IN query and are resampled to their printed size."""
+    from PIL import Image
+    from sqlalchemy import event
+    from website.routes.abstract_images import ensure_abstract_image_table, store_abstract_image
+
+    ensure_abstract_image_table()
+    buffer = io.BytesIO()
+    Image.new('RGB', (3000, 1500), 'navy').save(buffer, format='JPEG')
+    image_ids = [store_abstract_image(f"figure-{index}.jpg", "image/jpeg", buffer.getvalue())
+                 for index in range(3)]
+    db.session.commit()
+    abstract = "\n".join(
+        f"![Figure {index}](/api/v1/presentations/abstract-images/{image_id})"
+        for index, image_id in enumerate(image_ids)
+    ) + "\n![Missing](/api/v1/presentations/abstract-images/does-not-exist)"
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        images = program_pdf._program_images(image_ids + ["does-not-exist"])
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+    assert len(statements) == 1 and " IN " in statements[0]
+    assert set(images) == set(image_ids)
+    data, draw_width, draw_height = images[image_ids[0]]
+    assert (draw_width, draw_height) == (program_pdf.IMAGE_MAX_WIDTH, program_pdf.IMAGE_MAX_WIDTH / 2)
+    expected_width = round(draw_width / 72 * program_pdf.PDF_IMAGE_DPI)
+    assert Image.open(io.BytesIO(data)).size[0] == expected_width
+
+    db.session.add(Presentation(title="Figures", abstract=abstract, schedule_id=sample_block_fixture.id))
+    db.session.commit()
+    document = program_pdf.program_document()
+    assert document["entries"][0]["image_ids"] == image_ids + ["does-not-exist"]
+    program_pdf.render_program_pdf(document, str(tmp_path / "figures.pdf"))
+    assert (tmp_path / "figures.pdf").stat().st_size > 0
@@ -0,0 +1,116 @@
+# pylint: disable=unused-argument
+"""Tests for single-flight coalescing of identical concurrent reads."""
+import threading
+import time
+
+from flask import jsonify
+
+from website.request_coalescing import SingleFlight, coalesced
+
+
+def test_single_flight_shares_one_computation():
+    """Callers arriving while a key is in flight get the leader's result."""
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "payload"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do("key", compute, "list")))
+    leader.start()
+    started.wait(5)
+    waiters = [threading.Thread(target=lambda: results.append(flights.do("key", compute, "list")))
+               for _ in range(4)]
+    for waiter in waiters:
+        waiter.start()
+    while flights.metrics()["waiting"] < 4:
+        time.sleep(0.01)
+    release.set()
+    for thread in [leader, *waiters]:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert sorted(results) == [("payload", False)] + [("payload", True)] * 4
+    assert flights.metrics()["endpoints"]["list"] == {"executed": 1, "coalesced": 4}
+
+
+def test_waiters_recompute_when_the_leader_fails():
+    """A leader's error is its own; a waiter runs the computation itself."""
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("boom")
+
+    errors = []
+
+    def lead():
+        try:
+            flights.do("key", failing)
+        except RuntimeError as exc:
+            errors.append(exc)
+
+    leader = threading.Thread(target=lead)
+    leader.start()
+    started.wait(5)
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(flights.do("key", lambda: "fresh")))
+    waiter.start()
+    while flights.metrics()["waiting"] < 1:
+        time.sleep(0.01)
+    release.set()
+    leader.join(5)
+    waiter.join(5)
+
+    assert len(errors) == 1
+    assert result == [("fresh", False)]
+    assert flights.metrics()["totals"] == {"errors": 1, "leader_failed": 1}
+
+
+def test_coalesced_view_returns_independent_responses(app):
+    """Concurrent requests to a decorated view share one body but get their own responses."""
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    @coalesced
+    def slow_list():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return jsonify({"items": [1, 2, 3]})
+
+    app.add_url_rule("/slow-list", "slow_list", slow_list)
+    responses = []
+
+    def fetch():
+        responses.append(app.test_client().get("/slow-list?b=2&a=1"))
+
+    first = threading.Thread(target=fetch)
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=fetch)
+    second.start()
+    flights = app.extensions["request_coalescing"]
+    while flights.metrics()["waiting"] < 1:
+        time.sleep(0.01)
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    assert len(calls) == 1
+    assert [response.get_json() for response in responses] == [{"items": [1, 2, 3]}] * 2
+    assert sorted(response.headers.get("X-Coalesced", "") for response in responses) == ["", "true"]
+
+
+def test_program_list_reports_metrics(client, sample_presentation_fixture):
+    """Coalesced endpoints record executions in the worker's metrics."""
+    assert client.get("/program/list").status_code == 200
+    metrics = client.get("/overview/request-coalescing").get_json()
+    assert metrics["endpoints"]["presentation_overview.get_public_program_list"]["executed"] == 1
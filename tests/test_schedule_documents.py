@@ -0,0 +1,196 @@
+# pylint: disable=unused-argument
+"""Tests for the materialized per-day schedule documents."""
+import gzip
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, text
+
+from website import db
+from website.models import BlockSchedule, Presentation, User
+from website.routes.presentations import METADATA_READY_KEY, ensure_presentation_metadata_columns
+from website.schedule_documents import SCHEDULE_DOCUMENT_VERSION
+
+
+def _stored_days():
+    return {row[0] for row in db.session.execute(text("SELECT day FROM schedule_documents"))}
+
+
+def _first_row(payload):
+    return payload["presentations"][0]["presentations"][0]
+
+
+def test_commits_rebuild_the_day_document(client, sample_presentation_fixture):
+    """The document is rewritten by the commit that changes it."""
+    assert "Day 1" in _stored_days()
+
+    db.session.get(Presentation, sample_presentation_fixture.id).title = "Rewritten"
+    db.session.commit()
+
+    res = client.get("/api/v1/block-schedule/day/Day 1/full")
+    assert res.status_code == 200
+    assert _first_row(res.get_json())["title"] == "Rewritten"
+
+
+def test_presenter_changes_rebuild_the_day_document(client, sample_presentation_fixture):
+    """Presenter names are part of the payload, so editing a presenter rebuilds it."""
+    presenter = User(firstname="Ada", lastname="Lovelace", email="ada@example.com",
+                     presentation_id=sample_presentation_fixture.id)
+    db.session.add(presenter)
+    db.session.commit()
+
+    presenters = _first_row(client.get("/api/v1/block-schedule/day/Day 1/full").get_json())["presenters"]
+    assert [p["name"] for p in presenters] == ["Ada Lovelace"]
+
+
+def test_documents_are_sent_precompressed(client, sample_presentation_fixture):
+    """Clients accepting gzip get the stored compressed bytes with a matching ETag."""
+    plain = client.get("/api/v1/block-schedule/day/Day 1/full")
+    packed = client.get("/api/v1/block-schedule/day/Day 1/full", headers={"Accept-Encoding": "gzip"})
+
+    assert packed.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(packed.get_data()) == plain.get_data()
+    assert packed.headers["ETag"] == f'W/{plain.headers["ETag"]}'
+
+    cached = client.get("/api/v1/block-schedule/day/Day 1/full", headers={"If-None-Match": plain.headers["ETag"]})
+    assert cached.status_code == 304
+
+
+def test_numbering_changes_rebuild_other_days(client, sample_presentation_fixture):
+    """Hiding a Day 1 poster renumbers the Day 2 poster, whose day was not tagged."""
+    start = datetime.now() + timedelta(days=1)
+    block = BlockSchedule(day="Day 2", start_time=start, end_time=start + timedelta(hours=1),
+                          title="Second Posters", block_type="poster", sub_length=15)
+    db.session.add(block)
+    db.session.flush()
+    db.session.add(Presentation(title="Later Poster", abstract="", schedule_id=block.id, num_in_block=0))
+    db.session.commit()
+    assert _first_row(client.get("/api/v1/block-schedule/day/Day 2/full").get_json())["program_identifier"] == "poster-2"
+
+    res = client.put(f"/api/v1/presentations/{sample_presentation_fixture.id}", json={"show_on_schedule": False})
+    assert res.status_code == 200
+
+    assert _first_row(client.get("/api/v1/block-schedule/day/Day 2/full").get_json())["program_identifier"] == "poster-1"
+
+
+def test_missing_documents_are_built_on_first_read(client, sample_presentation_fixture):
+    """A day with no stored row is built from the live tables and then kept."""
+    db.session.execute(text("DELETE FROM schedule_documents"))
+    db.session.commit()
+
+    res = client.get("/api/v1/block-schedule/day/Day 1/full")
+    assert _first_row(json.loads(res.get_data()))["title"] == "Test Presentation"
+    assert _stored_days() == {"Day 1"}
+
+    empty = client.get("/api/v1/block-schedule/day/Nowhere/full")
+    assert empty.get_json() == {"blocks": [], "presentations": []}
+
+
+def test_rows_from_an_older_document_version_are_rebuilt(client, sample_presentation_fixture):
+    """A stored document built for an older payload shape is rebuilt on its next read."""
+    db.session.execute(text("""
+        UPDATE schedule_documents SET body = :body, etag = 'stale', document_version = :version
+        WHERE day = 'Day 1'
+    """), {"body": b'{"old": true}\n', "version": SCHEDULE_DOCUMENT_VERSION - 1})
+    db.session.commit()
+
+    res = client.get("/api/v1/block-schedule/day/Day 1/full")
+    assert _first_row(res.get_json())["title"] == "Test Presentation"
+    assert res.headers["ETag"] != '"stale"'
+    version = db.session.execute(text("SELECT document_version FROM schedule_documents WHERE day = 'Day 1'"))
+    assert version.scalar() == SCHEDULE_DOCUMENT_VERSION
+
+
+def test_unknown_days_skip_the_rebuild(app, client, sample_presentation_fixture):
+    """A day without blocks is answered without scanning presentations or writing anything."""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    # The first request runs the once-per-app schema checks.
+    client.get("/api/v1/block-schedule/day/Elsewhere/full")
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        res = client.get("/api/v1/block-schedule/day/Nowhere/full")
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    assert res.get_json() == {"blocks": [], "presentations": []}
+    assert not [sql for sql in statements if "FROM presentations" in sql or "CREATE TABLE" in sql]
+    assert not [sql for sql in statements if sql.lstrip().startswith(("INSERT", "UPDATE", "DELETE"))]
+
+
+def test_full_schedule_bundles_every_public_day(client, sample_presentation_fixture):
+    """/full carries each public day's document and revalidates without bodies."""
+    start = datetime.now() + timedelta(days=1)
+    db.session.add_all([
+        BlockSchedule(day="Day 2", start_time=start, end_time=start + timedelta(hours=1), title="Closing"),
+        BlockSchedule(day="Unassigned", start_time=start, end_time=start + timedelta(hours=1), title="Parked"),
+    ])
+    db.session.commit()
+
+    res = client.get("/api/v1/block-schedule/full")
+    assert res.status_code == 200
+    bundle = res.get_json()
+    assert sorted(bundle["days"]) == ["Day 1", "Day 2"]
+    assert bundle["days"] == client.get("/api/v1/block-schedule/days").get_json()
+    assert bundle["schedule"]["Day 1"] == client.get("/api/v1/block-schedule/day/Day 1/full").get_json()
+
+    cached = client.get("/api/v1/block-schedule/full", headers={"If-None-Match": res.headers["ETag"]})
+    assert cached.status_code == 304
+
+    db.session.get(Presentation, sample_presentation_fixture.id).title = "Moved On"
+    db.session.commit()
+    fresh = client.get("/api/v1/block-schedule/full", headers={"If-None-Match": res.headers["ETag"]})
+    assert fresh.status_code == 200
+    assert _first_row(fresh.get_json()["schedule"]["Day 1"])["title"] == "Moved On"
+
+
+def test_day_payloads_carry_abstract_previews(client, sample_presentation_fixture):
+    """Rows hold a plain-text preview and length; the full abstract comes from /overview/<id>."""
+    abstract = "## Results\n\n![chart](/api/v1/presentations/abstract-images/abc) **Bold** finding. " + "x" * 400
+    db.session.get(Presentation, sample_presentation_fixture.id).abstract = abstract
+    db.session.commit()
+
+    row = _first_row(client.get("/api/v1/block-schedule/day/Day 1/full").get_json())
+    assert "abstract" not in row
+    assert row["abstract_preview"].startswith("Results Bold finding. xxx")
+    assert len(row["abstract_preview"]) == 200
+    assert row["abstract_length"] == len(abstract)
+
+    detail = client.get(f"/overview/{sample_presentation_fixture.id}").get_json()
+    assert detail["abstract"] == abstract
+    assert detail["program_identifier"] == row["program_identifier"]
+
+
+def test_overview_detail_numbering_skips_file_columns(client, sample_presentation_fixture):
+    """Numbering on a cache miss loads only the identifier columns, not every file blob."""
+    db.session.add(Presentation(title="Sibling", abstract="", schedule_id=sample_presentation_fixture.schedule_id,
+                                num_in_block=1, presentation_file=b"%PDF-1.4"))
+    db.session.commit()
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        res = client.get(f"/overview/{sample_presentation_fixture.id}")
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    assert res.get_json()["program_identifier"] == "poster-1"
+    # Only the requested presentation is read in full.
+    assert len([sql for sql in statements if "presentations.presentation_file" in sql]) == 1
+    assert len([sql for sql in statements if "FROM presentation_visibility" in sql]) <= 2
+
+
+def test_existing_rows_get_previews_backfilled(app, sample_presentation_fixture):
+    """Rows written before the preview columns existed are filled in by the schema check."""
+    db.session.execute(text("UPDATE presentations SET abstract_preview = NULL, abstract_length = NULL"))
+    db.session.commit()
+    app.extensions.pop(METADATA_READY_KEY, None)
+
+    ensure_presentation_metadata_columns()
+
+    row = db.session.execute(text("SELECT abstract_preview, abstract_length FROM presentations")).one()
+    assert tuple(row) == ("A test abstract", len("A test abstract"))
@@ -0,0 +1,65 @@
+# pylint: disable=unused-argument
+"""Tests for the static export of the public schedule and program."""
+import json
+import os
+
+from website import db
+from website.models import Presentation
+
+
+def _export(runner):
+    result = runner.invoke(args=["export-static"])
+    assert result.exit_code == 0, result.output
+    return json.loads(result.output)
+
+
+def test_export_static_writes_pages_and_feeds(runner, app, sample_presentation_fixture, tmp_path):
+    """Pages carry the feed map and each feed holds what the API serves."""
+    app.config["STATIC_EXPORT_ROOT"] = str(tmp_path / "site")
+    report = _export(runner)
+
+    current = tmp_path / "site" / "current"
+    manifest = json.loads((current / "manifest.json").read_text())
+    assert manifest["version"] == report["version"]
+
+    schedule_html = (current / "schedule" / "index.html").read_text()
+    assert "window.CUSRR_STATIC_FEEDS" in schedule_html
+    assert "/static/js/static-feeds.js" in schedule_html
+    assert (current / "static" / "js" / "static-feeds.js").is_file()
+
+    feeds = manifest["feeds"]
+    assert json.loads((current / feeds["/api/v1/block-schedule/days"].lstrip("/")).read_text()) == ["Day 1"]
+    day_feed = json.loads((current / feeds["/api/v1/block-schedule/day/Day%201/full"].lstrip("/")).read_text())
+    assert day_feed["presentations"][0]["presentations"][0]["title"] == "Test Presentation"
+    posters = json.loads((current / feeds["/program/list?type=Poster"].lstrip("/")).read_text())
+    assert [row["title"] for row in posters] == ["Test Presentation"]
+
+
+def test_export_static_only_writes_changed_files(runner, app, sample_presentation_fixture, tmp_path):
+    """A second export hard-links unchanged files and rewrites only affected feeds."""
+    app.config["STATIC_EXPORT_ROOT"] = str(tmp_path / "site")
+    first = _export(runner)
+
+    db.session.get(Presentation, sample_presentation_fixture.id).title = "Renamed Talk"
+    db.session.commit()
+    second = _export(runner)
+
+    assert second["version"] != first["version"]
+    assert "feeds/program-list.json" in second["written"]
+    assert "feeds/program-list-blitz.json" not in second["written"]
+    assert not any(name.endswith(".html") or name.startswith("static/") for name in second["written"])
+
+    versions = tmp_path / "site" / "versions"
+    unchanged = "static/js/static-feeds.js"
+    assert os.stat(versions / first["version"] / unchanged).st_ino == \
+        os.stat(versions / second["version"] / unchanged).st_ino
+    assert os.path.realpath(tmp_path / "site" / "current") == str(versions / second["version"])
+
+
+def test_export_static_route(client, app, sample_block_fixture, tmp_path):
+    """The organizer button's endpoint publishes a version and reports it."""
+    app.config["STATIC_EXPORT_ROOT"] = str(tmp_path / "site")
+    res = client.post("/api/v1/block-schedule/export-static")
+    assert res.status_code == 201
+    assert (tmp_path / "site" / "current" / "index.html").is_file()
+    assert res.get_json()["files"] > 0
@@ -0,0 +1,146 @@
+# pylint: disable=unused-argument
+"""Tests for the organizer table endpoints and streamed list responses."""
+
+from website import db
+from website.models import Presentation, User
+
+
+def test_users_table_streams_rows(client, app, sample_presentation_fixture):
+    """GET /api/v1/users/table streams one row per user with presentation status."""
+    with app.app_context():
+        db.session.add_all([
+            User(firstname="Ann", lastname="Able", email="ann@example.com",
+                 presentation_id=sample_presentation_fixture.id),
+            User(firstname="Bo", lastname="Baker", email="bo@example.com"),
+        ])
+        db.session.commit()
+
+    res = client.get("/api/v1/users/table")
+    assert res.status_code == 200
+    assert res.is_streamed
+    rows = res.get_json()
+    assert [row["email"] for row in rows] == ["ann@example.com", "bo@example.com"]
+    assert rows[0]["presentation"] == "Test Presentation"
+    assert rows[0]["abstract_submitted"] is True
+    assert rows[0]["submission_incomplete"] is True
+    assert rows[1]["status"] == "incomplete"
+
+
+def test_presentations_table_streams_rows_with_identifiers(client, app, sample_block_fixture):
+    """GET /api/v1/presentations/table keeps program identifiers and presenters."""
+    with app.app_context():
+        first = Presentation(title="First", schedule_id=sample_block_fixture.id, num_in_block=0)
+        second = Presentation(title="Second", schedule_id=sample_block_fixture.id, num_in_block=1)
+        db.session.add_all([first, second])
+        db.session.flush()
+        db.session.add(User(firstname="Cy", lastname="Cole", email="cy@example.com",
+                            presentation_id=second.id))
+        db.session.commit()
+
+    res = client.get("/api/v1/presentations/table")
+    assert res.status_code == 200
+    rows = {row["title"]: row for row in res.get_json()}
+    assert rows["First"]["program_identifier"] == "poster-1"
+    assert rows["Second"]["program_identifier"] == "poster-2"
+    assert rows["Second"]["presenters"][0]["name"] == "Cy Cole"
+
+
+def test_overview_all_streams_visible_presentations(client, sample_presentation_fixture):
+    """GET /overview/all streams the visible presentations with abstracts."""
+    res = client.get("/overview/all")
+    assert res.status_code == 200
+    data = res.get_json()
+    assert len(data) == 1
+    assert data[0]["abstract"] == "A test abstract"
+
+
+def _datatables_args(columns, **extra):
+    """Build the query string DataTables sends in server-side mode."""
+    args = {"draw": "3", "start": "0", "length": "10"}
+    for index, name in enumerate(columns):
+        args[f"columns[{index}][data]"] = name
+    args.update(extra)
+    return args
+
+
+def test_users_table_server_side_page(client, app, sample_presentation_fixture):
+    """Server-side mode searches, orders and pages attendee rows in SQL."""
+    with app.app_context():
+        db.session.add_all([
+            User(firstname="Ann", lastname="Able", email="ann@example.com", auth="presenter",
+                 presentation_id=sample_presentation_fixture.id),
+            User(firstname="Bo", lastname="Baker", email="bo@example.com", auth="attendee"),
+            User(firstname="Cal", lastname="Able", email="cal@example.com", auth="attendee, Presenter"),
+            User(firstname="Di", lastname="Dunn", email="di@example.com", auth="abstract grader"),
+        ])
+        db.session.commit()
+
+    columns = ["name", "email"]
+    res = client.get("/api/v1/users/table", query_string=_datatables_args(
+        columns, **{"order[0][column]": "1", "order[0][dir]": "desc", "length": "2"}))
+    data = res.get_json()
+    assert data["draw"] == 3
+    assert data["recordsTotal"] == 4
+    assert data["recordsFiltered"] == 4
+    assert [row["email"] for row in data["data"]] == ["di@example.com", "cal@example.com"]
+
+    res = client.get("/api/v1/users/table", query_string=_datatables_args(
+        columns, **{"search[value]": "able"}))
+    assert [row["email"] for row in res.get_json()["data"]] == ["ann@example.com", "cal@example.com"]
+
+    res = client.get("/api/v1/users/table", query_string=_datatables_args(columns, role="presenter"))
+    assert res.get_json()["recordsFiltered"] == 2
+    res = client.get("/api/v1/users/table", query_string=_datatables_args(columns, role="abstract-grader"))
+    assert [row["email"] for row in res.get_json()["data"]] == ["di@example.com"]
+
+    res = client.get("/api/v1/users/table", query_string=_datatables_args(
+        columns, presentation_type="Poster", submission_status="abstract_only"))
+    assert [row["email"] for row in res.get_json()["data"]] == ["ann@example.com"]
+
+
+def test_users_table_role_filter_expands_aliases(client, app):
+    """Filtering for organizers also matches users stored with an alias such as admin."""
+    with app.app_context():
+        db.session.add_all([
+            User(firstname="Ed", lastname="Eve", email="ed@example.com", auth="Admin"),
+            User(firstname="Flo", lastname="Fay", email="flo@example.com", auth="organizer"),
+            User(firstname="Gus", lastname="Gray", email="gus@example.com", auth="attendee"),
+        ])
+        db.session.commit()
+
+    res = client.get("/api/v1/users/table", query_string=_datatables_args(["email"], role="organizer"))
+    assert [row["email"] for row in res.get_json()["data"]] == ["ed@example.com", "flo@example.com"]
+    res = client.get("/api/v1/users/table", query_string=_datatables_args(["email"], role="admin"))
+    assert [row["email"] for row in res.get_json()["data"]] == ["ed@example.com"]
+
+
+def test_presentations_table_server_side_page(client, app, sample_block_fixture):
+    """Server-side mode filters by type and orders by program identifier."""
+    with app.app_context():
+        db.session.add_all([
+            Presentation(title=f"Talk {index}", schedule_id=sample_block_fixture.id, num_in_block=index)
+            for index in range(12)
+        ])
+        db.session.add(Presentation(title="Unscheduled"))
+        db.session.commit()
+
+    columns = ["program_identifier", "title"]
+    res = client.get("/api/v1/presentations/table", query_string=_datatables_args(
+        columns, type="poster", **{"order[0][column]": "0", "order[0][dir]": "asc", "start": "8"}))
+    data = res.get_json()
+    assert data["recordsTotal"] == 13
+    assert data["recordsFiltered"] == 12
+    assert [row["program_identifier"] for row in data["data"]] == [
+        "poster-9", "poster-10", "poster-11", "poster-12"]
+
+    res = client.get("/api/v1/presentations/table", query_string=_datatables_args(
+        columns, **{"search[value]": "poster-1", "order[0][column]": "1", "order[0][dir]": "asc"}))
+    assert [row["title"] for row in res.get_json()["data"]] == [
+        "Talk 0", "Talk 10", "Talk 11", "Talk 9"]
+
+
+def test_table_server_side_rejects_invalid_params(client):
+    """Malformed paging parameters return 400."""
+    res = client.get("/api/v1/users/table", query_string={"draw": "1", "start": "x"})
+    assert res.status_code == 400
+    assert res.get_json()["error"] == "Invalid table parameters"
@@ -10,6 +10,7 @@ from unittest.mock import patch
 from sqlalchemy.exc import IntegrityError
 
 # Local
+from website import db
 from website.models import User
 
 
@@ -193,3 +194,21 @@ def test_delete_user_generic_exception(client, sample_user_fixture):
 
     assert resp.status_code == 500
     assert "mock delete exception" in data["error"]
+
+
+def test_get_users_keyset_pagination(client, app):
+    """GET /api/v1/users/?limit= returns one page plus a next cursor."""
+    with app.app_context():
+        db.session.add_all([
+            User(firstname="Page", lastname=str(index), email=f"page{index}@example.com")
+            for index in range(3)
+        ])
+        db.session.commit()
+
+    page = client.get("/api/v1/users/?limit=2").get_json()
+    assert len(page["results"]) == 2
+    assert page["next"] == page["results"][-1]["id"]
+
+    rest = client.get(f"/api/v1/users/?after={page['next']}").get_json()
+    assert [row["email"] for row in rest["results"]] == ["page2@example.com"]
+    assert rest["next"] is None
@@ -3,7 +3,9 @@
 Tests for website route utilities.
 """
 
-from website.routes.utils import format_average_grades
+from flask import jsonify
+
+from website.routes.utils import format_average_grades, stream_json_array
 
 
 def test_format_average_grades_returns_json(client, sample_average_fixture):
@@ -36,3 +38,12 @@ def test_format_average_grades_handles_missing_presentation(app):
     assert data[0]["presentation_title"] is None
     assert data[0]["average_score"] == 3.5
     assert data[0]["num_grades"] == 1
+
+
+def test_stream_json_array_matches_jsonify(app):
+    """Streamed arrays should encode exactly like jsonify."""
+    rows = [{"b": 1, "a": "é"}, {"c": None}]
+    with app.test_request_context():
+        streamed = stream_json_array(iter(rows)).get_data()
+        assert streamed == jsonify(rows).get_data()
+        assert stream_json_array(iter([])).get_data() == jsonify([]).get_data()
@@ -4,6 +4,7 @@
 Initialize Flask app, database, OAuth, and define routes.
 '''
 import os
+import re
 import requests
 from flask import Flask, render_template, flash
 from flask import session, redirect, url_for, jsonify, request
@@ -23,6 +24,8 @@ def create_app(test_config=None):
     '''
 
     app = Flask(__name__)
+    from .json_provider import ConferenceJSONProvider
+    app.json = ConferenceJSONProvider(app)
     app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1)
     from .config import Config
     app.config.from_object(Config)
@@ -34,6 +37,13 @@ def create_app(test_config=None):
     db.init_app(app)
     from . import auth
 
+    # Registered first so it runs after every other after_request hook.
+    from .compression import install_response_compression
+    install_response_compression(app)
+
+    from .invalidation import install_invalidation_bus
+    install_invalidation_bus(app)
+
     # Setup app
     app.secret_key = app.config.get('SECRET_KEY') or os.environ.get('FLASK_SECRET')
     auth.init_oauth(app)
@@ -51,6 +61,7 @@ def create_app(test_config=None):
     # Routes
     from .routes.users import users_bp
     from .routes.presentations import presentations_bp
+    from .routes.presentation_uploads import presentation_uploads_bp
     from .routes.block_schedule import block_schedule_bp
     from .routes.abstract_grades import abstract_grades_bp
     from .routes.grades import grades_bp
@@ -63,6 +74,9 @@ def create_app(test_config=None):
     app.register_blueprint(
         presentations_bp,
         url_prefix='/api/v1/presentations')
+    app.register_blueprint(
+        presentation_uploads_bp,
+        url_prefix='/api/v1/presentations')
     app.register_blueprint(
         users_table_bp,
         url_prefix='/api/v1/users')
@@ -80,6 +94,25 @@ def create_app(test_config=None):
 
     install_group_size_limit_overrides(app)
 
+    from .routes.presentation_archive import install_archive_maintenance
+    install_archive_maintenance(app)
+
+    from .routes.program_pdf import install_program_pdf_builder
+    install_program_pdf_builder(app)
+
+    from .schedule_documents import install_schedule_documents
+    install_schedule_documents(app)
+
+    from .presentation_files import register_presentation_file_commands
+    register_presentation_file_commands(app)
+
+    from .routes.abstract_images import register_abstract_image_commands
+    register_abstract_image_commands(app)
+
+    from .static_export import install_static_export, register_static_export_commands
+    install_static_export(app)
+    register_static_export_commands(app)
+
     (auth.organizer_required,
     auth.abstract_grader_required,
     auth.banned_user_redirect,
@@ -92,6 +125,9 @@ def create_app(test_config=None):
             path = request.path.rstrip('/') or '/'
             if not path.startswith('/overview'):
                 return None
+            if request.method == 'GET' and re.fullmatch(r'/overview/\d+', path):
+                # Single visible presentations are public; schedule cards load abstracts from them.
+                return None
 
             user_info = session.get('user')
             if not user_info:
@@ -128,6 +164,9 @@ def create_app(test_config=None):
     from .security import install_api_security
     install_api_security(app, User)
 
+    from .conference_mode import install_conference_mode
+    install_conference_mode(app)
+
     from .csv_importer import import_users_from_csv
     @app.route('/import_csv', methods=['POST'])
     @auth.organizer_required
@@ -0,0 +1,45 @@
+"""
+Work that runs after a response instead of inside it.
+Each BackgroundJobs owns one worker thread; scheduling a key that is already
+queued is a no-op, so bursts of edits collapse into a single rebuild.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from website import db
+
+
+class BackgroundJobs:
+    """A single background thread running app-context jobs, coalesced by key."""
+
+    def __init__(self, app, name):
+        self.app = app
+        self.name = name
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self.lock = threading.Lock()
+        self.queued = set()
+
+    def is_queued(self, key):
+        """True while a job for `key` is waiting to run."""
+        with self.lock:
+            return key in self.queued
+
+    def schedule(self, key, func, *args):
+        """Run func(*args) on the worker unless `key` is already waiting to run."""
+        with self.lock:
+            if key in self.queued:
+                return
+            self.queued.add(key)
+        self.executor.submit(self._run, key, func, args)
+
+    def _run(self, key, func, args):
+        with self.app.app_context():
+            # Cleared before running so changes made meanwhile queue another pass.
+            with self.lock:
+                self.queued.discard(key)
+            try:
+                func(*args)
+            except Exception:  # pylint: disable=broad-except
+                self.app.logger.exception("Background job %s failed for %s", self.name, key)
+            finally:
+                db.session.remove()
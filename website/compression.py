@@ -0,0 +1,164 @@
+"""Content-negotiated gzip/brotli compression for text responses."""
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_CACHE_ENTRIES = 128
+DEFAULT_CACHE_MAX_BODY = 8 * 1024 * 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+    'text/css',
+    'text/csv',
+    'text/html',
+    'text/javascript',
+    'text/plain',
+    'text/xml',
+}
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class _BrotliStream:
+    """Adapt brotli.Compressor to the zlib compressobj interface."""
+
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self, mode=zlib.Z_FINISH):
+        if mode == zlib.Z_SYNC_FLUSH:
+            return self._compressor.flush()
+        return self._compressor.finish()
+
+
+def _compressor(encoding):
+    if encoding == 'br':
+        return _BrotliStream()
+    return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+def _compress_bytes(data, encoding):
+    compressor = _compressor(encoding)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _compress_stream(chunks, encoding):
+    """
+    Compress a streamed body chunk by chunk so it is never fully buffered. Each
+    chunk is sync-flushed, so the client receives it as soon as it is produced.
+    """
+    compressor = _compressor(encoding)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _supported_encodings():
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def _negotiated_encoding():
+    """Return the best encoding the client accepts, or None."""
+    return request.accept_encodings.best_match(_supported_encodings())
+
+
+def _should_compress(response):
+    if request.method != 'GET':
+        return False
+    if response.status_code != 200 or response.direct_passthrough:
+        return False
+    if 'Content-Encoding' in response.headers or 'Content-Range' in response.headers:
+        return False
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return False
+    return 'no-transform' not in response.cache_control
+
+
+def _is_cacheable(response):
+    """Only shared, storable bodies are worth keeping compressed in memory."""
+    cache_control = response.cache_control
+    return not (cache_control.no_store or cache_control.private)
+
+
+def _cached_compress(data, encoding, max_entries):
+    """Compress a body, reusing the result for identical bodies."""
+    key = (encoding, hashlib.sha1(data).digest())
+    with _cache_lock:
+        compressed = _cache.get(key)
+        if compressed is not None:
+            _cache.move_to_end(key)
+            return compressed
+
+    compressed = _compress_bytes(data, encoding)
+    with _cache_lock:
+        _cache[key] = compressed
+        while len(_cache) > max_entries:
+            _cache.popitem(last=False)
+    return compressed
+
+
+def clear_compression_cache():
+    """Drop every cached compressed body."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def install_response_compression(app):
+    """Compress JSON, CSV and HTML responses for clients that accept gzip or brotli."""
+    if not app.config.get('COMPRESS_RESPONSES', True):
+        return
+
+    @app.after_request
+    def compress_response(response):
+        if not _should_compress(response):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = _negotiated_encoding()
+        if not encoding:
+            return response
+
+        if response.is_streamed:
+            response.response = _compress_stream(response.iter_encoded(), encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < app.config.get('COMPRESS_MIN_SIZE', DEFAULT_MIN_SIZE):
+                return response
+            max_entries = app.config.get('COMPRESS_CACHE_ENTRIES', DEFAULT_CACHE_ENTRIES)
+            if (
+                max_entries
+                and len(data) <= app.config.get('COMPRESS_CACHE_MAX_BODY', DEFAULT_CACHE_MAX_BODY)
+                and _is_cacheable(response)
+            ):
+                response.set_data(_cached_compress(data, encoding, max_entries))
+            else:
+                response.set_data(_compress_bytes(data, encoding))
+
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            # The compressed bytes are a different representation of the same resource.
+            response.set_etag(etag, weak=True)
+        return response
@@ -0,0 +1,255 @@
+"""
+Read-only conference-day mode.
+Turning the mode on compiles every public read payload (days, per-day blocks and
+presentations, presentation details, program lists, type lists) into one snapshot file and freezes writes
+to schedule and presentation data, along with user writes that would change who presents
+or how a presenter is named. The snapshot file is the switch: every worker
+stats it per request, memory-maps it when it changes and answers matching public
+GETs from the mapping without touching the database. Turning the mode off deletes it.
+
+File layout: MAGIC, an 8-byte big-endian index length, a JSON index of
+{request key: [offset, length, etag]}, then the response bodies back to back.
+"""
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+from datetime import datetime
+from urllib.parse import quote
+
+from flask import current_app, jsonify, request
+
+from website import db
+from website.models import User
+from website.routes.presentations import VALID_PRESENTATION_TYPES
+from website.routes.utils import request_key
+
+MAGIC = b'CUSRRSN1'
+HEADER = struct.Struct('>8sQ')
+SNAPSHOT_NAME = 'conference-snapshot.bin'
+BYPASS_ENVIRON_KEY = 'cusrr.conference_snapshot.bypass'
+# Writes under these prefixes are refused while the mode is on.
+FROZEN_PREFIXES = ('/api/v1/block-schedule', '/api/v1/presentations')
+TOGGLE_PATH = '/api/v1/block-schedule/conference-mode'
+USERS_PATH = '/api/v1/users'
+USER_PATH = re.compile(r'^/api/v1/users/(\d+)$')
+# User fields the snapshot shows in presenter lists.
+PRESENTER_FIELDS = ('firstname', 'lastname', 'email')
+SAFE_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+SNAPSHOT_MAX_AGE = 30
+
+_mapping_lock = threading.Lock()
+_mapping = None
+
+
+class ConferenceSnapshotError(RuntimeError):
+    """Raised when a public payload cannot be compiled into the snapshot."""
+
+
+class _Snapshot:
+    """An open, memory-mapped snapshot file and its parsed index."""
+
+    def __init__(self, path, identity):
+        self.identity = identity
+        with open(path, 'rb') as handle:
+            self.data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_length = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a conference snapshot")
+        index = json.loads(self.data[HEADER.size:HEADER.size + index_length])
+        self.meta = index['meta']
+        self.entries = index['entries']
+        self.body_start = HEADER.size + index_length
+
+    def body(self, key):
+        """Return (bytes, etag) for a request key, or None when it is not in the snapshot."""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        offset, length, etag = entry
+        start = self.body_start + offset
+        return self.data[start:start + length], etag
+
+
+def snapshot_path():
+    """Path of the snapshot file shared by every worker."""
+    return current_app.config.get('CONFERENCE_SNAPSHOT_PATH') or os.path.join(
+        current_app.instance_path, SNAPSHOT_NAME)
+
+
+def current_snapshot():
+    """Return the mapped snapshot when the mode is on, remapping after the file is replaced."""
+    global _mapping
+    path = snapshot_path()
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    identity = (path, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    snapshot = _mapping
+    if snapshot is not None and snapshot.identity == identity:
+        return snapshot
+    with _mapping_lock:
+        if _mapping is None or _mapping.identity != identity:
+            # Requests still reading the previous mapping keep it alive until they finish.
+            _mapping = _Snapshot(path, identity)
+        return _mapping
+
+
+def conference_mode_status():
+    """Describe whether the mode is on and which snapshot is being served."""
+    snapshot = current_snapshot()
+    if snapshot is None:
+        return {"enabled": False}
+    return {"enabled": True, **snapshot.meta}
+
+
+def _snapshot_urls(client):
+    """Yield the URL of every public read payload, expanding per-day and per-type routes."""
+    days_response = client.get('/api/v1/block-schedule/days', environ_base={BYPASS_ENVIRON_KEY: True})
+    if days_response.status_code != 200:
+        raise ConferenceSnapshotError("GET /api/v1/block-schedule/days failed")
+
+    yield '/api/v1/block-schedule/'
+    yield '/api/v1/block-schedule/days'
+    yield '/api/v1/block-schedule/full'
+    presentation_ids = set()
+    for day in days_response.get_json():
+        quoted = quote(day, safe='')
+        yield f'/api/v1/block-schedule/day/{quoted}'
+        yield f'/api/v1/block-schedule/day/{quoted}/full'
+        yield f'/api/v1/presentations/day/{quoted}'
+        day_response = client.get(f'/api/v1/block-schedule/day/{quoted}/full',
+                                  environ_base={BYPASS_ENVIRON_KEY: True})
+        presentation_ids.update(
+            row['id'] for group in day_response.get_json()['presentations'] for row in group['presentations'])
+    # Full abstracts for the schedule modal.
+    for presentation_id in sorted(presentation_ids):
+        yield f'/overview/{presentation_id}'
+    yield '/api/v1/presentations/program-table'
+    yield '/program/list'
+    for presentation_type in sorted(VALID_PRESENTATION_TYPES):
+        yield f'/program/list?type={presentation_type}'
+        yield f'/api/v1/presentations/type/{presentation_type}'
+
+
+def compile_snapshot():
+    """Render every public read payload and atomically replace the snapshot file."""
+    client = current_app.test_client()
+    entries, bodies, offset = {}, [], 0
+    for url in _snapshot_urls(client):
+        response = client.get(url, environ_base={BYPASS_ENVIRON_KEY: True})
+        if response.status_code != 200:
+            raise ConferenceSnapshotError(f"GET {url} returned {response.status_code}")
+        body = response.get_data()
+        key = request_key(response.request.path, response.request.args)
+        entries[key] = [offset, len(body), hashlib.sha256(body).hexdigest()[:32]]
+        bodies.append(body)
+        offset += len(body)
+
+    meta = {
+        "version": hashlib.sha256(json.dumps(entries, sort_keys=True).encode('utf-8')).hexdigest()[:16],
+        "built_at": datetime.utcnow().isoformat(timespec='seconds'),
+        "entries": len(entries),
+    }
+    index = json.dumps({"meta": meta, "entries": entries}, separators=(',', ':')).encode('utf-8')
+
+    path = snapshot_path()
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(HEADER.pack(MAGIC, len(index)))
+            handle.write(index)
+            for body in bodies:
+                handle.write(body)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return meta
+
+
+def enable_conference_mode():
+    """Compile the snapshot, which turns the mode on for every worker."""
+    compile_snapshot()
+    return conference_mode_status()
+
+
+def disable_conference_mode():
+    """Delete the snapshot; workers fall back to live reads on their next request."""
+    try:
+        os.remove(snapshot_path())
+    except FileNotFoundError:
+        pass
+    return {"enabled": False}
+
+
+def _presentation_id_value(value):
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def _changes_presenters(path):
+    """Whether a user write would change presenter assignments or names in the snapshot."""
+    data = request.get_json(silent=True) or {}
+    if request.method == 'POST' and path == USERS_PATH:
+        return _presentation_id_value(data.get('presentation_id')) is not None
+
+    match = USER_PATH.match(path)
+    user = db.session.get(User, int(match.group(1))) if match else None
+    if user is None:
+        return False
+    if request.method == 'DELETE':
+        return user.presentation_id is not None
+    if 'presentation_id' in data and _presentation_id_value(data['presentation_id']) != user.presentation_id:
+        return True
+    return user.presentation_id is not None and any(
+        field in data and data[field] != getattr(user, field) for field in PRESENTER_FIELDS)
+
+
+def install_conference_mode(app):
+    """Answer public reads from the snapshot and refuse frozen writes while the mode is on."""
+
+    @app.before_request
+    def serve_conference_snapshot():
+        if request.environ.get(BYPASS_ENVIRON_KEY):
+            return None
+        snapshot = current_snapshot()
+        if snapshot is None:
+            return None
+
+        if request.method not in SAFE_METHODS:
+            path = request.path.rstrip('/')
+            if path != TOGGLE_PATH and path.startswith(FROZEN_PREFIXES):
+                return jsonify({
+                    "error": "Conference mode is on; schedule and presentation changes are frozen.",
+                }), 423
+            if path.startswith(USERS_PATH) and _changes_presenters(path):
+                return jsonify({
+                    "error": "Conference mode is on; presenter assignments and names are frozen.",
+                }), 423
+            return None
+
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        found = snapshot.body(request_key(request.path, request.args))
+        if found is None:
+            return None
+        body, etag = found
+        response = current_app.response_class(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['X-Conference-Snapshot'] = snapshot.meta['version']
+        response.cache_control.public = True
+        response.cache_control.max_age = SNAPSHOT_MAX_AGE
+        return response.make_conditional(request)
@@ -27,3 +27,25 @@ class Config:
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = False
+
+    # Reject request bodies past this size while they are still being read
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH') or 64 * 1024 * 1024)
+
+    # Hand finished downloads to the web server: '', 'x-sendfile' or 'x-accel-redirect'
+    FILE_OFFLOAD = os.environ.get('FILE_OFFLOAD', '')
+    FILE_OFFLOAD_ROOT = os.environ.get('FILE_OFFLOAD_ROOT')
+    FILE_OFFLOAD_INTERNAL_PREFIX = os.environ.get('FILE_OFFLOAD_INTERNAL_PREFIX', '/_offload/')
+
+    # Program PDF entries are rendered in chunks across this many processes (1 renders inline).
+    # Each process imports the app and ReportLab, so raise this only where memory allows.
+    PROGRAM_PDF_WORKERS = int(os.environ.get('PROGRAM_PDF_WORKERS') or 1)
+    PROGRAM_PDF_CHUNK_SIZE = int(os.environ.get('PROGRAM_PDF_CHUNK_SIZE') or 100)
+
+    # Where `flask export-static` writes versioned static copies of the public pages
+    STATIC_EXPORT_ROOT = os.environ.get('STATIC_EXPORT_ROOT')
+
+    # How often workers poll for cache invalidations when LISTEN/NOTIFY is unavailable
+    INVALIDATION_POLL_SECONDS = float(os.environ.get('INVALIDATION_POLL_SECONDS') or 1.0)
+
+    # Snapshot file that switches on read-only conference-day mode for every worker
+    CONFERENCE_SNAPSHOT_PATH = os.environ.get('CONFERENCE_SNAPSHOT_PATH')
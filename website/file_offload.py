@@ -0,0 +1,134 @@
+"""
+Serve downloads from files on disk, optionally letting the web server send the bytes.
+
+FILE_OFFLOAD selects who transfers the file once the app has authorized the request:
+  ''                  the app streams it with path-based send_file (wsgi.file_wrapper/sendfile)
+  'x-sendfile'        Apache mod_xsendfile or lighttpd read the absolute path from X-Sendfile
+  'x-accel-redirect'  nginx serves FILE_OFFLOAD_INTERNAL_PREFIX + the path under the offload
+                      root from an `internal` location aliased to FILE_OFFLOAD_ROOT
+Stored uploads are named by content hash, so a name never points at different bytes;
+generated exports get unique names and expire after EXPORT_RETENTION_SECONDS.
+"""
+import os
+import tempfile
+import time
+import uuid
+
+from flask import current_app, request, send_file
+from werkzeug.utils import send_file as werkzeug_send_file
+
+OFFLOAD_MODES = {'', 'x-sendfile', 'x-accel-redirect'}
+DEFAULT_INTERNAL_PREFIX = '/_offload/'
+# Generated exports older than this are removed when a new one is written.
+EXPORT_RETENTION_SECONDS = 60 * 60
+EXPORT_NAMESPACE = 'exports'
+
+
+def offload_mode():
+    """Return the configured offload mode, rejecting typos loudly."""
+    mode = str(current_app.config.get('FILE_OFFLOAD') or '').strip().lower()
+    if mode not in OFFLOAD_MODES:
+        raise ValueError(f"Unsupported FILE_OFFLOAD mode: {mode}")
+    return mode
+
+
+def offload_root():
+    """Directory holding files handed to send_file or the web server."""
+    directory = current_app.config.get('FILE_OFFLOAD_ROOT') or os.path.join(
+        current_app.instance_path, 'offload')
+    return os.path.abspath(directory)
+
+
+def namespace_dir(namespace):
+    """Return the directory for a namespace under the offload root, creating it if needed."""
+    directory = os.path.join(offload_root(), namespace)
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def offload_path(namespace, name):
+    """Return the path for `name` in a namespace, or None when it is not on disk yet."""
+    path = os.path.join(offload_root(), namespace, name)
+    return path if os.path.isfile(path) else None
+
+
+def materialize(namespace, name, data, replaces_prefix=None):
+    """
+    Write bytes to namespace/name unless already present and return the path.
+    The write goes through a temporary file so a concurrent reader never sees a partial file.
+    Files in the namespace starting with `replaces_prefix` are removed, e.g. a replaced deck.
+    """
+    directory = namespace_dir(namespace)
+    path = os.path.join(directory, name)
+    if not os.path.isfile(path):
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as handle:
+                handle.write(data)
+            os.replace(temp_path, path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    if replaces_prefix:
+        for entry in os.listdir(directory):
+            if entry.startswith(replaces_prefix) and entry != name and not entry.endswith('.tmp'):
+                _remove_quietly(os.path.join(directory, entry))
+    return path
+
+
+def prune_namespace(namespace, max_age=EXPORT_RETENTION_SECONDS, keep=()):
+    """Remove files in a namespace last modified more than `max_age` seconds ago, except `keep`."""
+    directory = os.path.join(offload_root(), namespace)
+    if not os.path.isdir(directory):
+        return
+    cutoff = time.time() - max_age
+    for entry in os.listdir(directory):
+        if entry in keep:
+            continue
+        path = os.path.join(directory, entry)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def export_path(suffix, namespace=EXPORT_NAMESPACE):
+    """Return a fresh path to write a generated export to, pruning expired exports first."""
+    prune_namespace(namespace)
+    return os.path.join(namespace_dir(namespace), f"{uuid.uuid4().hex}{suffix}")
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def send_offloaded_file(path, **kwargs):
+    """
+    Respond with a file under the offload root, accepting send_file keyword arguments.
+    When offloading, conditional requests are still answered here (304s never reach
+    the web server) but Range is left to the web server, which owns the body.
+    """
+    mode = offload_mode()
+    if not mode:
+        return send_file(path, **kwargs)
+
+    environ = {key: value for key, value in request.environ.items() if key != 'HTTP_RANGE'}
+    response = werkzeug_send_file(
+        path,
+        environ,
+        use_x_sendfile=True,
+        response_class=current_app.response_class,
+        **kwargs,
+    )
+    if mode == 'x-accel-redirect' and 'X-Sendfile' in response.headers:
+        del response.headers['X-Sendfile']
+        relative = os.path.relpath(path, offload_root()).replace(os.sep, '/')
+        prefix = current_app.config.get('FILE_OFFLOAD_INTERNAL_PREFIX') or DEFAULT_INTERNAL_PREFIX
+        response.headers['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + relative
+    return response
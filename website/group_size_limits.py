@@ -1,15 +1,14 @@
 """Group-size limits shared by presentation creation and attendee assignment."""
-import io
-import zipfile
 from datetime import datetime
 
-from flask import current_app, jsonify, request, send_file, session
+from flask import current_app, jsonify, request, session
 from sqlalchemy import text
 
 from website import db
 from website.models import BlockSchedule, Presentation, User
 from website.routes import presentations as presentations_module
 from website.routes import users as users_module
+from website.routes.presentation_archive import presentations_zip_response
 
 MAX_PRESENTERS_PER_GROUP = 5
 
@@ -213,77 +212,10 @@ def create_presentation_with_five_person_limit():
     return jsonify(presentations_module.presentation_to_dict(new_presentation)), 201
 
 
-def _zip_safe_name(value, fallback):
-    """Return a readable ZIP entry name part without path separators."""
-    cleaned = str(value or fallback).strip() or fallback
-    cleaned = cleaned.replace('/', '-').replace('\\', '-')
-    cleaned = ''.join(ch for ch in cleaned if ord(ch) >= 32)
-    return cleaned or fallback
-
-
-def _presenter_names_for_zip(presentation):
-    """Return presenter names for ZIP filenames."""
-    presenters = (
-        User.query
-        .filter_by(presentation_id=presentation.id)
-        .order_by(User.id.asc())
-        .all()
-    )
-    names = []
-    for presenter in presenters:
-        first = (presenter.firstname or '').strip()
-        last = (presenter.lastname or '').strip()
-        full_name = f"{first} {last}".strip()
-        names.append(full_name or presenter.email)
-    return ', '.join(names) or 'Unknown Presenter'
-
-
-def _extension_for_uploaded_file(uploaded_name, file_data):
-    """Return the best file extension for a stored presentation file."""
-    uploaded_name = str(uploaded_name or '').strip()
-    if '.' in uploaded_name:
-        extension = uploaded_name.rsplit('.', 1)[-1].strip().lower()
-        if extension:
-            return extension
-
-    if file_data.startswith(b'%PDF'):
-        return 'pdf'
-    if file_data.startswith(b'PK\x03\x04'):
-        return 'pptx'
-    return 'pptx'
-
-
 def download_all_presentations_by_title():
     """Download uploaded presentation files using presenter and presentation-title filenames."""
     presentations_module.ensure_presentation_upload_table()
-    zip_buffer = io.BytesIO()
-    presentations = Presentation.query.order_by(Presentation.title.asc(), Presentation.id.asc()).all()
-
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for presentation in presentations:
-            file_data = presentation.presentation_file
-            if not file_data:
-                continue
-
-            upload_row = db.session.execute(
-                text("SELECT filename FROM presentation_uploads WHERE presentation_id = :pid"),
-                {"pid": presentation.id}
-            ).fetchone()
-            uploaded_name = upload_row[0] if upload_row and upload_row[0] else None
-            extension = _extension_for_uploaded_file(uploaded_name, file_data)
-            presenter_names = _zip_safe_name(_presenter_names_for_zip(presentation), 'Unknown Presenter')
-            presentation_title = _zip_safe_name(presentation.title, 'Untitled')
-            filename = f"{presenter_names} - {presentation_title}.{extension}"
-
-            zipf.writestr(filename, file_data)
-
-    zip_buffer.seek(0)
-    return send_file(
-        zip_buffer,
-        mimetype="application/zip",
-        as_attachment=True,
-        download_name="presentations.zip"
-    )
+    return presentations_zip_response(request.args)
 
 
 def install_group_size_limit_overrides(app):
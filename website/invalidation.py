@@ -0,0 +1,409 @@
+"""
+Cross-worker cache invalidation.
+Write paths tag what they changed (`presentation:<id>`, `block:<day>`, `user:<id>`)
+and the tags are published inside the transaction that made the change, so they
+reach other workers only if it commits. On PostgreSQL with psycopg2 they travel as
+NOTIFY payloads; elsewhere they are stamped into a version table that every worker
+polls. ORM writes are tagged automatically; raw-SQL writes call `invalidate()`.
+
+Workers pick up published tags at the start of each request and hand them to their
+subscribers, such as the TaggedCache instances from `tagged_cache()`. A worker that
+loses its LISTEN connection treats every cached value as stale. Data derived in the
+database itself subscribes with `subscribe_transaction()` and is rebuilt before the
+commit that changed its inputs.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from itertools import chain
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect as sa_inspect, text
+
+from website import db
+from website.models import BlockSchedule, Presentation, User
+
+BUS_KEY = 'invalidation_bus'
+PENDING_KEY = 'invalidation_pending'
+PUBLISHED_KEY = 'invalidation_published'
+TAG_KINDS = ('presentation', 'block', 'user')
+# A tag whose value is WILDCARD matches every tag of its kind.
+WILDCARD = '*'
+VERSION_TABLE = 'cache_invalidations'
+NOTIFY_CHANNEL = 'cusrr_invalidation'
+# PostgreSQL caps NOTIFY payloads at 8000 bytes.
+NOTIFY_PAYLOAD_BYTES = 7000
+DEFAULT_POLL_SECONDS = 1.0
+DEFAULT_CACHE_ENTRIES = 256
+
+
+def invalidation_tag(kind, value):
+    """Return the tag for one changed object, e.g. invalidation_tag('block', 'Day 1')."""
+    if kind not in TAG_KINDS:
+        raise ValueError(f"Unknown invalidation tag kind: {kind}")
+    return f"{kind}:{value}"
+
+
+def all_tags(*kinds):
+    """Tags matching every object of the given kinds (all kinds when none are named)."""
+    return frozenset(invalidation_tag(kind, WILDCARD) for kind in (kinds or TAG_KINDS))
+
+
+def _tag_matches(published, entry_tags):
+    kind, _, value = published.partition(':')
+    if published in entry_tags or f"{kind}:{WILDCARD}" in entry_tags:
+        return True
+    return value == WILDCARD and any(tag.startswith(f"{kind}:") for tag in entry_tags)
+
+
+def invalidate(*tags):
+    """Publish tags with the current transaction; for writes the ORM cannot see."""
+    db.session.info.setdefault(PENDING_KEY, set()).update(tags)
+
+
+class TaggedCache:
+    """
+    A bounded in-process cache whose entries are dropped when one of their tags is
+    published, or once they are older than `max_age` seconds when one is given.
+    """
+
+    def __init__(self, max_entries=DEFAULT_CACHE_ENTRIES, max_age=None):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        # Bumped by every invalidation so a value computed across one is not stored.
+        self.generation = 0
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key; on a miss compute() returns (value, tags) to store."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if self.max_age is None or time.monotonic() - entry[2] < self.max_age:
+                    self.entries.move_to_end(key)
+                    return entry[0]
+                del self.entries[key]
+            generation = self.generation
+
+        stored_at = time.monotonic()
+        value, tags = compute()
+        with self.lock:
+            if generation == self.generation:
+                self.entries[key] = (value, frozenset(tags), stored_at)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return value
+
+    def invalidate(self, tags):
+        """Drop every entry carrying one of `tags`."""
+        with self.lock:
+            self.generation += 1
+            stale = [
+                key for key, (_, entry_tags, _) in self.entries.items()
+                if any(_tag_matches(tag, entry_tags) for tag in tags)
+            ]
+            for key in stale:
+                del self.entries[key]
+
+    def clear(self):
+        """Drop every entry."""
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+
+
+class InvalidationBus:
+    """One worker's end of the bus: publishes tags and dispatches the ones other workers publish."""
+
+    def __init__(self, app):
+        self.app = app
+        self.origin = uuid.uuid4().hex
+        self.lock = threading.Lock()
+        self.sync_lock = threading.Lock()
+        self.subscribers = []
+        self.transactional = []
+        self.caches = {}
+        self.counts = defaultdict(int)
+        # Version-table backend state.
+        self.table_ready = False
+        self.seen_version = None
+        self.own_versions = set()
+        self.last_poll = 0.0
+        # LISTEN backend state; the connection belongs to the process that opened it.
+        self.listener = None
+        self.listener_pid = None
+        self.notify = None
+
+    @property
+    def uses_notify(self):
+        """True when tags travel over PostgreSQL LISTEN/NOTIFY rather than the version table."""
+        if self.notify is None:
+            dialect = db.engine.dialect
+            self.notify = dialect.name == 'postgresql' and dialect.driver == 'psycopg2'
+        return self.notify
+
+    def subscribe(self, callback):
+        """Call callback(tags) with each batch of published tags, including this worker's own."""
+        with self.lock:
+            self.subscribers.append(callback)
+
+    def subscribe_transaction(self, callback):
+        """Call callback(session, tags) inside each committing transaction, before its tags go out."""
+        with self.lock:
+            self.transactional.append(callback)
+
+    def cache(self, name, max_entries=DEFAULT_CACHE_ENTRIES, max_age=None):
+        """Return the named TaggedCache for this worker, creating and subscribing it once."""
+        with self.lock:
+            cache = self.caches.get(name)
+            if cache is None:
+                cache = self.caches[name] = TaggedCache(max_entries, max_age)
+                self.subscribers.append(cache.invalidate)
+        return cache
+
+    def dispatch(self, tags):
+        """Hand a batch of tags to every subscriber in this worker."""
+        tags = frozenset(tags)
+        if not tags:
+            return
+        with self.lock:
+            subscribers = list(self.subscribers)
+            self.counts['dispatched'] += len(tags)
+        for callback in subscribers:
+            callback(tags)
+
+    def status(self):
+        """Report the backend, cache sizes and tag counters for diagnostics."""
+        with self.lock:
+            counts = dict(self.counts)
+        return {
+            "backend": 'notify' if self.uses_notify else 'version-table',
+            "caches": {name: len(cache.entries) for name, cache in self.caches.items()},
+            **counts,
+        }
+
+    # Publishing -------------------------------------------------------------
+
+    def _origin(self):
+        # Preloaded apps are forked into every worker, so the pid tells the copies apart.
+        return f"{self.origin}-{os.getpid()}"
+
+    def _ensure_version_table(self, session):
+        if self.table_ready:
+            return
+        session.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (
+                tag VARCHAR(255) PRIMARY KEY,
+                version BIGINT NOT NULL
+            )
+        """))
+        self.table_ready = True
+
+    def publish(self, session, tags):
+        """Write tags through the session's connection so they commit or roll back with it."""
+        tags = sorted(tags)
+        if self.uses_notify:
+            for payload in _notify_payloads(self._origin(), tags):
+                session.execute(text("SELECT pg_notify(:channel, :payload)"),
+                                {"channel": NOTIFY_CHANNEL, "payload": payload})
+            return None
+
+        self._ensure_version_table(session)
+        # SQLite holds its write lock until commit, so no other writer can take this version.
+        version = session.execute(text(f"SELECT COALESCE(MAX(version), 0) + 1 FROM {VERSION_TABLE}")).scalar()
+        for tag in tags:
+            result = session.execute(text(f"UPDATE {VERSION_TABLE} SET version = :version WHERE tag = :tag"),
+                                     {"tag": tag, "version": version})
+            if result.rowcount == 0:
+                session.execute(text(f"INSERT INTO {VERSION_TABLE} (tag, version) VALUES (:tag, :version)"),
+                                {"tag": tag, "version": version})
+        return version
+
+    def committed(self, tags, version):
+        """Apply this worker's own committed tags without waiting for the next poll."""
+        if version is not None:
+            with self.lock:
+                self.own_versions.add(version)
+        with self.lock:
+            self.counts['published'] += len(tags)
+        self.dispatch(tags)
+
+    # Receiving --------------------------------------------------------------
+
+    def sync(self):
+        """Dispatch whatever other workers have published since the last call."""
+        if not self.sync_lock.acquire(blocking=False):
+            return
+        try:
+            tags = self._drain_notifications() if self.uses_notify else self._poll_versions()
+        finally:
+            self.sync_lock.release()
+        self.dispatch(tags)
+
+    def _poll_versions(self):
+        interval = self.app.config.get('INVALIDATION_POLL_SECONDS', DEFAULT_POLL_SECONDS)
+        now = time.monotonic()
+        if now - self.last_poll < interval:
+            return set()
+        self.last_poll = now
+
+        self._ensure_version_table(db.session)
+        if self.seen_version is None:
+            # Caches start empty, so nothing published before this worker started matters.
+            self.seen_version = db.session.execute(
+                text(f"SELECT COALESCE(MAX(version), 0) FROM {VERSION_TABLE}")).scalar()
+            return set()
+
+        rows = db.session.execute(
+            text(f"SELECT tag, version FROM {VERSION_TABLE} WHERE version > :seen"),
+            {"seen": self.seen_version},
+        ).fetchall()
+        tags = set()
+        with self.lock:
+            for tag, version in rows:
+                self.seen_version = max(self.seen_version, version)
+                if version in self.own_versions:
+                    continue
+                tags.add(tag)
+            self.own_versions = {version for version in self.own_versions if version > self.seen_version}
+        return tags
+
+    def _listen(self):
+        connection = db.engine.raw_connection()
+        # Detached so the long-lived LISTEN connection does not hold a pool slot.
+        connection.detach()
+        driver_connection = connection.driver_connection
+        driver_connection.autocommit = True
+        with driver_connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+        self.listener, self.listener_pid = driver_connection, os.getpid()
+
+    def _drain_notifications(self):
+        if self.listener is None or self.listener_pid != os.getpid():
+            self.listener = None
+            self._listen()
+            # Anything published before LISTEN took effect was missed.
+            return set(all_tags())
+
+        origin = self._origin()
+        tags = set()
+        try:
+            self.listener.poll()
+        except Exception:  # pylint: disable=broad-except
+            self.app.logger.exception("Lost the cache invalidation listener; treating caches as stale")
+            self.listener = None
+            return set(all_tags())
+        while self.listener.notifies:
+            notification = self.listener.notifies.pop(0)
+            sender, *published = notification.payload.split('\n')
+            if sender != origin:
+                tags.update(published)
+        return tags
+
+
+def _notify_payloads(origin, tags):
+    """Split tags into newline-separated payloads under the NOTIFY size limit."""
+    payload = [origin]
+    size = len(origin)
+    for tag in tags:
+        length = len(tag.encode('utf-8')) + 1
+        if len(payload) > 1 and size + length > NOTIFY_PAYLOAD_BYTES:
+            yield '\n'.join(payload)
+            payload, size = [origin], len(origin)
+        payload.append(tag)
+        size += length
+    if len(payload) > 1:
+        yield '\n'.join(payload)
+
+
+def invalidation_bus():
+    """Return the current app's bus."""
+    return current_app.extensions[BUS_KEY]
+
+
+def tagged_cache(name, max_entries=DEFAULT_CACHE_ENTRIES, max_age=None):
+    """Return this worker's TaggedCache called `name`, kept fresh by the bus."""
+    return invalidation_bus().cache(name, max_entries, max_age)
+
+
+def _previous_value(obj, attribute):
+    history = sa_inspect(obj).attrs[attribute].history
+    return history.deleted[0] if history.deleted else None
+
+
+def _block_day(session, schedule_id):
+    if schedule_id is None:
+        return None
+    block = session.get(BlockSchedule, schedule_id)
+    return block.day if block is not None else None
+
+
+def _tags_for(session, obj):
+    """Tags for one flushed ORM object: itself plus the schedule days and presentation it appears in."""
+    tags = set()
+    if isinstance(obj, Presentation):
+        tags.add(invalidation_tag('presentation', obj.id))
+        for schedule_id in (obj.schedule_id, _previous_value(obj, 'schedule_id')):
+            day = _block_day(session, schedule_id)
+            if day is not None:
+                tags.add(invalidation_tag('block', day))
+    elif isinstance(obj, BlockSchedule):
+        for day in (obj.day, _previous_value(obj, 'day')):
+            if day is not None:
+                tags.add(invalidation_tag('block', day))
+    elif isinstance(obj, User):
+        tags.add(invalidation_tag('user', obj.id))
+        # Presenter names are part of their presentation's payloads.
+        for presentation_id in (obj.presentation_id, _previous_value(obj, 'presentation_id')):
+            if presentation_id is not None:
+                tags.add(invalidation_tag('presentation', presentation_id))
+    return tags
+
+
+def _collect_tags(session, _flush_context):
+    changed = chain(session.new, session.dirty, session.deleted)
+    tags = set().union(*(_tags_for(session, obj) for obj in changed))
+    if tags:
+        session.info.setdefault(PENDING_KEY, set()).update(tags)
+
+
+def _publish_before_commit(session):
+    if not has_app_context() or BUS_KEY not in current_app.extensions:
+        return
+    # Flush now so the last batch of changes is tagged before the transaction closes.
+    session.flush()
+    tags = session.info.pop(PENDING_KEY, None)
+    if tags:
+        bus = current_app.extensions[BUS_KEY]
+        for callback in list(bus.transactional):
+            callback(session, frozenset(tags))
+        version = bus.publish(session, tags)
+        session.info[PUBLISHED_KEY] = (tags, version)
+
+
+def _dispatch_after_commit(session):
+    published = session.info.pop(PUBLISHED_KEY, None)
+    if published and has_app_context() and BUS_KEY in current_app.extensions:
+        current_app.extensions[BUS_KEY].committed(*published)
+
+
+def _discard_after_rollback(session):
+    session.info.pop(PENDING_KEY, None)
+    session.info.pop(PUBLISHED_KEY, None)
+
+
+def install_invalidation_bus(app):
+    """Tag committed writes and refresh this worker's caches before each request."""
+    bus = app.extensions[BUS_KEY] = InvalidationBus(app)
+    if not event.contains(db.session, 'after_flush', _collect_tags):
+        event.listen(db.session, 'after_flush', _collect_tags)
+        event.listen(db.session, 'before_commit', _publish_before_commit)
+        event.listen(db.session, 'after_commit', _dispatch_after_commit)
+        event.listen(db.session, 'after_rollback', _discard_after_rollback)
+
+    @app.before_request
+    def sync_invalidations():
+        bus.sync()
@@ -0,0 +1,73 @@
+"""Flask JSON provider with a fast encoder and naive ISO datetime output."""
+import re
+from datetime import date, datetime
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is in requirements.txt; the stdlib encoder covers installs without it
+    orjson = None
+
+
+ISO_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S'
+COMPACT_SEPARATORS = (',', ':')
+
+# orjson writes UTF-8 and DEL as-is, where the stdlib's ensure_ascii escapes them.
+NON_ASCII_RE = re.compile('[\x7f-\U0010ffff]')
+
+
+def _default(value):
+    """Encode datetimes in the project's naive ISO format, then defer to Flask."""
+    if isinstance(value, datetime):
+        return value.strftime(ISO_DATETIME_FORMAT)
+    if isinstance(value, date):
+        return value.isoformat()
+    return DefaultJSONProvider.default(value)
+
+
+def _escape_non_ascii(match):
+    code = ord(match.group(0))
+    if code > 0xFFFF:
+        code -= 0x10000
+        return '\\u{0:04x}\\u{1:04x}'.format(0xD800 | (code >> 10), 0xDC00 | (code & 0x3FF))
+    return '\\u{0:04x}'.format(code)
+
+
+class ConferenceJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider used for every API response.
+
+    Compact dumps (what `jsonify` and streamed lists use) go through orjson when it
+    is installed and are escaped to the bytes the stdlib encoder would produce.
+    orjson encodes naive datetimes natively in the same format as `_default`; every
+    DateTime column in this schema is naive. Non-string dict keys and unsupported
+    types fall back to the stdlib encoder. Floats outside [1e-4, 1e16) would be
+    spelled 1e16 rather than 1e+16; no payload here carries such values.
+    """
+    default = staticmethod(_default)
+
+    def _fast_dumps(self, obj):
+        try:
+            encoded = orjson.dumps(
+                obj,
+                default=self.default,
+                option=orjson.OPT_SORT_KEYS | orjson.OPT_OMIT_MICROSECONDS,
+            )
+        except TypeError:
+            return None
+        if encoded.isascii() and b'\x7f' not in encoded:
+            return encoded.decode('ascii')
+        return NON_ASCII_RE.sub(_escape_non_ascii, encoded.decode('utf-8'))
+
+    def dumps(self, obj, **kwargs):
+        if (
+            orjson is not None
+            and kwargs == {'separators': COMPACT_SEPARATORS}
+            and self.sort_keys
+            and self.ensure_ascii
+        ):
+            encoded = self._fast_dumps(obj)
+            if encoded is not None:
+                return encoded
+        return super().dumps(obj, **kwargs)
@@ -4,10 +4,29 @@ SQLAlchemy models for the CUSRR application.
 Includes Presentation, User, Grade, AbstractGrade, and BlockSchedule.
 Each model provides a `to_dict()` method for JSON-ready serialization.
 """
+import re
 from datetime import timedelta, datetime
-from sqlalchemy import DateTime
+from sqlalchemy import DateTime, event
 from website import db
 
+# Characters of plain text kept as each abstract's stored preview.
+ABSTRACT_PREVIEW_LENGTH = 200
+_PREVIEW_IMAGE_RE = re.compile(r'!\[[^\]]*\]\([^)]*\)|<img\b[^>]*>', re.IGNORECASE)
+_PREVIEW_LINK_RE = re.compile(r'\[([^\]]*)\]\([^)]*\)')
+_PREVIEW_TAG_RE = re.compile(r'<[^>]+>')
+_PREVIEW_MARKUP_RE = re.compile(r'[#*_`$]')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def abstract_preview_text(abstract):
+    """Return the opening of a markdown/HTML abstract as plain text for schedule cards."""
+    text = _PREVIEW_IMAGE_RE.sub(' ', abstract or '')
+    text = _PREVIEW_LINK_RE.sub(r'\1', text)
+    text = _PREVIEW_TAG_RE.sub(' ', text)
+    text = _PREVIEW_MARKUP_RE.sub('', text)
+    return _WHITESPACE_RE.sub(' ', text).strip()[:ABSTRACT_PREVIEW_LENGTH]
+
+
 class Presentation(db.Model):
     '''
     Presentation model representing a presentation in the system.
@@ -34,6 +53,9 @@ class Presentation(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(120), nullable=False)
     abstract = db.Column(db.Text)
+    # Maintained from `abstract` on every write; see _maintain_abstract_preview.
+    abstract_preview = db.Column(db.String(ABSTRACT_PREVIEW_LENGTH))
+    abstract_length = db.Column(db.Integer)
     subject = db.Column(db.String(100))
     department = db.Column(db.String(120))
     mentor = db.Column(db.String(120))
@@ -93,6 +115,13 @@ class Presentation(db.Model):
         }
 
 
+@event.listens_for(Presentation.abstract, 'set')
+def _maintain_abstract_preview(target, value, _oldvalue, _initiator):
+    """Keep the stored preview and length in step with every abstract write."""
+    target.abstract_preview = abstract_preview_text(value)
+    target.abstract_length = len(value or '')
+
+
 class User(db.Model):
     '''
     User model representing a user in the system.
@@ -0,0 +1,105 @@
+"""
+Canonical storage for uploaded presentation files.
+Older rows hold presentation_file as hex, data-URL, base64 or latin-1 text rather
+than raw bytes. `flask normalize-presentation-files` rewrites them as raw bytes
+once and records each file's format, size and hash in presentation_uploads.
+"""
+import hashlib
+import json
+
+import click
+from sqlalchemy import LargeBinary, bindparam, text
+
+from website import db
+from website.routes.uploads import sniff_presentation
+from website.security import _decode_presentation_file
+
+NORMALIZE_COMMIT_EVERY = 20
+
+
+def file_metadata(data):
+    """Return (format, byte size, sha256) for stored presentation bytes."""
+    return sniff_presentation(data[:16]), len(data), hashlib.sha256(data).hexdigest()
+
+
+def record_file_metadata(presentation_id, data):
+    """Store format, size and hash, adding a metadata row for files set outside the upload route."""
+    file_format, byte_size, sha256 = file_metadata(data)
+    params = {"pid": presentation_id, "format": file_format, "size": byte_size, "sha256": sha256}
+    updated = db.session.execute(
+        text("""
+            UPDATE presentation_uploads
+            SET file_format = :format, byte_size = :size, sha256 = :sha256
+            WHERE presentation_id = :pid
+        """),
+        params
+    )
+    if updated.rowcount == 0:
+        # No uploaded filename is known for these rows; an empty name reads back as None.
+        db.session.execute(
+            text("""
+                INSERT INTO presentation_uploads (presentation_id, filename, file_format, byte_size, sha256)
+                VALUES (:pid, '', :format, :size, :sha256)
+            """),
+            params
+        )
+
+
+def normalize_presentation_files(dry_run=False):
+    """
+    Rewrite legacy presentation_file encodings as raw bytes and record file metadata.
+    Rows are read one at a time so only one file is in memory at once.
+    Returns a report with counts per encoding and the ids of unreadable rows,
+    which are left untouched.
+    """
+    from website.routes.presentations import ensure_presentation_upload_table
+
+    ensure_presentation_upload_table()
+    ids = [row[0] for row in db.session.execute(
+        text("SELECT id FROM presentations WHERE presentation_file IS NOT NULL ORDER BY id")
+    )]
+    report = {"scanned": 0, "encodings": {}, "converted": 0, "unreadable": [], "dry_run": dry_run}
+    update_file = text(
+        "UPDATE presentations SET presentation_file = :data WHERE id = :pid"
+    ).bindparams(bindparam('data', type_=LargeBinary))
+
+    for index, presentation_id in enumerate(ids, start=1):
+        # Plain SQL so the driver's value arrives undecoded, whatever type it was stored as.
+        value = db.session.execute(
+            text("SELECT presentation_file FROM presentations WHERE id = :pid"),
+            {"pid": presentation_id}
+        ).scalar()
+        encoding, data = _decode_presentation_file(value)
+        report["scanned"] += 1
+        report["encodings"][encoding] = report["encodings"].get(encoding, 0) + 1
+
+        if encoding == 'unreadable':
+            report["unreadable"].append(presentation_id)
+            continue
+        if encoding == 'empty' or dry_run:
+            continue
+        if encoding != 'raw':
+            db.session.execute(update_file, {"pid": presentation_id, "data": data})
+            report["converted"] += 1
+        record_file_metadata(presentation_id, data)
+        if index % NORMALIZE_COMMIT_EVERY == 0:
+            db.session.commit()
+
+    db.session.commit()
+    return report
+
+
+def register_presentation_file_commands(app):
+    """Add the presentation file maintenance commands to the Flask CLI."""
+
+    @app.cli.command('normalize-presentation-files')
+    @click.option('--dry-run', is_flag=True, help='Report encodings without rewriting anything.')
+    def normalize_presentation_files_command(dry_run):
+        """Convert legacy presentation_file encodings to raw bytes."""
+        report = normalize_presentation_files(dry_run=dry_run)
+        click.echo(json.dumps(report, indent=2, sort_keys=True))
+        if report["unreadable"]:
+            click.echo(
+                f"{len(report['unreadable'])} row(s) could not be decoded and were left unchanged.",
+                err=True,
+            )
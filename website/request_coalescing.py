@@ -0,0 +1,130 @@
+"""
+Single-flight coalescing for expensive public reads.
+When identical requests arrive while one is already being computed, the later ones
+wait for it and answer with a copy of its response instead of repeating the work.
+Requests are keyed by method, path and sorted query arguments (request_key), so
+only requests that would produce the same body share one. Coalescing is per worker
+process; `coalescing_metrics()` reports how much work it saved.
+"""
+import threading
+from collections import defaultdict
+from functools import wraps
+
+from flask import current_app, make_response, request
+
+from website.routes.utils import request_key
+
+EXTENSION_KEY = 'request_coalescing'
+DEFAULT_WAIT_SECONDS = 30
+COALESCED_HEADER = 'X-Coalesced'
+
+
+class _Flight:
+    """One in-progress computation and the requests waiting on it."""
+
+    __slots__ = ('done', 'result', 'failed', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.failed = False
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Runs at most one computation per key at a time and shares its result with waiters."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flights = {}
+        self.counts = defaultdict(lambda: defaultdict(int))
+
+    def _count(self, label, name):
+        with self.lock:
+            self.counts[label][name] += 1
+
+    def do(self, key, func, label='default', timeout=DEFAULT_WAIT_SECONDS):
+        """
+        Return (result, coalesced). Waiters that time out, or whose leader raised,
+        run `func` themselves so every request still gets its own answer or error.
+        """
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = _Flight()
+            else:
+                flight.waiters += 1
+
+        if not leader:
+            if flight.done.wait(timeout) and not flight.failed:
+                self._count(label, 'coalesced')
+                return flight.result, True
+            self._count(label, 'timed_out' if not flight.done.is_set() else 'leader_failed')
+            return func(), False
+
+        try:
+            flight.result = func()
+        except Exception:
+            flight.failed = True
+            self._count(label, 'errors')
+            raise
+        finally:
+            with self.lock:
+                self.flights.pop(key, None)
+            flight.done.set()
+        self._count(label, 'executed')
+        return flight.result, False
+
+    def metrics(self):
+        """Return per-label counters plus totals and the number of computations in flight."""
+        with self.lock:
+            labels = {label: dict(counts) for label, counts in self.counts.items()}
+            in_flight = len(self.flights)
+            waiting = sum(flight.waiters for flight in self.flights.values())
+        totals = defaultdict(int)
+        for counts in labels.values():
+            for name, value in counts.items():
+                totals[name] += value
+        return {"endpoints": labels, "totals": dict(totals), "in_flight": in_flight, "waiting": waiting}
+
+
+def _single_flight():
+    flights = current_app.extensions.get(EXTENSION_KEY)
+    if flights is None:
+        flights = current_app.extensions.setdefault(EXTENSION_KEY, SingleFlight())
+    return flights
+
+
+def coalescing_metrics():
+    """Return this worker's coalescing counters."""
+    return _single_flight().metrics()
+
+
+def _freeze(response):
+    """Capture a response as plain values so each waiter can build its own copy."""
+    return response.status_code, list(response.headers.items()), response.get_data()
+
+
+def coalesced(view):
+    """Decorate a public GET view so concurrent identical requests share one computation."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != 'GET':
+            return view(*args, **kwargs)
+
+        key = (request.method, request_key(request.path, request.args))
+        timeout = current_app.config.get('REQUEST_COALESCING_WAIT_SECONDS', DEFAULT_WAIT_SECONDS)
+        (status, headers, body), shared = _single_flight().do(
+            key,
+            lambda: _freeze(make_response(view(*args, **kwargs))),
+            label=request.endpoint,
+            timeout=timeout,
+        )
+        response = current_app.response_class(body, status=status, headers=headers)
+        if shared:
+            response.headers[COALESCED_HEADER] = 'true'
+        return response
+
+    return wrapper
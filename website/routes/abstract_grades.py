@@ -5,9 +5,16 @@ Provides CRUD operations and average score calculations.
 
 from flask import Blueprint, jsonify, request, session
 from sqlalchemy import func, desc, text
+from sqlalchemy.orm import selectinload
 from website.models import AbstractGrade, BlockSchedule, Presentation, User
 from website import db
-from .utils import format_average_grades
+from .utils import (
+    STREAM_CHUNK_SIZE,
+    format_average_grades,
+    keyset_page,
+    pagination_requested,
+    stream_json_array,
+)
 
 abstract_grades_bp = Blueprint('abstract_grades', __name__)
 
@@ -104,9 +111,24 @@ def _show_on_schedule(presentation_id):
 
 @abstract_grades_bp.route('/', methods=['GET'])
 def get_abstract_grades():
-    ''' GET all abstract grades '''
-    grades = AbstractGrade.query.all()
-    return jsonify([_abstract_grade_to_dict(g) for g in grades])
+    ''' GET all abstract grades, or one keyset page when `limit`/`after` is given '''
+    if pagination_requested():
+        return keyset_page(
+            AbstractGrade.query,
+            AbstractGrade.id,
+            lambda rows: [_abstract_grade_to_dict(g) for g in rows]
+        )
+
+    grades = (
+        AbstractGrade.query
+        .options(
+            selectinload(AbstractGrade.grader),
+            selectinload(AbstractGrade.presentation).defer(Presentation.presentation_file),
+        )
+        .order_by(AbstractGrade.id.asc())
+        .yield_per(STREAM_CHUNK_SIZE)
+    )
+    return stream_json_array(_abstract_grade_to_dict(g) for g in grades)
 
 
 @abstract_grades_bp.route('/dashboard-list', methods=['GET'])
@@ -92,15 +92,6 @@ def _default_schedule_objects():
     return blocks
 
 
-def _format_datetime(value):
-    """Format datetimes as naive local ISO strings for schedule JSON."""
-    if not value:
-        return None
-    if isinstance(value, datetime):
-        return value.strftime('%Y-%m-%dT%H:%M:%S')
-    return str(value)
-
-
 def _presenter_to_schedule_dict(user):
     """Return the presenter fields needed by the schedule cards/modal."""
     return {
@@ -122,8 +113,10 @@ def _presentation_to_schedule_dict(presentation, program_ids):
     return {
         "id": presentation.id,
         "title": presentation.title,
-        "abstract": presentation.abstract,
-        "time": _format_datetime(display_time),
+        # The full abstract is fetched from /overview/<id> when a card is opened.
+        "abstract_preview": presentation.abstract_preview,
+        "abstract_length": presentation.abstract_length or 0,
+        "time": display_time,
         "room": schedule.location if schedule else None,
         "type": get_presentation_type(presentation),
         "program_identifier": program_ids.get(presentation.id),
@@ -137,23 +130,10 @@ def _presentation_to_schedule_dict(presentation, program_ids):
     }
 
 
-def _schedule_payload_for_day(day):
-    """Return blocks plus lightweight presentation rows for one schedule day."""
-    from website.routes.presentations import get_show_on_schedule, _program_identifier_map
-
-    blocks = (
-        BlockSchedule.query
-        .filter_by(day=day)
-        .order_by(BlockSchedule.start_time, BlockSchedule.id)
-        .all()
-    )
-    block_ids = [block.id for block in blocks]
-
-    if not block_ids:
-        return {
-            "blocks": [],
-            "presentations": [],
-        }
+def _schedule_identifiers():
+    """Return (program_ids, visible_ids) for the whole conference in two queries.
+    Program numbering runs across days, so every day's payload needs the full map."""
+    from website.routes.presentations import hidden_presentation_ids, _program_identifier_map
 
     identifier_presentations = (
         Presentation.query
@@ -173,13 +153,35 @@ def _schedule_payload_for_day(day):
         )
         .all()
     )
+    hidden_ids = hidden_presentation_ids()
     visible_identifier_presentations = [
         presentation
         for presentation in identifier_presentations
-        if get_show_on_schedule(presentation.id)
+        if presentation.id not in hidden_ids
     ]
     program_ids = _program_identifier_map(visible_identifier_presentations)
     visible_ids = {presentation.id for presentation in visible_identifier_presentations}
+    return program_ids, visible_ids
+
+
+def _schedule_payload_for_day(day, identifiers=None):
+    """Return blocks plus lightweight presentation rows for one schedule day.
+    Pass `identifiers` from _schedule_identifiers() when building several days."""
+    blocks = (
+        BlockSchedule.query
+        .filter_by(day=day)
+        .order_by(BlockSchedule.start_time, BlockSchedule.id)
+        .all()
+    )
+    block_ids = [block.id for block in blocks]
+
+    if not block_ids:
+        return {
+            "blocks": [],
+            "presentations": [],
+        }
+
+    program_ids, visible_ids = identifiers or _schedule_identifiers()
 
     presentations = (
         Presentation.query
@@ -187,7 +189,8 @@ def _schedule_payload_for_day(day):
             load_only(
                 Presentation.id,
                 Presentation.title,
-                Presentation.abstract,
+                Presentation.abstract_preview,
+                Presentation.abstract_length,
                 Presentation.time,
                 Presentation.num_in_block,
                 Presentation.schedule_id,
@@ -239,6 +242,14 @@ def _schedule_payload_for_day(day):
 block_schedule_bp = Blueprint('block_schedule', __name__)
 
 
+@block_schedule_bp.before_request
+def ensure_schedule_presentation_schema():
+    """Schedule payloads read the stored abstract previews, which older databases lack."""
+    from website.routes.presentations import ensure_presentation_metadata_columns
+
+    ensure_presentation_metadata_columns()
+
+
 @block_schedule_bp.route('/', methods=['GET'])
 def get_schedules():
     ''' GET all blocks '''
@@ -382,8 +393,18 @@ def get_schedules_by_day(day):
 
 @block_schedule_bp.route('/day/<string:day>/full', methods=['GET'])
 def get_schedule_page_by_day(day):
-    ''' GET blocks and lightweight presentation rows for the schedule page. '''
-    return jsonify(_schedule_payload_for_day(day))
+    ''' GET blocks and lightweight presentation rows for the schedule page, from the stored document. '''
+    from website.schedule_documents import schedule_document_response
+
+    return schedule_document_response(day)
+
+
+@block_schedule_bp.route('/full', methods=['GET'])
+def get_full_schedule():
+    ''' GET every public day's blocks and lightweight presentation rows in one response. '''
+    from website.schedule_documents import full_schedule_response
+
+    return full_schedule_response()
 
 
 @block_schedule_bp.route('/days', methods=['GET'])
@@ -392,3 +413,43 @@ def get_unique_days():
     days = db.session.query(BlockSchedule.day).distinct().filter(BlockSchedule.day != "Unassigned").all()
     unique_days = [day[0] for day in days]
     return jsonify(unique_days)
+
+
+@block_schedule_bp.route('/export-static', methods=['POST'])
+def export_static():
+    ''' POST publish a static copy of the public schedule and program pages '''
+    from website.static_export import StaticExportError, export_static_site
+
+    try:
+        report = export_static_site()
+    except StaticExportError as exc:
+        return jsonify({"error": str(exc)}), 500
+    return jsonify(report), 201
+
+
+@block_schedule_bp.route('/conference-mode', methods=['GET'])
+def get_conference_mode():
+    ''' GET whether read-only conference-day mode is on '''
+    from website.conference_mode import conference_mode_status
+
+    return jsonify(conference_mode_status())
+
+
+@block_schedule_bp.route('/conference-mode', methods=['POST'])
+def set_conference_mode():
+    ''' POST {"enabled": bool} to freeze schedule edits and serve public reads from a snapshot '''
+    from website.conference_mode import (
+        ConferenceSnapshotError,
+        disable_conference_mode,
+        enable_conference_mode,
+    )
+
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data.get('enabled'), bool):
+        return jsonify({"error": "Send {\"enabled\": true} or {\"enabled\": false}."}), 400
+    if not data['enabled']:
+        return jsonify(disable_conference_mode())
+    try:
+        return jsonify(enable_conference_mode())
+    except ConferenceSnapshotError as exc:
+        return jsonify({"error": str(exc)}), 500
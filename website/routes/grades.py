@@ -6,10 +6,17 @@ import csv
 import io
 
 from sqlalchemy import func, desc
+from sqlalchemy.orm import selectinload
 from flask import Blueprint, Response, current_app, jsonify, request, session
 from website.models import AbstractGrade, Grade, Presentation, BlockSchedule, User
 from website import db
-from .utils import format_average_grades
+from .utils import (
+    STREAM_CHUNK_SIZE,
+    format_average_grades,
+    keyset_page,
+    pagination_requested,
+    stream_json_array,
+)
 
 
 grades_bp = Blueprint('grades', __name__)
@@ -120,9 +127,20 @@ def _normal_grade_actor_or_error():
 
 @grades_bp.route('/', methods=['GET'])
 def get_grades():
-    ''' GET all grades '''
-    grades = Grade.query.all()
-    return jsonify([g.to_dict() for g in grades])
+    ''' GET all grades, or one keyset page when `limit`/`after` is given '''
+    if pagination_requested():
+        return keyset_page(Grade.query, Grade.id, lambda rows: [g.to_dict() for g in rows])
+
+    grades = (
+        Grade.query
+        .options(
+            selectinload(Grade.grader),
+            selectinload(Grade.presentation).defer(Presentation.presentation_file),
+        )
+        .order_by(Grade.id.asc())
+        .yield_per(STREAM_CHUNK_SIZE)
+    )
+    return stream_json_array(g.to_dict() for g in grades)
 
 
 @grades_bp.route('/can-submit', methods=['GET'])
@@ -0,0 +1,531 @@
+"""
+The organizer ZIP of uploaded presentation files.
+Filters choose presentations in SQL and blobs are then read one row at a time,
+so a filtered export only reads the files it contains.
+The unfiltered archive is maintained on disk: commits that change its contents bump
+a version counter in the database and queue a background rebuild, and downloads
+serve the last build with its staleness, found by comparing that counter with the
+version the build started from.
+"""
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import uuid
+import zipfile
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+from itertools import chain
+
+from flask import current_app, has_app_context, jsonify
+from sqlalchemy import DateTime, Integer, String, cast, column, event, func, inspect, or_, table, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import defer, load_only, selectinload
+from werkzeug.utils import secure_filename
+
+from website import db
+from website.background import BackgroundJobs
+from website.file_offload import (
+    export_path,
+    namespace_dir,
+    offload_root,
+    prune_namespace,
+    send_offloaded_file,
+)
+from website.models import BlockSchedule, Presentation, User
+from website.security import (
+    _extension_from_upload,
+    _presentation_file_bytes,
+    _presenter_names_for_zip,
+    _zip_filename_for_presentation,
+)
+from .table_data import (
+    _ensure_presentation_type_table,
+    _presentation_type_expression,
+    _search_clause,
+    presentation_types_table,
+)
+
+ARCHIVE_TYPES = {'poster', 'blitz', 'presentation'}
+PRESENTATION_EXTENSIONS = {'pdf', 'ppt', 'pptx'}
+
+ARCHIVE_NAMESPACE = 'archive'
+MANIFEST_NAME = 'manifest.json'
+LOCK_NAME = 'rebuild.lock'
+COPY_CHUNK_SIZE = 1024 * 1024
+REBUILDER_KEY = 'presentation_archive_rebuilder'
+CHANGES_KEY = 'presentation_archive_changed'
+STATE_READY_KEY = 'presentation_archive_state_ready'
+# Attributes that change an entry's name or bytes in the archive.
+ARCHIVE_ATTRIBUTES = {
+    Presentation: ('title', 'presentation_file'),
+    User: ('presentation_id', 'firstname', 'lastname', 'email'),
+}
+
+presentation_uploads_table = table(
+    'presentation_uploads',
+    column('presentation_id', Integer),
+    column('filename', String),
+    column('uploaded_at', DateTime),
+    column('sha256', String),
+    column('byte_size', Integer),
+    column('file_format', String),
+)
+
+
+class ArchiveFilterError(ValueError):
+    """A download filter could not be parsed; the message is safe to show to the client."""
+
+
+def archive_filters(args):
+    """Parse day, schedule_id, type and updated_since from query args, skipping blanks."""
+    filters = {}
+    day = str(args.get('day') or '').strip()
+    if day:
+        filters['day'] = day
+
+    schedule_id = str(args.get('schedule_id') or '').strip()
+    if schedule_id:
+        try:
+            filters['schedule_id'] = int(schedule_id)
+        except ValueError as exc:
+            raise ArchiveFilterError("schedule_id must be an integer") from exc
+
+    presentation_type = str(args.get('type') or '').strip().lower()
+    if presentation_type and presentation_type != 'all':
+        if presentation_type not in ARCHIVE_TYPES:
+            raise ArchiveFilterError("type must be one of Poster, Blitz or Presentation")
+        filters['type'] = presentation_type
+
+    updated_since = str(args.get('updated_since') or '').strip()
+    if updated_since:
+        try:
+            since = datetime.fromisoformat(updated_since)
+        except ValueError as exc:
+            raise ArchiveFilterError("updated_since must be an ISO 8601 datetime") from exc
+        if since.tzinfo is not None:
+            # uploaded_at is stored as naive UTC (CURRENT_TIMESTAMP).
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
+        filters['updated_since'] = since
+    return filters
+
+
+def archive_rows(filters):
+    """Return (presentation, uploaded filename, sha256) rows with a stored file, without loading blobs."""
+    query = (
+        db.session.query(
+            Presentation,
+            presentation_uploads_table.c.filename,
+            presentation_uploads_table.c.sha256,
+        )
+        .options(defer(Presentation.presentation_file), selectinload(Presentation.presenters))
+        .outerjoin(BlockSchedule, Presentation.schedule_id == BlockSchedule.id)
+        .outerjoin(
+            presentation_uploads_table,
+            presentation_uploads_table.c.presentation_id == Presentation.id,
+        )
+        .filter(func.length(Presentation.presentation_file) > 0)
+    )
+    if 'day' in filters:
+        query = query.filter(BlockSchedule.day == filters['day'])
+    if 'schedule_id' in filters:
+        query = query.filter(Presentation.schedule_id == filters['schedule_id'])
+    if 'type' in filters:
+        _ensure_presentation_type_table()
+        query = query.outerjoin(
+            presentation_types_table,
+            presentation_types_table.c.presentation_id == Presentation.id,
+        ).filter(_presentation_type_expression() == filters['type'])
+    if 'updated_since' in filters:
+        query = query.filter(presentation_uploads_table.c.uploaded_at >= filters['updated_since'])
+    return query.order_by(Presentation.title.asc(), Presentation.id.asc()).all()
+
+
+def _ensure_upload_table():
+    # Imported here: the presentations blueprint imports this module.
+    from .presentations import ensure_presentation_upload_table
+    ensure_presentation_upload_table()
+
+
+def _stored_file(presentation_id):
+    return _presentation_file_bytes(
+        db.session.query(Presentation.presentation_file)
+        .filter(Presentation.id == presentation_id)
+        .scalar()
+    )
+
+
+def write_presentations_zip(path, rows):
+    """Write each stored file as `Presenter Names - Title.ext` and return how many were added."""
+    used_names = {}
+    added = 0
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for presentation, uploaded_name, _ in rows:
+            file_data = _stored_file(presentation.id)
+            if not file_data:
+                continue
+            safe_uploaded_name = secure_filename(uploaded_name) if uploaded_name else None
+            extension = _extension_from_upload(safe_uploaded_name, file_data)
+            zipf.writestr(_zip_filename_for_presentation(presentation, extension, used_names), file_data)
+            added += 1
+    return added
+
+
+def _presenter_matches(word):
+    full_name = func.lower(func.coalesce(User.firstname, '') + ' ' + func.coalesce(User.lastname, ''))
+    return [Presentation.presenters.any(or_(
+        full_name.contains(word, autoescape=True),
+        func.lower(User.email).contains(word, autoescape=True),
+    ))]
+
+
+def upload_diagnostics(search=''):
+    """
+    Describe every presentation's stored file so organizers can see why one is missing
+    from the ZIP. Sizes, formats and hashes come from upload metadata, and `search`
+    matches id, title, presenters or uploaded filename in SQL; no file is read.
+    """
+    _ensure_upload_table()
+    uploads = presentation_uploads_table.c
+    query = (
+        db.session.query(
+            Presentation,
+            uploads.filename,
+            func.coalesce(uploads.byte_size, func.length(Presentation.presentation_file), 0),
+            uploads.file_format,
+            uploads.sha256,
+        )
+        .options(load_only(Presentation.id, Presentation.title), selectinload(Presentation.presenters))
+        .outerjoin(presentation_uploads_table, uploads.presentation_id == Presentation.id)
+    )
+    search = str(search or '').strip().lower()
+    if search:
+        query = query.filter(_search_clause(
+            [search],
+            [cast(Presentation.id, String), Presentation.title, uploads.filename],
+            _presenter_matches,
+        ))
+
+    rows = []
+    for presentation, uploaded_name, byte_size, file_format, sha256 in query.order_by(
+            Presentation.title.asc(), Presentation.id.asc()):
+        uploaded_name = uploaded_name or None
+        # The same naming rule as the ZIP, with the recorded format standing in for the bytes.
+        safe_uploaded_name = secure_filename(uploaded_name) if uploaded_name else None
+        extension = _extension_from_upload(safe_uploaded_name, file_format=file_format)
+        has_file = bool(byte_size)
+        rows.append({
+            "presentation_id": presentation.id,
+            "title": presentation.title,
+            "presenters": _presenter_names_for_zip(presentation),
+            "uploaded_filename_metadata": uploaded_name,
+            "presentation_file_bytes": byte_size or 0,
+            "file_format": file_format,
+            "sha256": sha256,
+            "included_in_zip": has_file,
+            "zip_filename": _zip_filename_for_presentation(presentation, extension) if has_file else None,
+            "reason_if_missing": None if has_file else (
+                "upload metadata may exist, but presentations.presentation_file is empty or unreadable"
+            ),
+        })
+    return rows
+
+
+def _archive_entries():
+    """
+    Describe the full archive as [{"id", "name", "sha256"}] from upload metadata.
+    Files uploaded before hashes were recorded are read once and their hash stored.
+    """
+    used_names = {}
+    entries = []
+    hashed = False
+    for presentation, uploaded_name, sha256 in archive_rows({}):
+        safe_uploaded_name = secure_filename(uploaded_name) if uploaded_name else None
+        extension = None
+        if safe_uploaded_name and '.' in safe_uploaded_name:
+            extension = safe_uploaded_name.rsplit('.', 1)[-1].lower()
+        if extension not in PRESENTATION_EXTENSIONS or not sha256:
+            file_data = _stored_file(presentation.id)
+            if not file_data:
+                continue
+            extension = _extension_from_upload(safe_uploaded_name, file_data)
+            if not sha256:
+                sha256 = hashlib.sha256(file_data).hexdigest()
+                db.session.execute(
+                    text("UPDATE presentation_uploads SET sha256 = :sha256 WHERE presentation_id = :pid"),
+                    {"pid": presentation.id, "sha256": sha256}
+                )
+                hashed = True
+        entries.append({
+            "id": presentation.id,
+            "name": _zip_filename_for_presentation(presentation, extension, used_names),
+            "sha256": sha256,
+        })
+    if hashed:
+        db.session.commit()
+    return entries
+
+
+def ensure_archive_state_table():
+    """Create the single-row table holding the archive's change counter once per app."""
+    if current_app.extensions.get(STATE_READY_KEY):
+        return
+    with db.engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS presentation_archive_state (
+                id INTEGER PRIMARY KEY,
+                version BIGINT NOT NULL
+            )
+        """))
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(text("""
+                INSERT INTO presentation_archive_state (id, version)
+                SELECT 1, 0 WHERE NOT EXISTS (SELECT 1 FROM presentation_archive_state WHERE id = 1)
+            """))
+    except IntegrityError:
+        # Another worker inserted the row first.
+        pass
+    current_app.extensions[STATE_READY_KEY] = True
+
+
+def archive_version():
+    """Return the number of archive-changing objects committed so far."""
+    ensure_archive_state_table()
+    return db.session.execute(text("SELECT version FROM presentation_archive_state WHERE id = 1")).scalar() or 0
+
+
+def _manifest_path():
+    return os.path.join(offload_root(), ARCHIVE_NAMESPACE, MANIFEST_NAME)
+
+
+def _read_manifest():
+    """Return the manifest of the last completed build, or None when there is none on disk."""
+    try:
+        with open(_manifest_path(), encoding='utf-8') as handle:
+            manifest = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    archive = os.path.join(offload_root(), ARCHIVE_NAMESPACE, manifest.get('archive') or '')
+    return manifest if os.path.isfile(archive) else None
+
+
+def _write_manifest(manifest):
+    temp_path = f"{_manifest_path()}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as handle:
+        json.dump(manifest, handle)
+    os.replace(temp_path, _manifest_path())
+
+
+@contextmanager
+def _rebuild_guard():
+    """Yield True while holding the archive's rebuild lock, or False when another process holds it."""
+    with open(os.path.join(namespace_dir(ARCHIVE_NAMESPACE), LOCK_NAME), 'a', encoding='utf-8') as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def rebuild_presentations_archive():
+    """
+    Bring the maintained archive up to date and return its manifest.
+    Entries whose name and content hash are unchanged are copied from the previous
+    build instead of being read from the database. Decks are already compressed,
+    so entries are stored rather than deflated again.
+    Returns None without waiting when another rebuild is running on this host.
+    """
+    with _rebuild_guard() as acquired:
+        if not acquired:
+            return None
+        return _rebuild_presentations_archive()
+
+
+def _rebuild_presentations_archive():
+    _ensure_upload_table()
+    # Read before the entries, so a change committed during the build leaves it stale.
+    version = archive_version()
+    entries = _archive_entries()
+    manifest = _read_manifest()
+    if manifest and manifest['entries'] == entries:
+        if manifest.get('version') != version:
+            manifest = {**manifest, "version": version}
+            _write_manifest(manifest)
+        return manifest
+
+    directory = namespace_dir(ARCHIVE_NAMESPACE)
+    digest = hashlib.sha256(json.dumps(entries, sort_keys=True).encode('utf-8')).hexdigest()
+    archive_name = f"presentations-{digest[:16]}.zip"
+    previous = {}
+    previous_path = None
+    if manifest:
+        previous = {(entry['id'], entry['sha256']): entry['name'] for entry in manifest['entries']}
+        previous_path = os.path.join(directory, manifest['archive'])
+
+    temp_path = os.path.join(directory, f"{archive_name}.{uuid.uuid4().hex}.tmp")
+    with ExitStack() as stack:
+        source = stack.enter_context(zipfile.ZipFile(previous_path)) if previous_path else None
+        source_names = set(source.namelist()) if source else set()
+        target = stack.enter_context(zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_STORED))
+        for entry in entries:
+            previous_name = previous.get((entry['id'], entry['sha256']))
+            if previous_name in source_names:
+                with source.open(previous_name) as src, target.open(entry['name'], 'w') as dst:
+                    shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+            else:
+                target.writestr(entry['name'], _stored_file(entry['id']))
+    os.replace(temp_path, os.path.join(directory, archive_name))
+
+    manifest = {
+        "archive": archive_name,
+        "built_at": datetime.utcnow().isoformat(timespec='seconds'),
+        "version": version,
+        "entries": entries,
+    }
+    _write_manifest(manifest)
+    # Older builds are kept for a while so in-flight downloads can finish.
+    prune_namespace(ARCHIVE_NAMESPACE, keep={archive_name, MANIFEST_NAME, LOCK_NAME})
+    return manifest
+
+
+def archive_status(manifest=None):
+    """
+    Report when the maintained archive was built and how many archive changes were
+    committed since. Only the change counter is read; no upload or file is scanned.
+    """
+    manifest = manifest or _read_manifest()
+    if manifest is None:
+        return {"built": False, "building": _rebuild_queued()}
+
+    # Builds from before the counter existed count as fully stale.
+    pending = max(0, archive_version() - manifest.get('version', -1))
+    built_at = datetime.fromisoformat(manifest['built_at'])
+    return {
+        "built": True,
+        "built_at": manifest['built_at'],
+        "age_seconds": max(0, int((datetime.utcnow() - built_at).total_seconds())),
+        "files": len(manifest['entries']),
+        "pending_changes": pending,
+        "stale": pending > 0,
+        "building": _rebuild_queued(),
+    }
+
+
+def _rebuild_queued():
+    rebuilder = current_app.extensions.get(REBUILDER_KEY)
+    return bool(rebuilder and rebuilder.is_queued(ARCHIVE_NAMESPACE))
+
+
+def schedule_archive_rebuild():
+    """Queue a background rebuild; a no-op where maintenance is not installed (e.g. tests)."""
+    rebuilder = current_app.extensions.get(REBUILDER_KEY)
+    if rebuilder is not None:
+        rebuilder.schedule(ARCHIVE_NAMESPACE, rebuild_presentations_archive)
+
+
+def _changes_archive(session, obj):
+    if obj in session.new or obj in session.deleted:
+        return isinstance(obj, Presentation) or obj.presentation_id is not None
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in ARCHIVE_ATTRIBUTES[type(obj)])
+
+
+def _note_archive_changes(session, _flush_context):
+    changed = session.info.setdefault(CHANGES_KEY, set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if type(obj) in ARCHIVE_ATTRIBUTES and _changes_archive(session, obj):
+            changed.add((type(obj).__name__, obj.id))
+
+
+def _bump_archive_version(session):
+    if not has_app_context():
+        return
+    # Flush now so the last batch of changes is counted before the transaction closes.
+    session.flush()
+    changed = session.info.get(CHANGES_KEY)
+    if not changed:
+        return
+    ensure_archive_state_table()
+    # Written through the session so the bump commits or rolls back with the change.
+    session.execute(
+        text("UPDATE presentation_archive_state SET version = version + :count WHERE id = 1"),
+        {"count": len(changed)}
+    )
+
+
+def _rebuild_after_commit(session):
+    if session.info.pop(CHANGES_KEY, None) and has_app_context():
+        schedule_archive_rebuild()
+
+
+def _forget_archive_changes(session):
+    session.info.pop(CHANGES_KEY, None)
+
+
+def install_archive_maintenance(app):
+    """
+    Count archive changes in every commit, and rebuild the maintained archive in the
+    background after them. Tests get the counter but rebuild explicitly.
+    """
+    if not app.config.get('TESTING', False):
+        app.extensions[REBUILDER_KEY] = BackgroundJobs(app, 'presentation-archive')
+    if not event.contains(db.session, 'after_flush', _note_archive_changes):
+        event.listen(db.session, 'after_flush', _note_archive_changes)
+        event.listen(db.session, 'before_commit', _bump_archive_version)
+        event.listen(db.session, 'after_commit', _rebuild_after_commit)
+        event.listen(db.session, 'after_rollback', _forget_archive_changes)
+
+
+def _maintained_archive_response():
+    """Serve the last build, queueing a rebuild when it is missing or stale."""
+    manifest = _read_manifest()
+    if manifest is None:
+        schedule_archive_rebuild()
+        return None
+
+    status = archive_status(manifest)
+    if status['stale']:
+        schedule_archive_rebuild()
+    response = send_offloaded_file(
+        os.path.join(offload_root(), ARCHIVE_NAMESPACE, manifest['archive']),
+        mimetype='application/zip',
+        as_attachment=True,
+        download_name='presentations.zip',
+    )
+    response.headers['X-Archive-Built-At'] = status['built_at']
+    response.headers['X-Archive-Age'] = str(status['age_seconds'])
+    response.headers['X-Archive-Stale'] = 'true' if status['stale'] else 'false'
+    response.headers['X-Archive-Pending-Changes'] = str(status['pending_changes'])
+    return response
+
+
+def presentations_zip_response(args):
+    """
+    Send the uploads ZIP for a request. Unfiltered downloads use the maintained
+    archive once it has been built; filtered ones are built on demand.
+    """
+    try:
+        filters = archive_filters(args)
+    except ArchiveFilterError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    _ensure_upload_table()
+    if not filters:
+        response = _maintained_archive_response()
+        if response is not None:
+            return response
+
+    zip_path = export_path('.zip')
+    write_presentations_zip(zip_path, archive_rows(filters))
+    return send_offloaded_file(
+        zip_path,
+        mimetype='application/zip',
+        as_attachment=True,
+        download_name='presentations.zip',
+    )
@@ -0,0 +1,243 @@
+"""
+Presentation file uploads.
+A file arrives either in one multipart request or through a resumable session:
+the client opens a session, PATCHes the file in chunks at the offset the server
+reports, and finalizes it. Either way the file is validated and stored the same
+way. Session bookkeeping lives in .uploads.
+"""
+import os
+
+from flask import Blueprint, current_app, jsonify, request
+from sqlalchemy import text
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from website import db
+from website.models import Presentation
+from .presentations import (
+    _allowed_presentation_filename,
+    ensure_presentation_schema_before_request,
+    ensure_presentation_upload_table,
+    upload_too_large,
+)
+from .uploads import (
+    FORM_OVERHEAD_BYTES,
+    PRESENTATION_UPLOAD_MAX_BYTES,
+    RESUMABLE_CHUNK_MAX_BYTES,
+    UploadConflict,
+    UploadError,
+    append_upload_chunk,
+    create_upload_session,
+    delete_upload_session,
+    get_upload_session,
+    locked_staged_file,
+    sniff_presentation,
+    spool_upload,
+)
+
+presentation_uploads_bp = Blueprint('presentation_uploads', __name__)
+# Shares the /api/v1/presentations prefix, so it keeps that blueprint's JSON 413 and schema check.
+presentation_uploads_bp.register_error_handler(RequestEntityTooLarge, upload_too_large)
+presentation_uploads_bp.before_request(ensure_presentation_schema_before_request)
+
+
+@presentation_uploads_bp.route('/<int:presentation_id>/upload', methods=['POST'])
+def upload_presentation_file(presentation_id):
+    """Upload a PPT, PPTX, or PDF file for a presentation."""
+    presentation = Presentation.query.get_or_404(presentation_id)
+
+    # Werkzeug stops reading the body as soon as it passes this, before parsing finishes.
+    request.max_content_length = min(
+        PRESENTATION_UPLOAD_MAX_BYTES + FORM_OVERHEAD_BYTES,
+        current_app.config.get('MAX_CONTENT_LENGTH') or float('inf'),
+    )
+    if 'file' not in request.files:
+        return jsonify({"error": "No file part"}), 400
+
+    file = request.files['file']
+
+    if file.filename == '':
+        return jsonify({"error": "No file selected"}), 400
+
+    filename = _allowed_presentation_filename(file.filename)
+    if not filename:
+        return jsonify({"error": "Invalid file type. Upload a PPT, PPTX, or PDF file."}), 400
+
+    try:
+        upload = _spool_presentation_file(file.stream)
+    except UploadError as error:
+        return jsonify({"error": str(error)}), 400
+
+    return jsonify(_save_presentation_upload(presentation, filename, upload))
+
+
+def _spool_presentation_file(stream):
+    return spool_upload(
+        stream,
+        PRESENTATION_UPLOAD_MAX_BYTES,
+        sniff_presentation,
+        too_large_message="File exceeds 20MB",
+        invalid_type_message="Invalid file type. Upload a PPT, PPTX, or PDF file.",
+    )
+
+
+def _save_presentation_upload(presentation, filename, upload):
+    """Store a validated upload and its filename bookkeeping in one commit."""
+    ensure_presentation_upload_table()
+    presentation.presentation_file = upload.read()
+    params = {
+        "pid": presentation.id,
+        "filename": filename,
+        "sha256": upload.sha256,
+        "size": upload.size,
+        "format": upload.kind,
+    }
+    updated = db.session.execute(
+        text("""
+            UPDATE presentation_uploads
+            SET filename = :filename, sha256 = :sha256, byte_size = :size, file_format = :format,
+                uploaded_at = CURRENT_TIMESTAMP
+            WHERE presentation_id = :pid
+        """),
+        params
+    )
+    if updated.rowcount == 0:
+        db.session.execute(
+            text("""
+                INSERT INTO presentation_uploads (presentation_id, filename, sha256, byte_size, file_format)
+                VALUES (:pid, :filename, :sha256, :size, :format)
+            """),
+            params
+        )
+    db.session.commit()
+
+    return {
+        "message": "File uploaded successfully",
+        "filename": filename,
+        "size": upload.size,
+        "sha256": upload.sha256,
+    }
+
+
+def _upload_session_status(session_id, total_size, offset):
+    return {
+        "upload_id": session_id,
+        "offset": offset,
+        "size": total_size,
+        "complete": offset == total_size,
+    }
+
+
+@presentation_uploads_bp.route('/<int:presentation_id>/upload/sessions', methods=['POST'])
+def create_presentation_upload_session(presentation_id):
+    """Start a resumable upload. Body: {"filename": ..., "size": total bytes}."""
+    Presentation.query.get_or_404(presentation_id)
+    data = request.get_json(silent=True) or {}
+
+    filename = _allowed_presentation_filename(data.get('filename'))
+    if not filename:
+        return jsonify({"error": "Invalid file type. Upload a PPT, PPTX, or PDF file."}), 400
+    try:
+        total_size = int(data.get('size'))
+    except (TypeError, ValueError):
+        return jsonify({"error": "size is required"}), 400
+    if total_size <= 0:
+        return jsonify({"error": "size is required"}), 400
+    if total_size > PRESENTATION_UPLOAD_MAX_BYTES:
+        return jsonify({"error": "File exceeds 20MB"}), 400
+
+    session_id = create_upload_session(presentation_id, filename, total_size)
+    status = _upload_session_status(session_id, total_size, 0)
+    status["chunk_size"] = RESUMABLE_CHUNK_MAX_BYTES
+    return jsonify(status), 201
+
+
+@presentation_uploads_bp.route('/<int:presentation_id>/upload/sessions/<string:upload_id>', methods=['GET'])
+def get_presentation_upload_session(presentation_id, upload_id):
+    """Report how many bytes of a resumable upload have arrived."""
+    upload_session = get_upload_session(presentation_id, upload_id)
+    if not upload_session:
+        return jsonify({"error": "Upload session not found"}), 404
+    return jsonify(_upload_session_status(upload_id, *upload_session[1:]))
+
+
+@presentation_uploads_bp.route('/<int:presentation_id>/upload/sessions/<string:upload_id>', methods=['PATCH'])
+def append_presentation_upload_chunk(presentation_id, upload_id):
+    """
+    Append the raw request body at the `Upload-Offset` header (or `offset` param).
+    The offset must equal the bytes received so far; on a mismatch the response is
+    409 with the current offset so the client can resume from there. The body's
+    Content-Length is required so an oversized or truncated chunk is refused.
+    """
+    upload_session = get_upload_session(presentation_id, upload_id)
+    if not upload_session:
+        return jsonify({"error": "Upload session not found"}), 404
+    _, total_size, received = upload_session
+
+    try:
+        offset = int(request.headers.get('Upload-Offset', request.args.get('offset')))
+    except (TypeError, ValueError):
+        return jsonify({"error": "Upload-Offset is required"}), 400
+    if request.content_length is None:
+        return jsonify({"error": "Content-Length is required", "offset": received}), 411
+    if request.content_length > RESUMABLE_CHUNK_MAX_BYTES:
+        return jsonify({"error": "Chunk is too large", "offset": received}), 413
+
+    if offset != received:
+        return jsonify({"error": "Offset mismatch", "offset": received}), 409
+
+    try:
+        offset = append_upload_chunk(upload_id, request.stream, offset, request.content_length, total_size)
+    except UploadConflict as error:
+        return jsonify({"error": str(error), "offset": get_upload_session(presentation_id, upload_id)[2]}), 409
+    except UploadError as error:
+        return jsonify({"error": str(error), "offset": get_upload_session(presentation_id, upload_id)[2]}), 400
+
+    status = _upload_session_status(upload_id, total_size, offset)
+    response = jsonify(status)
+    response.headers['Upload-Offset'] = str(status["offset"])
+    return response
+
+
+@presentation_uploads_bp.route('/<int:presentation_id>/upload/sessions/<string:upload_id>', methods=['DELETE'])
+def cancel_presentation_upload_session(presentation_id, upload_id):
+    """Abandon a resumable upload and discard its staged bytes."""
+    if not get_upload_session(presentation_id, upload_id):
+        return jsonify({"error": "Upload session not found"}), 404
+    delete_upload_session(upload_id)
+    return jsonify({"message": "Upload session cancelled"})
+
+
+@presentation_uploads_bp.route('/<int:presentation_id>/upload/sessions/<string:upload_id>/finalize', methods=['POST'])
+def finalize_presentation_upload_session(presentation_id, upload_id):
+    """
+    Validate the assembled file and store it exactly like a single-request upload.
+    An optional {"sha256": ...} body is checked against the staged bytes.
+    """
+    presentation = Presentation.query.get_or_404(presentation_id)
+    upload_session = get_upload_session(presentation_id, upload_id)
+    if not upload_session:
+        return jsonify({"error": "Upload session not found"}), 404
+    filename, total_size, received = upload_session
+    expected_sha256 = (request.get_json(silent=True) or {}).get('sha256')
+
+    status = _upload_session_status(upload_id, total_size, received)
+    if not status["complete"]:
+        return jsonify({"error": "Upload is incomplete", **status}), 409
+
+    try:
+        with locked_staged_file(upload_id) as staged:
+            if os.fstat(staged.fileno()).st_size != total_size:
+                return jsonify({"error": "Upload is incomplete", **status}), 409
+            staged.seek(0)
+            try:
+                upload = _spool_presentation_file(staged)
+            except UploadError as error:
+                return jsonify({"error": str(error)}), 400
+            if expected_sha256 and expected_sha256.lower() != upload.sha256:
+                return jsonify({"error": "Upload checksum mismatch", "sha256": upload.sha256}), 400
+            result = _save_presentation_upload(presentation, filename, upload)
+    except UploadConflict as error:
+        return jsonify({"error": str(error), **status}), 409
+
+    delete_upload_session(upload_id)
+    return jsonify(result)
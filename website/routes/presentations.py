@@ -2,24 +2,52 @@
 API endpoints for managing presentations.
 
 '''
-import base64
-import io
+import hashlib
 import os
-import uuid
-import zipfile
 from datetime import datetime, timedelta
 
-from flask import Blueprint, current_app, jsonify, request, session, send_file
+from flask import Blueprint, current_app, jsonify, request, session
 from sqlalchemy import inspect, text
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 
-from website.models import BlockSchedule, Presentation, User
+from website.models import ABSTRACT_PREVIEW_LENGTH, BlockSchedule, Presentation, User, abstract_preview_text
 from website import db
+from website.file_offload import materialize, offload_path, send_offloaded_file
+from website.invalidation import all_tags, invalidate, invalidation_tag, tagged_cache
+from website.presentation_files import record_file_metadata
+from website.request_coalescing import coalesced
+from website.security import (
+    _extension_from_upload,
+    _presentation_file_bytes,
+    _zip_filename_for_presentation,
+)
+from .abstract_images import (
+    IMAGE_SIZES,
+    ORIGINAL,
+    abstract_image_response,
+    ensure_abstract_image_table,
+    load_abstract_image,
+    store_abstract_image,
+)
+from .block_schedule import _schedule_identifiers
+from .presentation_archive import archive_status, presentations_zip_response, upload_diagnostics
+from .uploads import (
+    ABSTRACT_IMAGE_MAX_BYTES,
+    IMAGE_MIME_TYPES,
+    UploadError,
+    sniff_image,
+    spool_upload,
+)
+from .utils import keyset_page, pagination_requested
 
 presentations_bp = Blueprint('presentations', __name__)
 
 VALID_PRESENTATION_TYPES = {'Presentation', 'Blitz', 'Poster'}
 PRESENTER_EDITABLE_FIELDS = {'title', 'abstract', 'department', 'mentor', 'keywords', 'type'}
+PROGRAM_IDS_CACHE = 'program_ids'
+METADATA_READY_KEY = 'presentation_metadata_ready'
+UPLOADS_READY_KEY = 'presentation_uploads_ready'
 
 
 def _clean_text(value):
@@ -95,7 +123,9 @@ def _validate_update_permission(presentation, data):
 
 
 def ensure_presentation_metadata_columns():
-    """Add presentation metadata columns for existing databases."""
+    """Add presentation metadata columns for existing databases, once per app."""
+    if current_app.extensions.get(METADATA_READY_KEY):
+        return
     try:
         inspector = inspect(db.engine)
         existing = {column['name'] for column in inspector.get_columns('presentations')}
@@ -109,6 +139,25 @@ def ensure_presentation_metadata_columns():
             conn.execute(text("ALTER TABLE presentations ADD COLUMN mentor VARCHAR(120)"))
         if 'keywords' not in existing:
             conn.execute(text("ALTER TABLE presentations ADD COLUMN keywords TEXT"))
+        if 'abstract_preview' not in existing:
+            conn.execute(text(
+                f"ALTER TABLE presentations ADD COLUMN abstract_preview VARCHAR({ABSTRACT_PREVIEW_LENGTH})"))
+        if 'abstract_length' not in existing:
+            conn.execute(text("ALTER TABLE presentations ADD COLUMN abstract_length INTEGER"))
+        # Rows written before the preview columns existed are filled in once.
+        rows = conn.execute(text("SELECT id, abstract FROM presentations WHERE abstract_length IS NULL")).fetchall()
+        for presentation_id, abstract in rows:
+            conn.execute(
+                text("UPDATE presentations SET abstract_preview = :preview, abstract_length = :length WHERE id = :pid"),
+                {"pid": presentation_id, "preview": abstract_preview_text(abstract), "length": len(abstract or '')}
+            )
+    current_app.extensions[METADATA_READY_KEY] = True
+
+
+@presentations_bp.errorhandler(RequestEntityTooLarge)
+def upload_too_large(_error):
+    """Reject bodies over the request limit with JSON instead of the HTML 413 page."""
+    return jsonify({"error": "Upload exceeds the maximum request size"}), 413
 
 
 @presentations_bp.before_request
@@ -143,35 +192,50 @@ def ensure_presentation_type_table():
         ))
 
 
-def ensure_abstract_image_table():
-    """Create the persistent abstract image table if it does not exist."""
-    with db.engine.begin() as conn:
-        conn.execute(text(
-            """
-            CREATE TABLE IF NOT EXISTS abstract_images (
-                id VARCHAR(64) PRIMARY KEY,
-                filename VARCHAR(255) NOT NULL,
-                mime_type VARCHAR(120) NOT NULL,
-                data_base64 TEXT NOT NULL,
-                uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            """
-        ))
-
-
 def ensure_presentation_upload_table():
-    """Create table for persistent uploaded presentation metadata."""
+    """Create table for persistent uploaded presentation metadata once per app."""
+    if current_app.extensions.get(UPLOADS_READY_KEY):
+        return
     with db.engine.begin() as conn:
         conn.execute(text(
             """
             CREATE TABLE IF NOT EXISTS presentation_uploads (
                 presentation_id INTEGER PRIMARY KEY,
                 filename VARCHAR(255) NOT NULL,
-                uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                sha256 VARCHAR(64),
+                byte_size INTEGER,
+                file_format VARCHAR(16)
             )
             """
         ))
 
+    existing = {column['name'] for column in inspect(db.engine).get_columns('presentation_uploads')}
+    with db.engine.begin() as conn:
+        if 'sha256' not in existing:
+            conn.execute(text("ALTER TABLE presentation_uploads ADD COLUMN sha256 VARCHAR(64)"))
+        if 'byte_size' not in existing:
+            conn.execute(text("ALTER TABLE presentation_uploads ADD COLUMN byte_size INTEGER"))
+        if 'file_format' not in existing:
+            conn.execute(text("ALTER TABLE presentation_uploads ADD COLUMN file_format VARCHAR(16)"))
+    current_app.extensions[UPLOADS_READY_KEY] = True
+
+
+def _refresh_file_metadata(presentation_id, value):
+    """Keep size, format and hash current when presentation_file is written outside the upload route."""
+    ensure_presentation_upload_table()
+    data = _presentation_file_bytes(value)
+    if data:
+        record_file_metadata(presentation_id, data)
+        return
+    db.session.execute(
+        text("""
+            UPDATE presentation_uploads SET sha256 = NULL, byte_size = NULL, file_format = NULL
+            WHERE presentation_id = :pid
+        """),
+        {"pid": presentation_id}
+    )
+
 
 def normalize_presentation_type(value):
     """Normalize a submitted presentation type."""
@@ -194,6 +258,16 @@ def get_show_on_schedule(presentation_id):
     return bool(row[0]) if row else True
 
 
+def hidden_presentation_ids():
+    """Return the ids of every presentation hidden from public schedule/program views."""
+    ensure_presentation_visibility_table()
+    rows = db.session.execute(
+        text("SELECT presentation_id FROM presentation_visibility WHERE show_on_schedule = :shown"),
+        {"shown": False}
+    ).fetchall()
+    return {row[0] for row in rows}
+
+
 def set_show_on_schedule(presentation_id, value):
     """Persist per-presentation visibility."""
     ensure_presentation_visibility_table()
@@ -206,6 +280,7 @@ def set_show_on_schedule(presentation_id, value):
             text("INSERT INTO presentation_visibility (presentation_id, show_on_schedule) VALUES (:pid, :value)"),
             {"pid": presentation_id, "value": bool(value)}
         )
+    invalidate(invalidation_tag('presentation', presentation_id))
 
 
 def get_presentation_type(presentation):
@@ -231,6 +306,7 @@ def set_presentation_type(presentation_id, value):
     """Persist per-presentation type. Empty/invalid values remove the override."""
     ensure_presentation_type_table()
     normalized = normalize_presentation_type(value)
+    invalidate(invalidation_tag('presentation', presentation_id))
     if not normalized:
         db.session.execute(
             text("DELETE FROM presentation_types WHERE presentation_id = :pid"),
@@ -306,14 +382,30 @@ def program_identifier_for(presentation):
     return identifiers.get(presentation.id, f"{program_type_prefix(presentation)}-{presentation.id}")
 
 
-def presentation_to_dict(presentation):
-    """Serialize a presentation and include program metadata."""
+def _visible_program_identifier_map():
+    """Return program identifiers for every visible presentation in one pass.
+    Numbering depends on every presentation and block, so any change to either drops it.
+    Only the numbering columns are loaded, never abstracts or file blobs."""
+
+    def compute():
+        program_ids, _ = _schedule_identifiers()
+        return program_ids, all_tags('presentation', 'block')
+
+    return tagged_cache(PROGRAM_IDS_CACHE).get_or_compute('visible', compute)
+
+
+def presentation_to_dict(presentation, program_ids=None):
+    """Serialize a presentation and include program metadata.
+    Pass a precomputed `program_ids` map when serializing many rows at once."""
     data = presentation.to_dict()
     calculated_time = effective_presentation_time(presentation)
     if calculated_time:
         data["time"] = calculated_time.strftime('%Y-%m-%dT%H:%M:%S')
     data["type"] = get_presentation_type(presentation)
-    data["program_identifier"] = program_identifier_for(presentation)
+    if program_ids is not None and presentation.id in program_ids:
+        data["program_identifier"] = program_ids[presentation.id]
+    else:
+        data["program_identifier"] = program_identifier_for(presentation)
     data["schedule_title"] = presentation.schedule.title if presentation.schedule else None
     data["show_on_schedule"] = get_show_on_schedule(presentation.id)
     data["department"] = getattr(presentation, "department", None)
@@ -325,7 +417,7 @@ def presentation_to_dict(presentation):
         text("SELECT filename FROM presentation_uploads WHERE presentation_id = :pid"),
         {"pid": presentation.id}
     ).fetchone()
-    data["uploaded_presentation_filename"] = row[0] if row else None
+    data["uploaded_presentation_filename"] = row[0] if row and row[0] else None
     return data
 
 
@@ -408,7 +500,13 @@ def program_table_rows():
 
 @presentations_bp.route('/', methods=['GET'])
 def get_presentations():
-    ''' GET all presentations '''
+    ''' GET all presentations, or one keyset page when `limit`/`after` is given '''
+    if pagination_requested():
+        def serialize_rows(rows):
+            program_ids = _visible_program_identifier_map()
+            return [presentation_to_dict(p, program_ids) for p in rows]
+        return keyset_page(Presentation.query, Presentation.id, serialize_rows)
+
     presentations = Presentation.query.order_by(Presentation.id.asc()).all()
     return jsonify([presentation_to_dict(p) for p in presentations])
 
@@ -517,7 +615,9 @@ def update_presentation(presentation_id):
 
     presentation.title = data.get('title', presentation.title)
     presentation.abstract = data.get('abstract', presentation.abstract)
-    presentation.presentation_file = data.get('presentation_file', presentation.presentation_file)
+    if 'presentation_file' in data:
+        presentation.presentation_file = data.get('presentation_file')
+        _refresh_file_metadata(presentation.id, presentation.presentation_file)
 
     if 'department' in data:
         presentation.department = _clean_text(data.get('department'))
@@ -579,6 +679,7 @@ def get_recent_presentations():
 
 
 @presentations_bp.route('/type/<string:category>', methods=['GET'])
+@coalesced
 def get_presentations_by_type(category):
     """Return all presentations of a given type (Poster, Blitz, Presentation)."""
     requested_type = normalize_presentation_type(category)
@@ -679,46 +780,83 @@ def latest_presentation_upload(presentation_id):
         text("SELECT filename FROM presentation_uploads WHERE presentation_id = :pid"),
         {"pid": presentation_id}
     ).fetchone()
-    return jsonify({"filename": row[0] if row else None})
-
-
-@presentations_bp.route('/<int:presentation_id>/upload', methods=['POST'])
-def upload_presentation_file(presentation_id):
-    """Upload a PPT, PPTX, or PDF file for a presentation."""
-    presentation = Presentation.query.get_or_404(presentation_id)
+    return jsonify({"filename": row[0] if row and row[0] else None})
 
-    if 'file' not in request.files:
-        return jsonify({"error": "No file part"}), 400
 
-    file = request.files['file']
+DECK_NAMESPACE = 'decks'
+PRESENTATION_MIME_TYPES = {
+    'pdf': 'application/pdf',
+    'ppt': 'application/vnd.ms-powerpoint',
+    'pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+}
 
-    if file.filename == '':
-        return jsonify({"error": "No file selected"}), 400
 
-    filename = secure_filename(file.filename)
+def _allowed_presentation_filename(raw_name):
+    """Return the secure filename when it has a PPT, PPTX or PDF extension, else None."""
+    filename = secure_filename(raw_name or '')
     extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
-    allowed = {'ppt', 'pptx', 'pdf'}
-    if extension not in allowed:
-        return jsonify({"error": "Invalid file type. Upload a PPT, PPTX, or PDF file."}), 400
+    return filename if extension in {'ppt', 'pptx', 'pdf'} else None
 
-    file_data = file.read()
-    if len(file_data) > 20 * 1024 * 1024:
-        return jsonify({"error": "File exceeds 20MB"}), 400
 
-    presentation.presentation_file = file_data
+@presentations_bp.route('/<int:presentation_id>/file', methods=['GET'])
+def download_presentation_file(presentation_id):
+    """
+    Stream one uploaded deck, named like its entry in the download-all ZIP.
+    The ETag is the stored content hash, so a matching If-None-Match is answered
+    before the file is loaded; Range requests return only the requested bytes.
+    Decks are copied to disk on first download and served from there (or by the
+    web server when FILE_OFFLOAD is set) until the upload is replaced.
+    """
+    presentation = Presentation.query.get_or_404(presentation_id)
     ensure_presentation_upload_table()
-    updated = db.session.execute(
-        text("UPDATE presentation_uploads SET filename = :filename, uploaded_at = CURRENT_TIMESTAMP WHERE presentation_id = :pid"),
-        {"pid": presentation.id, "filename": filename}
-    )
-    if updated.rowcount == 0:
-        db.session.execute(
-            text("INSERT INTO presentation_uploads (presentation_id, filename) VALUES (:pid, :filename)"),
-            {"pid": presentation.id, "filename": filename}
+    row = db.session.execute(
+        text("SELECT filename, sha256 FROM presentation_uploads WHERE presentation_id = :pid"),
+        {"pid": presentation_id}
+    ).fetchone()
+    uploaded_name = secure_filename(row[0]) if row and row[0] else None
+    sha256 = row[1] if row else None
+
+    if sha256 and request.if_none_match.contains(sha256):
+        response = current_app.response_class(status=304)
+        response.set_etag(sha256)
+        return response
+
+    extension = uploaded_name.rsplit('.', 1)[-1].lower() if _allowed_presentation_filename(uploaded_name) else None
+    path = offload_path(DECK_NAMESPACE, f"{presentation_id}-{sha256}") if sha256 and extension else None
+    if path is None:
+        file_data = _presentation_file_bytes(
+            db.session.query(Presentation.presentation_file).filter_by(id=presentation_id).scalar()
         )
-    db.session.commit()
-
-    return jsonify({"message": "File uploaded successfully", "filename": filename})
+        if not file_data:
+            return jsonify({"error": "No file uploaded"}), 404
+
+        if not sha256:
+            # Uploads from before hashes were recorded get one on first download.
+            sha256 = hashlib.sha256(file_data).hexdigest()
+            if row:
+                db.session.execute(
+                    text("UPDATE presentation_uploads SET sha256 = :sha256 WHERE presentation_id = :pid"),
+                    {"pid": presentation_id, "sha256": sha256}
+                )
+                db.session.commit()
+        extension = _extension_from_upload(uploaded_name, file_data)
+        path = materialize(DECK_NAMESPACE, f"{presentation_id}-{sha256}", file_data,
+                           replaces_prefix=f"{presentation_id}-")
+
+    response = send_offloaded_file(
+        path,
+        mimetype=PRESENTATION_MIME_TYPES[extension],
+        as_attachment=True,
+        download_name=_zip_filename_for_presentation(presentation, extension),
+        etag=sha256,
+        conditional=True,
+        max_age=0,
+    )
+    response.accept_ranges = 'bytes'
+    # Decks can be replaced at any time, so caches must revalidate with the ETag.
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
 
 
 @presentations_bp.route('/abstract-images', methods=['POST'])
@@ -740,10 +878,10 @@ def upload_abstract_images():
     if not files:
         return jsonify({"error": "No files uploaded"}), 400
 
-    ensure_abstract_image_table()
-    uploaded = []
     allowed_extensions = {'png', 'jpg', 'jpeg', 'gif', 'webp', 'svg'}
+    accepted = []
 
+    # Check every file before storing any, so a bad file leaves nothing half-saved.
     for file in files:
         if not file or file.filename == '':
             continue
@@ -753,24 +891,22 @@ def upload_abstract_images():
         if extension not in allowed_extensions:
             return jsonify({"error": f"Unsupported image type: {file.filename}"}), 400
 
-        raw_data = file.read()
-        if len(raw_data) > 10 * 1024 * 1024:
-            return jsonify({"error": f"Image is too large: {file.filename}"}), 400
+        try:
+            upload = spool_upload(
+                file.stream,
+                ABSTRACT_IMAGE_MAX_BYTES,
+                sniff_image,
+                too_large_message=f"Image is too large: {file.filename}",
+                invalid_type_message=f"Unsupported image type: {file.filename}",
+            )
+        except UploadError as error:
+            return jsonify({"error": str(error)}), 400
+        accepted.append((filename, upload))
 
-        image_id = uuid.uuid4().hex
-        mime_type = file.mimetype or f"image/{extension or 'png'}"
-        db.session.execute(
-            text("""
-                INSERT INTO abstract_images (id, filename, mime_type, data_base64)
-                VALUES (:id, :filename, :mime_type, :data_base64)
-            """),
-            {
-                "id": image_id,
-                "filename": filename,
-                "mime_type": mime_type,
-                "data_base64": base64.b64encode(raw_data).decode('ascii'),
-            }
-        )
+    ensure_abstract_image_table()
+    uploaded = []
+    for filename, upload in accepted:
+        image_id = store_abstract_image(filename, IMAGE_MIME_TYPES[upload.kind], upload.read())
         uploaded.append({
             "filename": filename,
             "url": f"/api/v1/presentations/abstract-images/{image_id}",
@@ -785,56 +921,47 @@ def upload_abstract_images():
 
 @presentations_bp.route('/abstract-images/<string:image_id>', methods=['GET'])
 def get_abstract_image(image_id):
-    """Serve a persisted abstract image by id."""
-    ensure_abstract_image_table()
-    row = db.session.execute(
-        text("SELECT filename, mime_type, data_base64 FROM abstract_images WHERE id = :id"),
-        {"id": image_id}
-    ).fetchone()
-    if not row:
+    """
+    Serve a persisted abstract image by id. Ids are never reused, so responses are immutable.
+    `?size=web` or `?size=print` selects a downscaled derivative; web sizes are sent as
+    WebP to browsers that list image/webp in their Accept header.
+    """
+    size = request.args.get('size', ORIGINAL)
+    if size not in IMAGE_SIZES:
+        return jsonify({"error": "Invalid image size"}), 400
+
+    # Only an explicit image/webp counts; image/* and */* come from browsers that cannot decode it.
+    webp = size != ORIGINAL and any(
+        mimetype == 'image/webp' and quality > 0 for mimetype, quality in request.accept_mimetypes)
+    image = load_abstract_image(image_id, size=size, webp=webp)
+    if image is None:
         return jsonify({"error": "Image not found"}), 404
 
-    filename, mime_type, data_base64 = row
-    raw_data = base64.b64decode(data_base64)
-    return send_file(
-        io.BytesIO(raw_data),
-        mimetype=mime_type,
-        as_attachment=False,
-        download_name=filename
-    )
+    response = abstract_image_response(image)
+    if size != ORIGINAL:
+        response.vary.add('Accept')
+    return response
+
+
+@presentations_bp.route('/upload-diagnostics', methods=['GET'])
+def presentation_upload_diagnostics():
+    """Per-presentation file metadata; ?q= searches id, title, presenters and filename."""
+    rows = upload_diagnostics(request.args.get('q'))
+    return jsonify({"count": len(rows), "results": rows})
+
+
+@presentations_bp.route('/download-all/status', methods=['GET'])
+def download_all_status():
+    """Report the age and pending changes of the prebuilt uploads archive."""
+    ensure_presentation_upload_table()
+    return jsonify(archive_status())
 
 
 @presentations_bp.route('/download-all', methods=['GET'])
 def download_all_presentations():
     """
-    Download all presentations as a ZIP, ordered by Presentation.time.
+    Download uploaded presentations as a ZIP named `Presenter Names - Title.ext`.
+    Optional filters: ?day=, ?schedule_id=, ?type= and ?updated_since= (ISO 8601).
     """
     ensure_presentation_upload_table()
-    zip_buffer = io.BytesIO()
-    presentations = Presentation.query.order_by(Presentation.time.asc()).all()
-
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for pres in presentations:
-            if not pres.presentation_file:
-                continue
-
-            upload_row = db.session.execute(
-                text("SELECT filename FROM presentation_uploads WHERE presentation_id = :pid"),
-                {"pid": pres.id}
-            ).fetchone()
-            safe_title = "".join(c for c in pres.title if c.isalnum() or c in (" ", "_", "-")).strip()
-            timestamp = pres.time.strftime("%Y-%m-%d_%H%M") if pres.time else "no_time"
-            uploaded_name = secure_filename(upload_row[0]) if upload_row and upload_row[0] else None
-            extension = uploaded_name.rsplit('.', 1)[-1].lower() if uploaded_name and '.' in uploaded_name else 'pptx'
-            filename = f"{timestamp} - {safe_title}.{extension}"
-
-            zipf.writestr(filename, pres.presentation_file)
-
-    zip_buffer.seek(0)
-
-    return send_file(
-        zip_buffer,
-        mimetype="application/zip",
-        as_attachment=True,
-        download_name="presentations.zip"
-    )
\ No newline at end of file
+    return presentations_zip_response(request.args)
\ No newline at end of file
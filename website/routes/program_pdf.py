@@ -0,0 +1,605 @@
+"""
+The printable program PDF.
+The program is first collected as plain data (program_document) and hashed; the
+rendered PDF is cached on disk under that hash, so a download whose inputs have not
+changed is served without rendering. When they have changed, the previous build is
+served while a fresh one renders in the background.
+Variants cover one day and/or one presentation type for the printing staff.
+"""
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+from flask import current_app, jsonify
+from PIL import Image as PILImage, UnidentifiedImageError
+
+from website.background import BackgroundJobs
+from website.file_offload import namespace_dir, offload_path, offload_root, send_offloaded_file
+from website.models import BlockSchedule
+from website.routes.abstract_images import load_abstract_images
+from website.routes.presentations import (
+    effective_presentation_time,
+    normalize_presentation_type,
+    _meal_type_for_block,
+    _program_identifier_map,
+)
+from .presentation_overview import (
+    _format_time,
+    _presenters_by_presentation,
+    _type_matches,
+    _user_full_name,
+    _visible_presentations,
+)
+
+# Bump when rendering changes so cached builds of unchanged data are not reused.
+PDF_LAYOUT_VERSION = 2
+PDF_NAMESPACE = 'program-pdf'
+BUILDER_KEY = 'program_pdf_builder'
+ABSTRACT_IMAGE_MARKER = '/api/v1/presentations/abstract-images/'
+
+# Page geometry in points: letter paper with 0.65in margins.
+POINTS_PER_INCH = 72.0
+CONTENT_WIDTH = 7.2 * POINTS_PER_INCH
+IMAGE_MAX_WIDTH = CONTENT_WIDTH - 0.4 * POINTS_PER_INCH
+IMAGE_MAX_HEIGHT = 3.5 * POINTS_PER_INCH
+# Abstract figures are resampled to this resolution at their printed size.
+PDF_IMAGE_DPI = 200
+PDF_IMAGE_QUALITY = 85
+
+MARKDOWN_IMAGE_RE = re.compile(r'!\[([^\]]*)\]\(([^)]+)\)')
+HTML_IMAGE_RE = re.compile(r'<img\b[^>]*\bsrc=["\']([^"\']+)["\'][^>]*>', re.IGNORECASE)
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+
+
+class ProgramVariantError(ValueError):
+    """Raised when a requested program PDF variant is invalid."""
+
+
+def _image_id_from_url(url):
+    """Extract an abstract image id from the app's abstract-image URL."""
+    if not url:
+        return None
+
+    if ABSTRACT_IMAGE_MARKER not in url:
+        return None
+
+    image_id = url.split(ABSTRACT_IMAGE_MARKER, 1)[1]
+    image_id = image_id.split('?', 1)[0].split('#', 1)[0]
+    image_id = image_id.strip().strip('/').strip('"\'<>')
+    return image_id or None
+
+
+def _fit_image_for_pdf(image_data):
+    """
+    Decode an image once and downscale it to the largest size it is drawn at.
+    Returns (bytes, draw width, draw height) in points, or None when Pillow cannot read it.
+    """
+    try:
+        source = PILImage.open(io.BytesIO(image_data))
+        source.load()
+    except (UnidentifiedImageError, OSError, ValueError, PILImage.DecompressionBombError):
+        return None
+
+    width, height = source.size
+    if not width or not height:
+        return None
+    # Pixels map to points one-to-one below the box size, as ReportLab drew them before.
+    scale = min(IMAGE_MAX_WIDTH / width, IMAGE_MAX_HEIGHT / height, 1)
+    draw_width, draw_height = width * scale, height * scale
+    target = (
+        max(1, round(draw_width / POINTS_PER_INCH * PDF_IMAGE_DPI)),
+        max(1, round(draw_height / POINTS_PER_INCH * PDF_IMAGE_DPI)),
+    )
+    if target[0] < width:
+        alpha = source.mode in ('RGBA', 'LA', 'PA') or (
+            source.mode == 'P' and 'transparency' in source.info)
+        resized = source.convert('RGBA' if alpha else 'RGB')
+        resized.thumbnail(target, PILImage.LANCZOS)
+        buffer = io.BytesIO()
+        if alpha:
+            resized.save(buffer, format='PNG')
+        else:
+            resized.save(buffer, format='JPEG', quality=PDF_IMAGE_QUALITY)
+        image_data = buffer.getvalue()
+    return image_data, draw_width, draw_height
+
+
+def _program_images(image_ids):
+    """Fetch abstract images in one query and fit each to its PDF size, keyed by image id."""
+    images = {}
+    for image_id, data in load_abstract_images(image_ids, size='print').items():
+        fitted = _fit_image_for_pdf(data)
+        if fitted:
+            images[image_id] = fitted
+    return images
+
+
+def _html_attribute(tag, attribute):
+    """Return a simple quoted HTML attribute value from a tag string."""
+    pattern = rf'\b{re.escape(attribute)}=["\']([^"\']+)["\']'
+    match = re.search(pattern, tag or '', flags=re.IGNORECASE)
+    return match.group(1) if match else None
+
+
+def _abstract_image_matches(abstract):
+    """Yield markdown and HTML image references in their original order."""
+    matches = []
+    text = abstract or ''
+
+    for match in MARKDOWN_IMAGE_RE.finditer(text):
+        matches.append({
+            'start': match.start(),
+            'end': match.end(),
+            'alt': match.group(1) or 'figure',
+            'url': match.group(2),
+        })
+
+    for match in HTML_IMAGE_RE.finditer(text):
+        tag = match.group(0)
+        matches.append({
+            'start': match.start(),
+            'end': match.end(),
+            'alt': _html_attribute(tag, 'alt') or 'figure',
+            'url': match.group(1),
+        })
+
+    matches.sort(key=lambda item: item['start'])
+    return matches
+
+
+def _abstract_text_for_pdf(value):
+    """Convert markdown-ish/HTML abstract text into safe ReportLab paragraph text."""
+    cleaned = value or ''
+    cleaned = HTML_TAG_RE.sub('', cleaned)
+    cleaned = re.sub(r'[#*_`$]', '', cleaned)
+    cleaned = cleaned.replace('[', '').replace(']', '')
+    return escape(cleaned).replace('\n', '<br/>')
+
+
+def _append_image_to_pdf(story, image, alt_text, styles):
+    """Append a fitted abstract image to the PDF, or a placeholder if unavailable."""
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Image, Paragraph, Spacer
+
+    body_style = styles['BodyText']
+    if image:
+        image_data, draw_width, draw_height = image
+        try:
+            flowable = Image(io.BytesIO(image_data), width=draw_width, height=draw_height)
+            flowable.hAlign = 'CENTER'
+            story.append(flowable)
+            story.append(Spacer(1, 0.12 * inch))
+            return
+        except Exception:
+            pass
+
+    story.append(Paragraph(f'[figure unavailable: {escape(alt_text or "figure")}]', body_style))
+    story.append(Spacer(1, 0.08 * inch))
+
+
+def _append_abstract_to_pdf(story, abstract, styles, images):
+    """Append abstract text and its abstract images, given as fitted images keyed by id."""
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, Spacer
+
+    body_style = styles['BodyText']
+    body_style.leading = 14
+
+    def add_text_block(text_block):
+        for block in re.split(r'\n\s*\n', text_block or ''):
+            block = block.strip()
+            if not block:
+                continue
+            story.append(Paragraph(_abstract_text_for_pdf(block), body_style))
+            story.append(Spacer(1, 0.08 * inch))
+
+    text = abstract or ''
+    position = 0
+    for image_match in _abstract_image_matches(text):
+        if image_match['start'] < position:
+            continue
+
+        add_text_block(text[position:image_match['start']])
+        image = images.get(_image_id_from_url(image_match['url']))
+        _append_image_to_pdf(story, image, image_match['alt'], styles)
+        position = image_match['end']
+
+    add_text_block(text[position:])
+
+    if not text.strip():
+        story.append(Paragraph('-', body_style))
+
+
+def _append_box(story, label, value, styles, content_width):
+    """Append a simple bordered PDF field."""
+    from reportlab.lib import colors
+    from reportlab.platypus import Paragraph, Spacer, Table, TableStyle
+    from reportlab.lib.units import inch
+
+    table = Table(
+        [[Paragraph(f'<b>{escape(label)}:</b> {escape(value or "-")}', styles['BodyText'])]],
+        colWidths=[content_width]
+    )
+    table.setStyle(TableStyle([
+        ('BOX', (0, 0), (-1, -1), 1, colors.black),
+        ('LEFTPADDING', (0, 0), (-1, -1), 8),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+        ('TOPPADDING', (0, 0), (-1, -1), 6),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ]))
+    story.append(table)
+    story.append(Spacer(1, 0.08 * inch))
+
+
+def _program_table_rows(presentations, program_ids, presenter_map, day=None, include_meals=True):
+    """Return simple rows for the program PDF quick-view table."""
+    rows = []
+    for presentation in presentations:
+        presenters = presenter_map.get(presentation.id, [])
+        authors = ', '.join(_user_full_name(presenter) for presenter in presenters) or '-'
+        display_time = effective_presentation_time(presentation)
+        rows.append({
+            'sort_time': display_time or datetime.max,
+            'time': _format_time(display_time),
+            'id': program_ids.get(presentation.id, '-'),
+            'authors': authors,
+            'title': presentation.title or 'Untitled',
+        })
+
+    if include_meals:
+        meal_query = BlockSchedule.query.filter(BlockSchedule.is_presentation.is_(False))
+        if day:
+            meal_query = meal_query.filter(BlockSchedule.day == day)
+        for block in meal_query.all():
+            event_type = _meal_type_for_block(block)
+            if not event_type:
+                continue
+            rows.append({
+                'sort_time': block.start_time or datetime.max,
+                'time': _format_time(block.start_time),
+                'id': '',
+                'authors': event_type,
+                'title': block.title or event_type.title(),
+            })
+
+    rows.sort(key=lambda row: (row['sort_time'], row['id'], row['title']))
+    for row in rows:
+        row.pop('sort_time', None)
+    return rows
+
+
+def _append_program_table(story, styles, content_width, rows):
+    """Append the quick-view program table to the PDF."""
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, Spacer, Table, TableStyle
+
+    story.append(Paragraph('Program Quick View', styles['Heading1']))
+    story.append(Spacer(1, 0.12 * inch))
+
+    if not rows:
+        story.append(Paragraph('No program items available.', styles['BodyText']))
+        return
+
+    table_data = [[
+        Paragraph('<b>Time</b>', styles['Heading5']),
+        Paragraph('<b>ID</b>', styles['Heading5']),
+        Paragraph('<b>Student Author(s)</b>', styles['Heading5']),
+        Paragraph('<b>Title</b>', styles['Heading5']),
+    ]]
+
+    for row in rows:
+        table_data.append([
+            Paragraph(escape(row.get('time') or '-'), styles['BodyText']),
+            Paragraph(escape(row.get('id') or ''), styles['BodyText']),
+            Paragraph(escape(row.get('authors') or '-'), styles['BodyText']),
+            Paragraph(escape(row.get('title') or '-'), styles['BodyText']),
+        ])
+
+    table = Table(
+        table_data,
+        colWidths=[0.95 * inch, 0.75 * inch, 2.0 * inch, content_width - 3.7 * inch],
+        repeatRows=1,
+    )
+    table.setStyle(TableStyle([
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f2f2f2')),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('LEFTPADDING', (0, 0), (-1, -1), 5),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 5),
+        ('TOPPADDING', (0, 0), (-1, -1), 4),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+    ]))
+    story.append(table)
+
+
+def _append_program_entry(story, entry, styles, content_width, images):
+    """Append one presentation's "Program Entry" section."""
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, Spacer
+
+    story.append(Paragraph('Program Entry', styles['Heading1']))
+    story.append(Spacer(1, 0.08 * inch))
+    _append_box(story, 'Program ID', entry['program_id'], styles, content_width)
+    _append_box(story, 'Title', entry['title'], styles, content_width)
+    _append_box(story, 'Date/Time', entry['time'], styles, content_width)
+    _append_box(story, 'Author(s)', entry['authors'], styles, content_width)
+    _append_box(story, 'Department', entry['department'], styles, content_width)
+    _append_box(story, 'Mentor', entry['mentor'], styles, content_width)
+    _append_box(story, 'Keywords', entry['keywords'], styles, content_width)
+
+    story.append(Paragraph('<b>Abstract</b>', styles['Heading2']))
+    _append_abstract_to_pdf(story, entry['abstract'], styles, images)
+
+
+def program_variant(args):
+    """Return the (day, presentation type) a request asks for; either may be None."""
+    day = (args.get('day') or '').strip() or None
+    requested_type = (args.get('type') or '').strip()
+    presentation_type = None
+    if requested_type:
+        presentation_type = normalize_presentation_type(requested_type)
+        if not presentation_type:
+            raise ProgramVariantError(f"Unknown presentation type: {requested_type}")
+    return day, presentation_type
+
+
+def program_variant_name(day=None, presentation_type=None):
+    """Return a filesystem-safe name for a variant, e.g. 'day-day-1-type-poster'."""
+    parts = []
+    if day:
+        parts.append('day-' + (re.sub(r'[^a-z0-9]+', '-', day.lower()).strip('-') or 'unnamed'))
+    if presentation_type:
+        parts.append('type-' + presentation_type.lower())
+    return '-'.join(parts) or 'all'
+
+
+def program_document(day=None, presentation_type=None):
+    """
+    Collect everything the program PDF shows as plain data: quick-view rows and one
+    entry per presentation. Program ids are assigned over the whole program so a
+    day or type section matches the full printout.
+    """
+    all_presentations = _visible_presentations()
+    program_ids = _program_identifier_map(all_presentations)
+    presentations = [
+        presentation for presentation in all_presentations
+        if (not day or (presentation.schedule is not None and presentation.schedule.day == day))
+        and _type_matches(presentation, presentation_type)
+    ]
+    presenter_map = _presenters_by_presentation([presentation.id for presentation in presentations])
+
+    entries = []
+    for presentation in presentations:
+        presenters = presenter_map.get(presentation.id, [])
+        abstract = presentation.abstract or ''
+        entries.append({
+            'program_id': program_ids.get(presentation.id, '-'),
+            'title': presentation.title or 'Untitled',
+            'time': _format_time(effective_presentation_time(presentation)),
+            'authors': ', '.join(_user_full_name(presenter) for presenter in presenters) or '-',
+            'department': getattr(presentation, 'department', None) or '-',
+            'mentor': getattr(presentation, 'mentor', None) or '-',
+            'keywords': getattr(presentation, 'keywords', None) or '-',
+            'abstract': abstract,
+            'image_ids': [
+                image_id for image_id in (
+                    _image_id_from_url(match['url']) for match in _abstract_image_matches(abstract)
+                ) if image_id
+            ],
+        })
+
+    return {
+        'layout': PDF_LAYOUT_VERSION,
+        'day': day,
+        'type': presentation_type,
+        # Meals are part of the daily timeline, not of a single presentation type.
+        'rows': _program_table_rows(
+            presentations, program_ids, presenter_map, day=day, include_meals=not presentation_type),
+        'entries': entries,
+    }
+
+
+def program_document_key(document):
+    """Return the content hash a rendered document is cached under."""
+    encoded = json.dumps(document, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def _render_program_part(target, rows=None, entries=(), images=None):
+    """
+    Render the quick-view table (when `rows` is given) followed by program entries,
+    each on its own page, to a path or file object.
+    Works on plain data only, so it can run in a worker process.
+    """
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, PageBreak
+
+    doc = SimpleDocTemplate(
+        target,
+        pagesize=letter,
+        rightMargin=0.65 * inch,
+        leftMargin=0.65 * inch,
+        topMargin=0.65 * inch,
+        bottomMargin=0.65 * inch,
+    )
+    styles = getSampleStyleSheet()
+    content_width = CONTENT_WIDTH
+    story = []
+
+    if rows is not None:
+        _append_program_table(story, styles, content_width, rows)
+    for entry in entries:
+        if story:
+            story.append(PageBreak())
+        _append_program_entry(story, entry, styles, content_width, images or {})
+
+    doc.build(story)
+
+
+def _render_program_part_bytes(rows, entries, images):
+    """Worker entry point: render one part of the program and return its PDF bytes."""
+    buffer = io.BytesIO()
+    _render_program_part(buffer, rows, entries, images)
+    return buffer.getvalue()
+
+
+def _render_program_parts(document, path, images, workers, chunk_size):
+    """
+    Render the table and chunks of entries on a process pool and concatenate them.
+    Every entry starts a new page in the single-document layout too, so the merged
+    file has exactly the pages, in the same order, that a serial render produces.
+    """
+    from pypdf import PdfReader, PdfWriter
+
+    entries = document['entries']
+    chunks = [entries[start:start + chunk_size] for start in range(0, len(entries), chunk_size)]
+    # Spawned workers share no database connections or locks with this process.
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks) + 1), mp_context=context) as pool:
+        parts = [pool.submit(_render_program_part_bytes, document['rows'], (), None)]
+        for chunk in chunks:
+            chunk_images = {
+                image_id: images[image_id]
+                for entry in chunk for image_id in entry['image_ids'] if image_id in images
+            }
+            parts.append(pool.submit(_render_program_part_bytes, None, chunk, chunk_images))
+
+        writer = PdfWriter()
+        for part in parts:
+            writer.append(PdfReader(io.BytesIO(part.result())))
+    writer.write(path)
+
+
+def render_program_pdf(document, path):
+    """
+    Render a program document to a PDF file at `path`.
+    Programs longer than PROGRAM_PDF_CHUNK_SIZE entries render in parallel across
+    PROGRAM_PDF_WORKERS processes, never more than there are CPUs.
+    """
+    entries = document['entries']
+    images = _program_images(
+        image_id for entry in entries for image_id in entry['image_ids'])
+    workers = min(int(current_app.config.get('PROGRAM_PDF_WORKERS') or 1), os.cpu_count() or 1)
+    chunk_size = max(1, int(current_app.config.get('PROGRAM_PDF_CHUNK_SIZE') or 100))
+
+    if workers > 1 and len(entries) > chunk_size:
+        _render_program_parts(document, path, images, workers, chunk_size)
+    else:
+        _render_program_part(path, document['rows'], entries, images)
+
+
+def build_program_pdf(document, variant, key):
+    """
+    Render a document into the cache and return its path. The file only appears
+    under its final name once complete; older builds of the variant are removed.
+    """
+    directory = namespace_dir(PDF_NAMESPACE)
+    name = f'{variant}--{key}.pdf'
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        render_program_pdf(document, temp_path)
+        path = os.path.join(directory, name)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    for entry in os.listdir(directory):
+        if entry.startswith(f'{variant}--') and entry != name and not entry.endswith('.tmp'):
+            try:
+                os.remove(os.path.join(directory, entry))
+            except OSError:
+                pass
+    return path
+
+
+def _latest_build(variant):
+    """Return (path, key) of the newest cached build of a variant, or (None, None)."""
+    directory = os.path.join(offload_root(), PDF_NAMESPACE)
+    if not os.path.isdir(directory):
+        return None, None
+    prefix = f'{variant}--'
+    builds = [
+        os.path.join(directory, entry) for entry in os.listdir(directory)
+        if entry.startswith(prefix) and entry.endswith('.pdf')
+    ]
+    if not builds:
+        return None, None
+    path = max(builds, key=os.path.getmtime)
+    return path, os.path.basename(path)[len(prefix):-len('.pdf')]
+
+
+def _rebuild_program_pdf(day, presentation_type):
+    """Background job: render the current document for a variant unless already cached."""
+    document = program_document(day, presentation_type)
+    key = program_document_key(document)
+    variant = program_variant_name(day, presentation_type)
+    if offload_path(PDF_NAMESPACE, f'{variant}--{key}.pdf') is None:
+        build_program_pdf(document, variant, key)
+
+
+def schedule_program_pdf_build(day=None, presentation_type=None):
+    """Queue a background build; returns False where no builder is installed (e.g. tests)."""
+    builder = current_app.extensions.get(BUILDER_KEY)
+    if builder is None:
+        return False
+    variant = program_variant_name(day, presentation_type)
+    builder.schedule(variant, _rebuild_program_pdf, day, presentation_type)
+    return True
+
+
+def install_program_pdf_builder(app):
+    """Render changed program PDFs on a background thread instead of in the request."""
+    if app.config.get('TESTING', False):
+        return
+    app.extensions[BUILDER_KEY] = BackgroundJobs(app, 'program-pdf')
+
+
+def program_pdf_response(args):
+    """
+    Serve the program PDF for the variant in `args` from the content-hash cache.
+    A miss with an older build on disk serves that build marked stale and renders the
+    current one in the background; with nothing to fall back on it renders inline.
+    """
+    try:
+        day, presentation_type = program_variant(args)
+    except ProgramVariantError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    document = program_document(day, presentation_type)
+    key = program_document_key(document)
+    variant = program_variant_name(day, presentation_type)
+    path = offload_path(PDF_NAMESPACE, f'{variant}--{key}.pdf')
+    served_key, stale = key, False
+
+    if path is None:
+        previous_path, previous_key = _latest_build(variant)
+        if previous_path and schedule_program_pdf_build(day, presentation_type):
+            path, served_key, stale = previous_path, previous_key, True
+        else:
+            path = build_program_pdf(document, variant, key)
+
+    download_name = 'cusrr_program.pdf' if variant == 'all' else f'cusrr_program-{variant}.pdf'
+    response = send_offloaded_file(
+        path,
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=download_name,
+        etag=served_key,
+        conditional=True,
+        max_age=0,
+    )
+    response.headers['X-Program-Stale'] = 'true' if stale else 'false'
+    return response
@@ -2,15 +2,26 @@
 from datetime import datetime, timedelta
 
 from flask import Blueprint, current_app, jsonify, request
-from sqlalchemy import func, text
-from sqlalchemy.orm import joinedload, load_only
+from sqlalchemy import Integer, String, and_, column, func, literal, not_, or_, table, text
+from sqlalchemy.orm import joinedload, load_only, selectinload
 
 from website import db
+from website.invalidation import invalidate, invalidation_tag
 from website.models import BlockSchedule, Presentation, User
+from website.security import ROLE_ALIASES, _normalize_role
+from .utils import STREAM_CHUNK_SIZE, stream_json_array
 
 users_table_bp = Blueprint('users_table', __name__)
 presentations_table_bp = Blueprint('presentations_table', __name__)
 VALID_PRESENTATION_TYPES = {'Presentation', 'Blitz', 'Poster'}
+DEFAULT_TABLE_PAGE_LENGTH = 150
+SUBMISSION_STATUSES = {'both', 'abstract_only', 'presentation_only', 'neither', 'incomplete'}
+
+presentation_types_table = table(
+    'presentation_types',
+    column('presentation_id', Integer),
+    column('presentation_type', String),
+)
 
 
 def _clean_text(value):
@@ -100,6 +111,7 @@ def _set_presentation_type(presentation_id, value):
     """Persist per-presentation type. Empty/invalid values remove the override."""
     _ensure_presentation_type_table()
     normalized = _normalize_presentation_type(value)
+    invalidate(invalidation_tag('presentation', presentation_id))
     if not normalized:
         db.session.execute(
             text("DELETE FROM presentation_types WHERE presentation_id = :pid"),
@@ -121,6 +133,7 @@ def _set_presentation_type(presentation_id, value):
 def _set_show_on_schedule(presentation_id, value):
     """Persist whether a presentation should show on schedule/program pages."""
     _ensure_presentation_visibility_table()
+    invalidate(invalidation_tag('presentation', presentation_id))
     result = db.session.execute(
         text("UPDATE presentation_visibility SET show_on_schedule = :value WHERE presentation_id = :pid"),
         {"pid": presentation_id, "value": bool(value)}
@@ -132,15 +145,6 @@ def _set_show_on_schedule(presentation_id, value):
         )
 
 
-def _format_datetime(value):
-    """Format datetimes the same way the existing presentation API does."""
-    if not value:
-        return None
-    if isinstance(value, datetime):
-        return value.strftime('%Y-%m-%dT%H:%M:%S')
-    return str(value)
-
-
 def _effective_time(presentation):
     """Return the presentation's display time without loading heavy fields."""
     schedule = presentation.schedule
@@ -205,14 +209,241 @@ def _quick_presentation_response(presentation):
         'mentor': presentation.mentor,
         'keywords': presentation.keywords,
         'schedule_id': presentation.schedule_id,
-        'time': _format_datetime(presentation.time),
+        'time': presentation.time,
+    }
+
+
+def _user_table_row(row, type_by_id):
+    """Serialize one attendee table row."""
+    has_presentation = bool(row.presentation_id)
+    abstract_submitted = bool(row.abstract_submitted)
+    presentation_uploaded = bool(row.presentation_uploaded)
+    presentation_type = type_by_id.get(row.presentation_id) or _normalize_presentation_type(row.schedule_block_type)
+    name = f"{row.firstname} {row.lastname}".strip()
+
+    return {
+        'id': row.id,
+        'firstname': row.firstname,
+        'lastname': row.lastname,
+        'name': name,
+        'email': row.email,
+        'activity': row.activity,
+        'student_year': row.student_year,
+        'presentation': row.presentation_title,
+        'presentation_id': row.presentation_id,
+        'presentation_type': presentation_type,
+        'status': 'complete' if has_presentation else 'incomplete',
+        'abstract_submitted': abstract_submitted,
+        'abstract_status': 'complete' if abstract_submitted else 'incomplete',
+        'presentation_uploaded': presentation_uploaded,
+        'presentation_upload_status': 'complete' if presentation_uploaded else 'incomplete',
+        'submission_incomplete': has_presentation and (
+            not abstract_submitted or not presentation_uploaded
+        ),
+        'auth': row.auth,
+    }
+
+
+def _datatables_params():
+    """Parse DataTables server-side parameters, returning None when they are invalid."""
+    try:
+        draw = int(request.args.get('draw', 0))
+        start = int(request.args.get('start', 0))
+        length = int(request.args.get('length', DEFAULT_TABLE_PAGE_LENGTH))
+    except (TypeError, ValueError):
+        return None
+    if start < 0:
+        return None
+
+    order = []
+    index = 0
+    while f'order[{index}][column]' in request.args:
+        column_index = request.args.get(f'order[{index}][column]')
+        name = request.args.get(f'columns[{column_index}][data]')
+        descending = request.args.get(f'order[{index}][dir]', 'asc').lower() == 'desc'
+        if name:
+            order.append((name, descending))
+        index += 1
+
+    return {
+        'draw': draw,
+        'start': start,
+        # DataTables sends -1 for the "All" page length.
+        'length': length if length >= 0 else None,
+        'words': (request.args.get('search[value]') or '').lower().split(),
+        'order': order,
     }
 
 
+def _datatables_response(params, total, filtered, rows):
+    """Return one DataTables server-side page."""
+    return jsonify({
+        'draw': params['draw'],
+        'recordsTotal': total,
+        'recordsFiltered': filtered,
+        'data': rows,
+    })
+
+
+def _search_clause(words, columns, extra=None):
+    """Match DataTables smart search: every word must appear in some column."""
+    clauses = []
+    for word in words:
+        matches = [
+            func.lower(func.coalesce(col, '')).contains(word, autoescape=True)
+            for col in columns
+        ]
+        if extra is not None:
+            matches.extend(extra(word))
+        clauses.append(or_(*matches))
+    return and_(*clauses) if clauses else None
+
+
+def _presentation_type_expression():
+    """SQL for the effective presentation type: explicit override, else block type."""
+    return func.lower(func.trim(func.coalesce(
+        func.nullif(presentation_types_table.c.presentation_type, ''),
+        BlockSchedule.block_type,
+        '',
+    )))
+
+
+def _abstract_submitted_expression():
+    return func.length(func.trim(func.coalesce(Presentation.abstract, ''))) > 0
+
+
+def _presentation_uploaded_expression():
+    return Presentation.presentation_file.isnot(None)
+
+
+def _submission_status_clause(status):
+    """SQL filter for one of the submission statuses offered on the organizer pages."""
+    abstract = _abstract_submitted_expression()
+    uploaded = _presentation_uploaded_expression()
+    if status == 'both':
+        return and_(abstract, uploaded)
+    if status == 'abstract_only':
+        return and_(abstract, not_(uploaded))
+    if status == 'presentation_only':
+        return and_(uploaded, not_(abstract))
+    if status == 'neither':
+        return and_(not_(abstract), not_(uploaded))
+    return and_(Presentation.id.isnot(None), or_(not_(abstract), not_(uploaded)))
+
+
+def _role_list_expression():
+    """SQL for User.auth as ',role,role,' with roles normalized like security._normalize_role."""
+    roles = func.lower(func.coalesce(User.auth, ''))
+    for old, new in ((', ', ','), (' ,', ','), ('-', '_'), (' ', '_')):
+        roles = func.replace(roles, old, new)
+    return literal(',') + roles + literal(',')
+
+
+def _role_filter_clause(role):
+    """Match users holding `role` directly or through a ROLE_ALIASES alias, like security._roles_for."""
+    stored_roles = [role] + sorted(alias for alias, target in ROLE_ALIASES.items() if target == role)
+    roles = _role_list_expression()
+    return or_(*(roles.contains(f',{name},', autoescape=True) for name in stored_roles))
+
+
+def _table_filter_value(name):
+    """Return a lower-cased filter query param, treating 'all' as no filter."""
+    value = (request.args.get(name) or '').strip().lower()
+    return None if value in ('', 'all') else value
+
+
+def _user_sort_columns():
+    """SQL expressions for each orderable attendee table column."""
+    return {
+        'name': func.lower(func.trim(
+            func.coalesce(User.firstname, '') + literal(' ') + func.coalesce(User.lastname, '')
+        )),
+        'email': User.email,
+        'activity': User.activity,
+        'presentation_id': User.presentation_id,
+        'presentation_type': _presentation_type_expression(),
+        'abstract_submitted': _abstract_submitted_expression(),
+        'presentation_uploaded': _presentation_uploaded_expression(),
+        'auth': User.auth,
+    }
+
+
+def _users_table_page(type_by_id):
+    """Return one server-side DataTables page of attendee rows."""
+    params = _datatables_params()
+    if params is None:
+        return jsonify({'error': 'Invalid table parameters'}), 400
+
+    query = (
+        db.session.query(
+            User.id.label('id'),
+            User.firstname.label('firstname'),
+            User.lastname.label('lastname'),
+            User.email.label('email'),
+            User.activity.label('activity'),
+            User.auth.label('auth'),
+            User.student_year.label('student_year'),
+            User.presentation_id.label('presentation_id'),
+            Presentation.title.label('presentation_title'),
+            _abstract_submitted_expression().label('abstract_submitted'),
+            _presentation_uploaded_expression().label('presentation_uploaded'),
+            BlockSchedule.block_type.label('schedule_block_type'),
+        )
+        .outerjoin(Presentation, User.presentation_id == Presentation.id)
+        .outerjoin(BlockSchedule, Presentation.schedule_id == BlockSchedule.id)
+        .outerjoin(
+            presentation_types_table,
+            presentation_types_table.c.presentation_id == Presentation.id,
+        )
+    )
+
+    role = _table_filter_value('role')
+    if role:
+        query = query.filter(_role_filter_clause(_normalize_role(role)))
+    presentation_type = _table_filter_value('presentation_type')
+    if presentation_type:
+        query = query.filter(_presentation_type_expression() == presentation_type)
+    activity = _table_filter_value('activity')
+    if activity:
+        query = query.filter(func.lower(User.activity) == activity)
+    status = _table_filter_value('submission_status')
+    if status in SUBMISSION_STATUSES:
+        query = query.filter(_submission_status_clause(status))
+
+    search = _search_clause(params['words'], [
+        User.firstname, User.lastname, User.email, User.activity, User.auth, Presentation.title,
+    ])
+    if search is not None:
+        query = query.filter(search)
+
+    sort_columns = _user_sort_columns()
+    ordering = [
+        sort_columns[name].desc() if descending else sort_columns[name].asc()
+        for name, descending in params['order']
+        if name in sort_columns
+    ] or [User.email.asc()]
+    query = query.order_by(*ordering, User.id.asc())
+
+    filtered = query.order_by(None).count()
+    query = query.offset(params['start'])
+    if params['length'] is not None:
+        query = query.limit(params['length'])
+
+    return _datatables_response(
+        params,
+        db.session.query(func.count(User.id)).scalar(),
+        filtered,
+        [_user_table_row(row, type_by_id) for row in query],
+    )
+
+
 @users_table_bp.route('/table', methods=['GET'])
 def get_users_table():
-    """Return lightweight attendee table rows without loading abstracts/files."""
+    """Return lightweight attendee table rows without loading abstracts/files.
+    Requests carrying DataTables' `draw` param get one server-side page instead."""
     type_by_id = _presentation_type_overrides()
+    if 'draw' in request.args:
+        return _users_table_page(type_by_id)
 
     rows = (
         db.session.query(
@@ -225,54 +456,75 @@ def get_users_table():
             User.student_year.label('student_year'),
             User.presentation_id.label('presentation_id'),
             Presentation.title.label('presentation_title'),
-            (func.length(func.trim(func.coalesce(Presentation.abstract, ''))) > 0).label('abstract_submitted'),
-            Presentation.presentation_file.isnot(None).label('presentation_uploaded'),
+            _abstract_submitted_expression().label('abstract_submitted'),
+            _presentation_uploaded_expression().label('presentation_uploaded'),
             BlockSchedule.block_type.label('schedule_block_type'),
         )
         .outerjoin(Presentation, User.presentation_id == Presentation.id)
         .outerjoin(BlockSchedule, Presentation.schedule_id == BlockSchedule.id)
         .order_by(User.email.asc())
-        .all()
+        .yield_per(STREAM_CHUNK_SIZE)
     )
 
-    data = []
-    for row in rows:
-        has_presentation = bool(row.presentation_id)
-        abstract_submitted = bool(row.abstract_submitted)
-        presentation_uploaded = bool(row.presentation_uploaded)
-        presentation_type = type_by_id.get(row.presentation_id) or _normalize_presentation_type(row.schedule_block_type)
-        name = f"{row.firstname} {row.lastname}".strip()
-
-        data.append({
-            'id': row.id,
-            'firstname': row.firstname,
-            'lastname': row.lastname,
-            'name': name,
-            'email': row.email,
-            'activity': row.activity,
-            'student_year': row.student_year,
-            'presentation': row.presentation_title,
-            'presentation_id': row.presentation_id,
-            'presentation_type': presentation_type,
-            'status': 'complete' if has_presentation else 'incomplete',
-            'abstract_submitted': abstract_submitted,
-            'abstract_status': 'complete' if abstract_submitted else 'incomplete',
-            'presentation_uploaded': presentation_uploaded,
-            'presentation_upload_status': 'complete' if presentation_uploaded else 'incomplete',
-            'submission_incomplete': has_presentation and (
-                not abstract_submitted or not presentation_uploaded
+    return stream_json_array(_user_table_row(row, type_by_id) for row in rows)
+
+
+def _identifier_presentations():
+    """Load only the columns needed to assign program identifiers to every presentation."""
+    return (
+        Presentation.query
+        .options(
+            load_only(
+                Presentation.id,
+                Presentation.time,
+                Presentation.num_in_block,
+                Presentation.schedule_id,
             ),
-            'auth': row.auth,
-        })
+            joinedload(Presentation.schedule).load_only(
+                BlockSchedule.id,
+                BlockSchedule.block_type,
+                BlockSchedule.start_time,
+                BlockSchedule.sub_length,
+            ),
+        )
+        .all()
+    )
 
-    return jsonify(data), 200
 
+def _presentation_table_row(presentation, type_by_id, identifiers):
+    """Serialize one organizer presentation table row."""
+    schedule = presentation.schedule
+    presentation_type = type_by_id.get(presentation.id)
+    if not presentation_type and schedule:
+        presentation_type = _normalize_presentation_type(schedule.block_type)
 
-@presentations_table_bp.route('/table', methods=['GET'])
-def get_presentations_table():
-    """Return lightweight presentation table rows without full abstracts/files."""
-    type_by_id = _presentation_type_overrides()
-    presentations = (
+    return {
+        'id': presentation.id,
+        'program_identifier': identifiers.get(presentation.id),
+        'title': presentation.title,
+        'department': presentation.department,
+        'mentor': presentation.mentor,
+        'keywords': presentation.keywords,
+        'type': presentation_type,
+        'schedule_title': schedule.title if schedule else None,
+        'schedule_id': presentation.schedule_id,
+        'time': _effective_time(presentation),
+        'presenters': [
+            {
+                'id': presenter.id,
+                'firstname': presenter.firstname,
+                'lastname': presenter.lastname,
+                'email': presenter.email,
+                'name': _user_full_name(presenter),
+            }
+            for presenter in presentation.presenters
+        ],
+    }
+
+
+def _presentation_table_query():
+    """Presentation query loading only the columns the organizer table shows."""
+    return (
         Presentation.query
         .options(
             load_only(
@@ -292,49 +544,135 @@ def get_presentations_table():
                 BlockSchedule.start_time,
                 BlockSchedule.sub_length,
             ),
-            joinedload(Presentation.presenters).load_only(
+            selectinload(Presentation.presenters).load_only(
                 User.id,
                 User.firstname,
                 User.lastname,
                 User.email,
             ),
         )
+        .populate_existing()
+    )
+
+
+def _identifier_sort_key(identifier):
+    """Sort program identifiers by prefix, then numerically (poster-2 before poster-10)."""
+    prefix, _, number = (identifier or '').rpartition('-')
+    return (prefix, int(number) if number.isdigit() else 0)
+
+
+def _presentations_table_page(type_by_id):
+    """Return one server-side DataTables page of presentation rows."""
+    params = _datatables_params()
+    if params is None:
+        return jsonify({'error': 'Invalid table parameters'}), 400
+
+    identifier_presentations = _identifier_presentations()
+    identifiers = _program_identifier_map(identifier_presentations, type_by_id)
+
+    query = (
+        db.session.query(Presentation.id)
+        .outerjoin(BlockSchedule, Presentation.schedule_id == BlockSchedule.id)
+        .outerjoin(
+            presentation_types_table,
+            presentation_types_table.c.presentation_id == Presentation.id,
+        )
+    )
+
+    presentation_type = _table_filter_value('type')
+    if presentation_type:
+        query = query.filter(_presentation_type_expression() == presentation_type)
+    status = _table_filter_value('submission_status')
+    if status in SUBMISSION_STATUSES:
+        query = query.filter(_submission_status_clause(status))
+
+    def presenter_and_identifier_matches(word):
+        matching_ids = [pid for pid, identifier in identifiers.items() if word in identifier]
+        return [
+            Presentation.presenters.any(or_(
+                func.lower(func.coalesce(User.firstname, '')).contains(word, autoescape=True),
+                func.lower(func.coalesce(User.lastname, '')).contains(word, autoescape=True),
+                func.lower(func.coalesce(User.email, '')).contains(word, autoescape=True),
+            )),
+            Presentation.id.in_(matching_ids),
+        ]
+
+    search = _search_clause(params['words'], [
+        Presentation.title,
+        Presentation.department,
+        Presentation.mentor,
+        Presentation.keywords,
+        BlockSchedule.title,
+    ], extra=presenter_and_identifier_matches)
+    if search is not None:
+        query = query.filter(search)
+
+    start, length = params['start'], params['length']
+    stop = start + length if length is not None else None
+    primary = params['order'][0] if params['order'] else ('program_identifier', False)
+
+    if primary[0] in ('program_identifier', 'time'):
+        # Identifiers and display times are derived in Python, so order the matching ids here.
+        by_id = {presentation.id: presentation for presentation in identifier_presentations}
+        matching_ids = [row.id for row in query]
+        if primary[0] == 'time':
+            matching_ids.sort(key=lambda pid: _program_sort_key(by_id[pid]), reverse=primary[1])
+        else:
+            matching_ids.sort(key=lambda pid: _identifier_sort_key(identifiers.get(pid)), reverse=primary[1])
+        filtered = len(matching_ids)
+        page_ids = matching_ids[start:stop]
+    else:
+        sort_columns = {
+            'title': Presentation.title,
+            'department': Presentation.department,
+            'mentor': Presentation.mentor,
+            'keywords': Presentation.keywords,
+            'type': _presentation_type_expression(),
+            'schedule_title': BlockSchedule.title,
+        }
+        ordering = [
+            sort_columns[name].desc() if descending else sort_columns[name].asc()
+            for name, descending in params['order']
+            if name in sort_columns
+        ]
+        filtered = query.count()
+        query = query.order_by(*ordering, Presentation.id.asc()).offset(start)
+        if length is not None:
+            query = query.limit(length)
+        page_ids = [row.id for row in query]
+
+    by_id = {
+        presentation.id: presentation
+        for presentation in _presentation_table_query().filter(Presentation.id.in_(page_ids))
+    } if page_ids else {}
+
+    return _datatables_response(
+        params,
+        db.session.query(func.count(Presentation.id)).scalar(),
+        filtered,
+        [_presentation_table_row(by_id[pid], type_by_id, identifiers) for pid in page_ids],
+    )
+
+
+@presentations_table_bp.route('/table', methods=['GET'])
+def get_presentations_table():
+    """Return lightweight presentation table rows without full abstracts/files.
+    Requests carrying DataTables' `draw` param get one server-side page instead."""
+    type_by_id = _presentation_type_overrides()
+    if 'draw' in request.args:
+        return _presentations_table_page(type_by_id)
+    identifiers = _program_identifier_map(_identifier_presentations(), type_by_id)
+
+    presentations = (
+        _presentation_table_query()
         .order_by(Presentation.id.asc())
-        .all()
+        .yield_per(STREAM_CHUNK_SIZE)
+    )
+
+    return stream_json_array(
+        _presentation_table_row(presentation, type_by_id, identifiers)
+        for presentation in presentations
     )
-    identifiers = _program_identifier_map(presentations, type_by_id)
-
-    data = []
-    for presentation in presentations:
-        schedule = presentation.schedule
-        presentation_type = type_by_id.get(presentation.id)
-        if not presentation_type and schedule:
-            presentation_type = _normalize_presentation_type(schedule.block_type)
-
-        data.append({
-            'id': presentation.id,
-            'program_identifier': identifiers.get(presentation.id),
-            'title': presentation.title,
-            'department': presentation.department,
-            'mentor': presentation.mentor,
-            'keywords': presentation.keywords,
-            'type': presentation_type,
-            'schedule_title': schedule.title if schedule else None,
-            'schedule_id': presentation.schedule_id,
-            'time': _format_datetime(_effective_time(presentation)),
-            'presenters': [
-                {
-                    'id': presenter.id,
-                    'firstname': presenter.firstname,
-                    'lastname': presenter.lastname,
-                    'email': presenter.email,
-                    'name': _user_full_name(presenter),
-                }
-                for presenter in presentation.presenters
-            ],
-        })
-
-    return jsonify(data), 200
 
 
 @presentations_table_bp.route('/<int:presentation_id>/quick-update', methods=['PUT'])
@@ -0,0 +1,313 @@
+"""
+Chunked handling of multipart uploads.
+Uploads are walked in fixed-size chunks while hashing, so size limits and
+content sniffing are applied before a file is ever held in memory as a whole.
+"""
+import fcntl
+import hashlib
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import inspect, text
+
+from website import db
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+SPOOL_MEMORY_BYTES = 1024 * 1024
+# Room for multipart boundaries and headers on top of the file itself.
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+PRESENTATION_UPLOAD_MAX_BYTES = 20 * 1024 * 1024
+ABSTRACT_IMAGE_MAX_BYTES = 10 * 1024 * 1024
+# Largest single PATCH a resumable upload session accepts.
+RESUMABLE_CHUNK_MAX_BYTES = 8 * 1024 * 1024
+RESUMABLE_SESSION_TTL = timedelta(days=1)
+UPLOAD_SESSIONS_READY_KEY = 'upload_sessions_ready'
+
+IMAGE_MIME_TYPES = {
+    'png': 'image/png',
+    'jpeg': 'image/jpeg',
+    'gif': 'image/gif',
+    'webp': 'image/webp',
+    'svg': 'image/svg+xml',
+}
+
+
+class UploadError(ValueError):
+    """An upload was rejected; the message is safe to show to the client."""
+
+
+class UploadConflict(UploadError):
+    """A resumable chunk did not start at the session's current offset."""
+
+
+class SpooledUpload:
+    """A validated upload held in a seekable spool, with its size, sha256 and sniffed kind."""
+
+    def __init__(self, stream, size, sha256, kind):
+        self.stream = stream
+        self.size = size
+        self.sha256 = sha256
+        self.kind = kind
+
+    def read(self):
+        """Return the full upload; only call once every check has passed."""
+        self.stream.seek(0)
+        return self.stream.read()
+
+
+def sniff_presentation(head):
+    """Return 'pdf', 'pptx' or 'ppt' from a file's leading bytes, or None."""
+    if head.startswith(b'%PDF'):
+        return 'pdf'
+    if head.startswith(b'PK\x03\x04'):
+        return 'pptx'
+    if head.startswith(b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'):
+        return 'ppt'
+    return None
+
+
+def sniff_image(head):
+    """Return an IMAGE_MIME_TYPES key from a file's leading bytes, or None."""
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    text_head = head.lstrip(b'\xef\xbb\xbf \t\r\n').lower()
+    if text_head.startswith(b'<') and b'<svg' in text_head:
+        return 'svg'
+    return None
+
+
+def _is_seekable(stream):
+    try:
+        return stream.seekable()
+    except AttributeError:
+        return False
+
+
+def spool_upload(source, max_bytes, sniff, too_large_message, invalid_type_message):
+    """
+    Walk an uploaded stream in chunks, sniffing the first chunk and hashing as it goes.
+    Raises UploadError as soon as the type is wrong or the limit is crossed.
+    Werkzeug has already spooled large parts to a temporary file, which is reused
+    when seekable (as are staged resumable uploads); anything else is copied into a spool here.
+    """
+    if _is_seekable(source):
+        spool = source
+    else:
+        spool = tempfile.SpooledTemporaryFile(
+            max_size=SPOOL_MEMORY_BYTES,
+            dir=current_app.config.get('UPLOAD_SPOOL_DIR'),
+        )
+
+    digest = hashlib.sha256()
+    size = 0
+    kind = None
+    try:
+        while True:
+            chunk = source.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            if kind is None:
+                kind = sniff(chunk)
+                if kind is None:
+                    raise UploadError(invalid_type_message)
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadError(too_large_message)
+            digest.update(chunk)
+            if spool is not source:
+                spool.write(chunk)
+    except UploadError:
+        if spool is not source:
+            spool.close()
+        raise
+
+    if kind is None:
+        raise UploadError(invalid_type_message)
+    return SpooledUpload(spool, size, digest.hexdigest(), kind)
+
+
+def ensure_upload_session_table():
+    """Create the table tracking resumable presentation upload sessions once per app."""
+    if current_app.extensions.get(UPLOAD_SESSIONS_READY_KEY):
+        return
+    with db.engine.begin() as conn:
+        conn.execute(text(
+            """
+            CREATE TABLE IF NOT EXISTS presentation_upload_sessions (
+                id VARCHAR(64) PRIMARY KEY,
+                presentation_id INTEGER NOT NULL,
+                filename VARCHAR(255) NOT NULL,
+                total_size INTEGER NOT NULL,
+                received INTEGER NOT NULL DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        ))
+    columns = {column['name'] for column in inspect(db.engine).get_columns('presentation_upload_sessions')}
+    if 'received' not in columns:
+        with db.engine.begin() as conn:
+            conn.execute(text(
+                "ALTER TABLE presentation_upload_sessions ADD COLUMN received INTEGER NOT NULL DEFAULT 0"
+            ))
+    current_app.extensions[UPLOAD_SESSIONS_READY_KEY] = True
+
+
+def _staging_dir():
+    directory = current_app.config.get('UPLOAD_STAGING_DIR') or os.path.join(
+        current_app.instance_path, 'upload-staging')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def staged_path(session_id):
+    """Path of the on-disk staging file for a resumable upload session."""
+    return os.path.join(_staging_dir(), f'{session_id}.part')
+
+
+def create_upload_session(presentation_id, filename, total_size):
+    """Start a resumable upload session with an empty staging file and return its id."""
+    ensure_upload_session_table()
+    purge_stale_upload_sessions()
+    session_id = uuid.uuid4().hex
+    with open(staged_path(session_id), 'wb'):
+        pass
+    db.session.execute(
+        text("""
+            INSERT INTO presentation_upload_sessions (id, presentation_id, filename, total_size)
+            VALUES (:id, :pid, :filename, :total_size)
+        """),
+        {"id": session_id, "pid": presentation_id, "filename": filename, "total_size": total_size}
+    )
+    db.session.commit()
+    return session_id
+
+
+def get_upload_session(presentation_id, session_id):
+    """Return (filename, total_size, received) for a session on this presentation, or None."""
+    ensure_upload_session_table()
+    row = db.session.execute(
+        text("""
+            SELECT filename, total_size, received FROM presentation_upload_sessions
+            WHERE id = :id AND presentation_id = :pid
+        """),
+        {"id": session_id, "pid": presentation_id}
+    ).fetchone()
+    return tuple(row) if row else None
+
+
+def _set_received(session_id, expected, received):
+    """Move a session's offset from `expected` to `received`; False when it was not at `expected`."""
+    updated = db.session.execute(
+        text("""
+            UPDATE presentation_upload_sessions SET received = :received
+            WHERE id = :id AND received = :expected
+        """),
+        {"id": session_id, "expected": expected, "received": received}
+    )
+    db.session.commit()
+    return updated.rowcount == 1
+
+
+def _received(session_id):
+    return db.session.execute(
+        text("SELECT received FROM presentation_upload_sessions WHERE id = :id"),
+        {"id": session_id}
+    ).scalar()
+
+
+@contextmanager
+def locked_staged_file(session_id):
+    """
+    Yield a session's staged file under an exclusive lock, so one request at a time
+    writes or reads it. Raises UploadConflict when another request holds the lock;
+    the kernel drops the lock of a worker that dies, so nothing has to release it.
+    """
+    with open(staged_path(session_id), 'r+b') as staged:
+        try:
+            fcntl.flock(staged, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError as error:
+            raise UploadConflict("Another chunk is being written") from error
+        try:
+            yield staged
+        finally:
+            fcntl.flock(staged, fcntl.LOCK_UN)
+
+
+def _write_chunk(staged, stream, offset, end):
+    written = offset
+    staged.seek(offset)
+    while True:
+        chunk = stream.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        if written == 0 and sniff_presentation(chunk) is None:
+            raise UploadError("Invalid file type. Upload a PPT, PPTX, or PDF file.")
+        if written + len(chunk) > end:
+            raise UploadError("Chunk is longer than its Content-Length")
+        staged.write(chunk)
+        written += len(chunk)
+    if written != end:
+        raise UploadError("Chunk is shorter than its Content-Length")
+    # Drop bytes left past this chunk by an earlier, abandoned attempt.
+    staged.truncate(end)
+    staged.flush()
+    os.fsync(staged.fileno())
+
+
+def append_upload_chunk(session_id, stream, offset, length, total_size):
+    """
+    Write `length` bytes of a request body at `offset` and return the new offset.
+    Writers are serialized by a lock on the staged file, and the session's offset
+    only moves once the bytes are on disk, so a worker killed mid-chunk leaves the
+    offset where that chunk started and the client resends it. A chunk that does
+    not start at the session's offset, or past the bytes actually staged, gets
+    UploadConflict. The first chunk is sniffed so a wrong file type fails before
+    any more is sent.
+    """
+    end = offset + length
+    if end > total_size:
+        raise UploadError("Chunk runs past the declared upload size")
+    with locked_staged_file(session_id) as staged:
+        if offset != _received(session_id) or offset > os.fstat(staged.fileno()).st_size:
+            raise UploadConflict("Offset mismatch")
+        _write_chunk(staged, stream, offset, end)
+        if not _set_received(session_id, offset, end):
+            raise UploadConflict("Offset mismatch")
+    return end
+
+
+def delete_upload_session(session_id):
+    """Remove a session row and its staged bytes."""
+    db.session.execute(
+        text("DELETE FROM presentation_upload_sessions WHERE id = :id"),
+        {"id": session_id}
+    )
+    db.session.commit()
+    try:
+        os.remove(staged_path(session_id))
+    except OSError:
+        pass
+
+
+def purge_stale_upload_sessions():
+    """Drop sessions abandoned for longer than RESUMABLE_SESSION_TTL."""
+    cutoff = datetime.utcnow() - RESUMABLE_SESSION_TTL
+    stale_ids = [
+        row[0] for row in db.session.execute(
+            text("SELECT id FROM presentation_upload_sessions WHERE created_at < :cutoff"),
+            {"cutoff": cutoff}
+        )
+    ]
+    for session_id in stale_ids:
+        delete_upload_session(session_id)
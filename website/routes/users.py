@@ -9,6 +9,7 @@ from sqlalchemy import func, inspect, text
 from sqlalchemy.exc import IntegrityError
 from website.models import Presentation, User
 from website import db
+from .utils import keyset_page, pagination_requested
 
 users_bp = Blueprint('users', __name__)
 ROLE_ALIASES = {
@@ -557,7 +558,10 @@ def _can_assign_presentation(user, presentation_id):
 
 @users_bp.route('/', methods=['GET'])
 def get_users():
-    """GET all users"""
+    """GET all users, or one keyset page when `limit`/`after` is given"""
+    if pagination_requested():
+        return keyset_page(User.query, User.id, lambda rows: [_user_to_dict(u) for u in rows])
+
     users = User.query.all()
     return jsonify([_user_to_dict(u) for u in users]), 200
 
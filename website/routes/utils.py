@@ -1,10 +1,16 @@
 '''Collection of utility functions for the website routes.
 '''
+from urllib.parse import urlencode
 
-from flask import jsonify
+from flask import Response, current_app, jsonify, request, stream_with_context
 from website.models import Presentation
 from website import db
 
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 500
+STREAM_CHUNK_SIZE = 200
+STREAM_BUFFER_BYTES = 64 * 1024
+
 
 def format_average_grades(averages):
     ''' Format average grades with presentation titles '''
@@ -19,3 +25,79 @@ def format_average_grades(averages):
             "num_grades": avg.num_grades
         })
     return jsonify(results)
+
+
+def request_key(path, args):
+    ''' Return a cache key for a path and its query arguments, ignoring argument order '''
+    query = urlencode(sorted(args.items(multi=True)))
+    return f'{path}?{query}' if query else path
+
+
+def pagination_requested():
+    ''' Return whether the client asked for a keyset-paginated list.
+    Requests without `limit` or `after` keep the original full-list response
+    so existing pages do not need to change. '''
+    return 'limit' in request.args or 'after' in request.args
+
+
+def _page_params():
+    ''' Parse `limit` and `after` query params, returning (limit, after) or None '''
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_LIMIT))
+        after_raw = request.args.get('after')
+        after = int(after_raw) if after_raw not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+    if limit < 1:
+        return None
+    return min(limit, MAX_PAGE_LIMIT), after
+
+
+def keyset_page(query, key_column, serialize_rows):
+    ''' Return one page of `query` ordered by an integer key column.
+    The response carries a `next` cursor to pass back as `after`, or None on the last page.
+    `serialize_rows` receives the list of rows for the page so callers can batch lookups. '''
+    params = _page_params()
+    if params is None:
+        return jsonify({"error": "Invalid pagination parameters"}), 400
+    limit, after = params
+
+    if after is not None:
+        query = query.filter(key_column > after)
+    rows = query.order_by(None).order_by(key_column.asc()).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return jsonify({
+        "results": serialize_rows(rows),
+        "limit": limit,
+        "next": getattr(rows[-1], key_column.key) if has_more else None,
+    })
+
+
+def stream_json_array(items, status=200):
+    ''' Stream an iterable of JSON-ready rows as a single JSON array response.
+    Rows are encoded one at a time and flushed in ~64KB chunks, so neither the
+    full list nor the full encoded body is held in memory. The bytes match what
+    `jsonify(list(items))` would have produced. '''
+    encode = current_app.json.dumps
+
+    def generate():
+        buffer = ['[']
+        buffered = 1
+        first = True
+        for item in items:
+            piece = encode(item, separators=(',', ':'))
+            if not first:
+                piece = ',' + piece
+            first = False
+            buffer.append(piece)
+            buffered += len(piece)
+            if buffered >= STREAM_BUFFER_BYTES:
+                yield ''.join(buffer)
+                buffer = []
+                buffered = 0
+        buffer.append(']\n')
+        yield ''.join(buffer)
+
+    return Response(stream_with_context(generate()), status=status, mimetype='application/json')
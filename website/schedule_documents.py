@@ -0,0 +1,304 @@
+"""
+Materialized per-day schedule documents.
+The schedule page's /day/<day>/full payload is kept in schedule_documents, one row
+per day, already serialized and gzip-compressed, so serving it is one primary-key
+read shared by every worker and surviving restarts.
+
+Documents are rebuilt inside the transaction that changes their inputs: the
+invalidation bus hands over the commit's tags, the days they touch are rebuilt, and
+so is any other day whose program numbering moved (numbering runs across days). A
+day without a stored document, e.g. in a database written before this table existed,
+is built on its first read; so is one built under another SCHEDULE_DOCUMENT_VERSION.
+
+/full joins every public day's stored bytes into one response without re-encoding
+them; its ETag is derived from the day ETags, so revalidation reads no bodies.
+"""
+import gzip
+import hashlib
+import json
+from collections import namedtuple
+from datetime import datetime
+
+from flask import current_app, request
+from sqlalchemy import bindparam, inspect, text
+from sqlalchemy.exc import IntegrityError
+
+from website import db
+from website.invalidation import BUS_KEY, WILDCARD
+from website.json_provider import COMPACT_SEPARATORS
+from website.models import BlockSchedule, Presentation
+from website.routes.abstract_images import _binary_type
+from website.routes.block_schedule import _schedule_identifiers, _schedule_payload_for_day
+
+READY_KEY = 'schedule_documents_ready'
+# Bump whenever the payload shape changes; rows built under another version are rebuilt.
+SCHEDULE_DOCUMENT_VERSION = 1
+# Schedule days the public pages do not list.
+HIDDEN_DAYS = ('Unassigned',)
+GZIP_LEVEL = 9
+# Kinds of invalidation tag that can change a schedule document.
+SCHEDULE_TAG_KINDS = ('presentation', 'block')
+
+ScheduleDocument = namedtuple('ScheduleDocument', 'body gzip_body etag')
+
+
+def _create_table_sql():
+    binary_type = _binary_type(db.engine.dialect.name)
+    return text(f"""
+        CREATE TABLE IF NOT EXISTS schedule_documents (
+            day VARCHAR(255) PRIMARY KEY,
+            body {binary_type} NOT NULL,
+            gzip_body {binary_type} NOT NULL,
+            etag VARCHAR(64) NOT NULL,
+            identifiers_digest VARCHAR(64) NOT NULL,
+            document_version INTEGER NOT NULL DEFAULT 0,
+            built_at TIMESTAMP NOT NULL
+        )
+    """)
+
+
+def _add_version_column(conn):
+    columns = {column['name'] for column in inspect(conn).get_columns('schedule_documents')}
+    if 'document_version' not in columns:
+        conn.execute(text(
+            "ALTER TABLE schedule_documents ADD COLUMN document_version INTEGER NOT NULL DEFAULT 0"
+        ))
+
+
+def ensure_schedule_documents_table():
+    """Create the schedule document table once per app."""
+    if current_app.extensions.get(READY_KEY):
+        return
+    with db.engine.begin() as conn:
+        conn.execute(_create_table_sql())
+        _add_version_column(conn)
+    current_app.extensions[READY_KEY] = True
+
+
+def _serialize(payload):
+    """Encode a payload to the exact bytes `jsonify` would send."""
+    return f"{current_app.json.dumps(payload, separators=COMPACT_SEPARATORS)}\n".encode('utf-8')
+
+
+def _identifiers_digest(program_ids):
+    encoded = json.dumps(sorted(program_ids.items()), separators=COMPACT_SEPARATORS)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def _store_document(session, day, payload, digest, exists):
+    """Write one day's document, or drop it once the day has no blocks left."""
+    if not payload["blocks"]:
+        if exists:
+            session.execute(text("DELETE FROM schedule_documents WHERE day = :day"), {"day": day})
+        return
+
+    body = _serialize(payload)
+    params = {
+        "day": day,
+        "body": body,
+        "gzip_body": gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0),
+        "etag": hashlib.sha256(body).hexdigest()[:32],
+        "digest": digest,
+        "version": SCHEDULE_DOCUMENT_VERSION,
+        "built_at": datetime.utcnow(),
+    }
+    if exists:
+        session.execute(text("""
+            UPDATE schedule_documents
+            SET body = :body, gzip_body = :gzip_body, etag = :etag,
+                identifiers_digest = :digest, document_version = :version, built_at = :built_at
+            WHERE day = :day
+        """), params)
+    else:
+        session.execute(text("""
+            INSERT INTO schedule_documents
+                (day, body, gzip_body, etag, identifiers_digest, document_version, built_at)
+            VALUES (:day, :body, :gzip_body, :etag, :digest, :version, :built_at)
+        """), params)
+
+
+def _ensure_table_in(session):
+    """Create the table through the session's own transaction, once per app."""
+    if not current_app.extensions.get(READY_KEY):
+        session.execute(_create_table_sql())
+        _add_version_column(session.connection())
+        current_app.extensions[READY_KEY] = True
+
+
+def _days_with_blocks(session, days=None):
+    query = session.query(BlockSchedule.day).distinct()
+    if days is not None:
+        query = query.filter(BlockSchedule.day.in_(days))
+    return {day for (day,) in query}
+
+
+def rebuild_schedule_documents(session, days=None):
+    """
+    Rebuild the documents for `days` (every day when None) in the session's
+    transaction, plus any stored day built with different program numbering or
+    under another SCHEDULE_DOCUMENT_VERSION.
+    Days with neither blocks nor a stored document are skipped, and when none are
+    left the conference-wide numbering is not computed at all.
+    Returns the days that were rebuilt.
+    """
+    _ensure_table_in(session)
+    # Rows from another document version count as built with unknown numbering.
+    stored = {
+        day: stored_digest if version == SCHEDULE_DOCUMENT_VERSION else None
+        for day, stored_digest, version in session.execute(
+            text("SELECT day, identifiers_digest, document_version FROM schedule_documents"))
+    }
+    if days is None:
+        targets = _days_with_blocks(session) | set(stored)
+    else:
+        days = set(days)
+        targets = (days & set(stored)) | (_days_with_blocks(session, days) if days else set())
+    if not targets:
+        return []
+
+    identifiers = _schedule_identifiers()
+    digest = _identifiers_digest(identifiers[0])
+    targets |= {day for day, stored_digest in stored.items() if stored_digest != digest}
+    for day in sorted(targets):
+        _store_document(session, day, _schedule_payload_for_day(day, identifiers), digest, day in stored)
+    return sorted(targets)
+
+
+def _days_for_tags(session, tags):
+    """Return the days a commit's tags touch, or None when every day may have changed."""
+    days, presentation_ids = set(), set()
+    for tag in tags:
+        kind, _, value = tag.partition(':')
+        if kind in SCHEDULE_TAG_KINDS and value == WILDCARD:
+            return None
+        if kind == 'block':
+            days.add(value)
+        elif kind == 'presentation':
+            presentation_ids.add(int(value))
+    if presentation_ids:
+        days.update(
+            day for (day,) in session.query(BlockSchedule.day)
+            .join(Presentation, Presentation.schedule_id == BlockSchedule.id)
+            .filter(Presentation.id.in_(presentation_ids))
+            .distinct()
+        )
+    return days
+
+
+def _rebuild_for_commit(session, tags):
+    # Tags for users alone (role or login changes) never reach a schedule payload.
+    if not any(tag.partition(':')[0] in SCHEDULE_TAG_KINDS for tag in tags):
+        return
+    rebuild_schedule_documents(session, _days_for_tags(session, tags))
+
+
+def _select_document(day):
+    row = db.session.execute(
+        text("""
+            SELECT body, gzip_body, etag FROM schedule_documents
+            WHERE day = :day AND document_version = :version
+        """),
+        {"day": day, "version": SCHEDULE_DOCUMENT_VERSION},
+    ).fetchone()
+    if row is None:
+        return None
+    return ScheduleDocument(bytes(row[0]), bytes(row[1]), row[2])
+
+
+def schedule_document(day):
+    """Return the stored document for a day, building it on a miss."""
+    ensure_schedule_documents_table()
+    document = _select_document(day)
+    if document is not None:
+        return document
+
+    # Days without blocks are not stored; answering them needs no rebuild or commit.
+    if _days_with_blocks(db.session, {day}):
+        try:
+            rebuild_schedule_documents(db.session, {day})
+            db.session.commit()
+        except IntegrityError:
+            # Another worker stored it first.
+            db.session.rollback()
+        document = _select_document(day)
+        if document is not None:
+            return document
+
+    body = _serialize(_schedule_payload_for_day(day))
+    return ScheduleDocument(body, None, hashlib.sha256(body).hexdigest()[:32])
+
+
+def public_schedule_days():
+    """Return the public schedule days in the order /days lists them."""
+    days = db.session.query(BlockSchedule.day).distinct().filter(BlockSchedule.day.notin_(HIDDEN_DAYS)).all()
+    return [day[0] for day in days]
+
+
+def _current_etags():
+    return dict(db.session.execute(
+        text("SELECT day, etag FROM schedule_documents WHERE document_version = :version"),
+        {"version": SCHEDULE_DOCUMENT_VERSION},
+    ).fetchall())
+
+
+def _document_etags(days):
+    etags = _current_etags()
+    missing = [day for day in days if day not in etags]
+    if missing:
+        try:
+            # One pass computes the conference's program identifiers for every missing day.
+            rebuild_schedule_documents(db.session, set(missing))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+        etags = _current_etags()
+    return etags
+
+
+def full_schedule_response():
+    """Send {"days": [...], "schedule": {day: payload}} for every public day in one response."""
+    ensure_schedule_documents_table()
+    days = public_schedule_days()
+    etags = _document_etags(days)
+    days = [day for day in days if day in etags]
+    days_json = _serialize(days).rstrip(b'\n')
+    etag = hashlib.sha256(
+        days_json + b''.join(etags[day].encode('ascii') for day in days)).hexdigest()[:32]
+
+    response = current_app.response_class(mimetype='application/json')
+    response.set_etag(etag)
+    if request.if_none_match.contains_weak(etag):
+        return response.make_conditional(request)
+
+    bodies = dict(db.session.execute(
+        text("SELECT day, body FROM schedule_documents WHERE day IN :days").bindparams(
+            bindparam('days', expanding=True)),
+        {"days": days},
+    ).fetchall()) if days else {}
+    # Keys are sorted to match what the JSON provider would write for the same object.
+    entries = b','.join(
+        _serialize(day).rstrip(b'\n') + b':' + bytes(bodies[day]).rstrip(b'\n')
+        for day in sorted(days)
+    )
+    response.set_data(b'{"days":' + days_json + b',"schedule":{' + entries + b'}}\n')
+    return response
+
+
+def schedule_document_response(day):
+    """Send a day's stored bytes as-is, pre-compressed when the client accepts gzip."""
+    document = schedule_document(day)
+    response = current_app.response_class(mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+    if document.gzip_body is not None and request.accept_encodings.best_match(['gzip']):
+        response.set_data(document.gzip_body)
+        response.headers['Content-Encoding'] = 'gzip'
+        response.set_etag(document.etag, weak=True)
+    else:
+        response.set_data(document.body)
+        response.set_etag(document.etag)
+    return response.make_conditional(request)
+
+
+def install_schedule_documents(app):
+    """Rebuild affected schedule documents in every transaction that changes them."""
+    app.extensions[BUS_KEY].subscribe_transaction(_rebuild_for_commit)
@@ -1,16 +1,22 @@
 """Security helpers for API route authorization."""
 import base64
-import io
-import zipfile
+from collections import namedtuple
 
-from flask import jsonify, request, send_file, session
-from sqlalchemy import text
-from werkzeug.utils import secure_filename
+from flask import jsonify, request, session
+
+from website.invalidation import all_tags, invalidation_tag, tagged_cache
 
 
 ROLE_ALIASES = {
     'admin': 'organizer',
 }
+IDENTITY_CACHE = 'user_identities'
+# Bounds how long a role change the bus never sees (psql, scripts, bulk or raw-SQL
+# writes, another app) can go unnoticed by a worker.
+IDENTITY_MAX_AGE = 5.0
+
+# The account fields authorization needs, cached per worker by session email.
+UserIdentity = namedtuple('UserIdentity', 'id auth presentation_id')
 
 
 def _normalize_role(role):
@@ -39,7 +45,15 @@ def _current_user(User):
     email = _session_email()
     if not email:
         return None
-    return User.query.filter_by(email=email).first()
+
+    def lookup():
+        user = User.query.filter_by(email=email).first()
+        if user is None:
+            # Any new or renamed account may be the one this email belongs to.
+            return None, all_tags('user')
+        return UserIdentity(user.id, user.auth, user.presentation_id), {invalidation_tag('user', user.id)}
+
+    return tagged_cache(IDENTITY_CACHE, max_age=IDENTITY_MAX_AGE).get_or_compute(email, lookup)
 
 
 def _has_any_role(user, *roles):
@@ -79,20 +93,6 @@ def _path_int_after(path, marker):
         return None
 
 
-def _ensure_presentation_upload_table(db):
-    """Make sure the upload metadata table exists before reading original filenames."""
-    with db.engine.begin() as conn:
-        conn.execute(text(
-            """
-            CREATE TABLE IF NOT EXISTS presentation_uploads (
-                presentation_id INTEGER PRIMARY KEY,
-                filename VARCHAR(255) NOT NULL,
-                uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            """
-        ))
-
-
 def _looks_like_file(data):
     """Return whether bytes look like a supported presentation upload."""
     if not data:
@@ -104,29 +104,42 @@ def _looks_like_file(data):
     )
 
 
-def _presentation_file_bytes(value):
-    """Return real bytes from SQLAlchemy LargeBinary values across database drivers."""
+def _decode_presentation_file(value):
+    """
+    Return (encoding, bytes) for a stored presentation_file value.
+    encoding is 'raw', 'hex', 'data-url', 'base64', 'latin1', 'empty' or 'unreadable';
+    legacy rows hold text in one of these forms instead of raw bytes.
+    """
     if value is None:
-        return b''
-    if isinstance(value, bytes):
-        return value
-    if isinstance(value, bytearray):
-        return bytes(value)
-    if isinstance(value, memoryview):
-        return value.tobytes()
+        return 'empty', b''
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        data = bytes(value)
+        if not data:
+            return 'empty', b''
+        if not _looks_like_file(data):
+            # Text encodings can also end up stored in a binary column.
+            try:
+                encoding, decoded = _decode_presentation_file(data.decode('ascii'))
+            except UnicodeDecodeError:
+                encoding, decoded = None, b''
+            if encoding not in (None, 'latin1', 'unreadable') and _looks_like_file(decoded):
+                return encoding, decoded
+        return 'raw', data
     if isinstance(value, str):
         raw = value.strip()
         if not raw:
-            return b''
+            return 'empty', b''
 
+        encoding = None
         if raw.startswith('data:') and ',' in raw:
             raw = raw.split(',', 1)[1].strip()
+            encoding = 'data-url'
 
         if raw.startswith('\\x'):
             try:
                 decoded_hex = bytes.fromhex(raw[2:])
                 if _looks_like_file(decoded_hex) or len(decoded_hex) > 1024:
-                    return decoded_hex
+                    return encoding or 'hex', decoded_hex
             except ValueError:
                 pass
 
@@ -135,23 +148,30 @@ def _presentation_file_bytes(value):
         try:
             decoded_b64 = base64.b64decode(padded, validate=True)
             if _looks_like_file(decoded_b64) or len(decoded_b64) > 1024:
-                return decoded_b64
+                return encoding or 'base64', decoded_b64
         except Exception:
             pass
 
         try:
             raw_bytes = raw.encode('latin1')
             if _looks_like_file(raw_bytes):
-                return raw_bytes
+                return 'latin1', raw_bytes
         except UnicodeEncodeError:
             pass
 
-        return b''
+        return 'unreadable', b''
 
     try:
-        return bytes(value)
+        return 'raw', bytes(value)
     except TypeError:
-        return b''
+        return 'unreadable', b''
+
+
+def _presentation_file_bytes(value):
+    """Return real bytes from SQLAlchemy LargeBinary values across database drivers."""
+    if isinstance(value, bytes):
+        return value
+    return _decode_presentation_file(value)[1]
 
 
 def _safe_zip_piece(value, fallback='untitled'):
@@ -162,20 +182,17 @@ def _safe_zip_piece(value, fallback='untitled'):
     return cleaned or fallback
 
 
-def _uploaded_filename(db, presentation_id):
-    row = db.session.execute(
-        text("SELECT filename FROM presentation_uploads WHERE presentation_id = :pid"),
-        {"pid": presentation_id}
-    ).fetchone()
-    return row[0] if row and row[0] else None
-
-
-def _extension_from_upload(uploaded_name, file_data):
-    """Prefer the stored filename extension, then infer common upload formats from bytes."""
+def _extension_from_upload(uploaded_name, file_data=b'', file_format=None):
+    """
+    Prefer the stored filename extension, then the recorded file format, then infer
+    common upload formats from bytes.
+    """
     if uploaded_name and '.' in uploaded_name:
         extension = uploaded_name.rsplit('.', 1)[-1].lower()
         if extension in {'pdf', 'ppt', 'pptx'}:
             return extension
+    if file_format in {'pdf', 'ppt', 'pptx'}:
+        return file_format
 
     if file_data.startswith(b'%PDF'):
         return 'pdf'
@@ -217,80 +234,15 @@ def _zip_filename_for_presentation(presentation, extension, used_names=None):
     return _unique_zip_name(filename, used_names) if used_names is not None else filename
 
 
-def _presentation_upload_diagnostics(User):
-    """Return upload metadata so organizers can see why a file is missing from the ZIP."""
-    permission_response = _require_roles(User, 'organizer')
-    if permission_response:
-        return permission_response
-
-    from website import db
-    from website.models import Presentation
-
-    _ensure_presentation_upload_table(db)
-    query = str(request.args.get('q') or '').strip().lower()
-    rows = []
-
-    presentations = Presentation.query.order_by(Presentation.title.asc(), Presentation.id.asc()).all()
-    for presentation in presentations:
-        uploaded_name = _uploaded_filename(db, presentation.id)
-        file_data = _presentation_file_bytes(presentation.presentation_file)
-        extension = _extension_from_upload(uploaded_name, file_data) if file_data else None
-        presenter_names = _presenter_names_for_zip(presentation)
-        searchable = ' '.join([
-            str(presentation.id),
-            presentation.title or '',
-            presenter_names,
-            uploaded_name or '',
-        ]).lower()
-        if query and query not in searchable:
-            continue
-        rows.append({
-            "presentation_id": presentation.id,
-            "title": presentation.title,
-            "presenters": presenter_names,
-            "uploaded_filename_metadata": uploaded_name,
-            "presentation_file_bytes": len(file_data),
-            "included_in_zip": bool(file_data),
-            "zip_filename": _zip_filename_for_presentation(presentation, extension) if file_data else None,
-            "reason_if_missing": None if file_data else "upload metadata may exist, but presentations.presentation_file is empty or unreadable",
-        })
-
-    return jsonify({"count": len(rows), "results": rows})
-
-
 def _download_all_presentations_zip(User):
     """Return the presentation upload ZIP named as Presenter Names - Presentation Title.ext."""
     permission_response = _require_roles(User, 'organizer')
     if permission_response:
         return permission_response
 
-    from website import db
-    from website.models import Presentation
-
-    _ensure_presentation_upload_table(db)
-    zip_buffer = io.BytesIO()
-    presentations = Presentation.query.order_by(Presentation.title.asc(), Presentation.id.asc()).all()
-    used_names = {}
-
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for presentation in presentations:
-            file_data = _presentation_file_bytes(presentation.presentation_file)
-            if not file_data:
-                continue
-
-            uploaded_name = _uploaded_filename(db, presentation.id)
-            safe_uploaded_name = secure_filename(uploaded_name) if uploaded_name else None
-            extension = _extension_from_upload(safe_uploaded_name, file_data)
-            filename = _zip_filename_for_presentation(presentation, extension, used_names)
-            zipf.writestr(filename, file_data)
-
-    zip_buffer.seek(0)
-    return send_file(
-        zip_buffer,
-        mimetype='application/zip',
-        as_attachment=True,
-        download_name='presentations.zip'
-    )
+    from website.routes.presentation_archive import presentations_zip_response
+
+    return presentations_zip_response(request.args)
 
 
 def install_api_security(app, User):
@@ -368,11 +320,17 @@ def _check_users_api(User, path, method):
 
 
 def _check_presentations_api(User, path, method):
+    if '/upload/sessions' in path:
+        # Resumable uploads follow the same rule as the single-request upload.
+        return _require_roles(User, 'organizer')
+
     if method == 'GET':
         if path in ('/api/v1/presentations/download-all', '/api/v1/presentations/download-all-named'):
             return _download_all_presentations_zip(User)
-        if path == '/api/v1/presentations/upload-diagnostics':
-            return _presentation_upload_diagnostics(User)
+        if path in ('/api/v1/presentations/download-all/status', '/api/v1/presentations/upload-diagnostics'):
+            return _require_roles(User, 'organizer')
+        if path.endswith('/file'):
+            return _check_presentation_owner_or_organizer(User, path)
         return None
 
     if method == 'POST':
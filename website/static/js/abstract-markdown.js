@@ -12,6 +12,14 @@
     }
   }
 
+  function useWebSizedImages(html) {
+    // Stored abstract figures have downscaled web derivatives (WebP where supported).
+    return html.replace(
+      /(src=["'])(\/api\/v1\/presentations\/abstract-images\/[A-Za-z0-9]+)(["'])/g,
+      '$1$2?size=web$3'
+    );
+  }
+
   function renderMarkdown(source) {
     const text = String(source || '');
     if (!text) return '';
@@ -22,7 +30,7 @@
       return text;
     }
 
-    const html = window.marked.parse(text);
+    const html = useWebSizedImages(window.marked.parse(text));
     if (window.DOMPurify && typeof window.DOMPurify.sanitize === 'function') {
       return window.DOMPurify.sanitize(html, {
         USE_PROFILES: { html: true },
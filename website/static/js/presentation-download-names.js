@@ -18,6 +18,27 @@
     });
   }
 
+  function describeAge(seconds) {
+    if (seconds < 60) return 'just now';
+    if (seconds < 3600) return `${Math.round(seconds / 60)} min ago`;
+    return `${Math.round(seconds / 3600)} h ago`;
+  }
+
+  // The unfiltered archive is prebuilt; say when it was built and whether a rebuild is pending.
+  function showArchiveStatus(headers) {
+    const status = document.getElementById('download-archive-status');
+    if (!status) return;
+    const age = headers.get('X-Archive-Age');
+    if (age === null) {
+      status.textContent = '';
+      return;
+    }
+    const pending = Number(headers.get('X-Archive-Pending-Changes') || 0);
+    status.textContent = pending > 0
+      ? `Archive built ${describeAge(Number(age))}; ${pending} change${pending === 1 ? '' : 's'} not included yet (rebuilding).`
+      : `Archive built ${describeAge(Number(age))}; up to date.`;
+  }
+
   async function downloadNamedPresentationZip(event) {
     event.preventDefault();
     event.stopPropagation();
@@ -29,7 +50,11 @@
     btn.innerHTML = '<span class="spinner-border spinner-border-sm" role="status" aria-hidden="true"></span> Downloading...';
 
     try {
-      const response = await fetch(`/api/v1/presentations/download-all-named?_=${Date.now()}`, {
+      const params = new URLSearchParams({ _: Date.now() });
+      const typeFilter = document.getElementById('presentationTypeFilter')?.value;
+      if (typeFilter && typeFilter !== 'all') params.set('type', typeFilter);
+
+      const response = await fetch(`/api/v1/presentations/download-all-named?${params}`, {
         credentials: 'same-origin',
         cache: 'no-store',
       });
@@ -38,6 +63,7 @@
         throw new Error(await apiErrorMessage(response, `Failed to download presentations: ${response.status}`));
       }
 
+      showArchiveStatus(response.headers);
       const blob = await response.blob();
       const url = window.URL.createObjectURL(blob);
       const a = document.createElement('a');
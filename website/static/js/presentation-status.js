@@ -2,6 +2,20 @@ let presentationTable;
 let scheduleBlocks = [];
 
 const PRESENTATION_TYPES = ['Presentation', 'Blitz', 'Poster'];
+const PRESENTATIONS_TABLE_URL = '/api/v1/presentations/table';
+
+function selectedValue(id, fallback = 'all') {
+  const element = document.getElementById(id);
+  return element ? element.value : fallback;
+}
+
+function tableFilterParams() {
+  // Filters are applied in SQL by the server-side table endpoint.
+  return {
+    type: selectedValue('presentationTypeFilter'),
+    submission_status: selectedValue('presentationSubmissionStatusFilter'),
+  };
+}
 
 function escapeHtml(value) {
   return String(value ?? '').replace(/[&<>"']/g, (char) => ({
@@ -98,16 +112,10 @@ async function fetchJson(url) {
 async function uploadPresentationFile(presentationId, file) {
   if (!file) return;
 
-  const formData = new FormData();
-  formData.append('file', file);
-
-  const response = await fetch(`/api/v1/presentations/${presentationId}/upload`, {
-    method: 'POST',
-    body: formData,
-  });
-
-  if (!response.ok) {
-    throw new Error(await apiErrorMessage(response, `Failed to upload presentation file: ${response.status}`));
+  try {
+    await window.ResumableUpload.upload(presentationId, file);
+  } catch (err) {
+    throw new Error(`Failed to upload presentation file: ${err.message}`);
   }
 }
 
@@ -119,18 +127,18 @@ async function loadPresentations() {
   }
 
   try {
-    const [presentations, blocks] = await Promise.all([
-      fetchJson('/api/v1/presentations/table'),
-      fetchJson('/api/v1/block-schedule/'),
-    ]);
+    const blocks = await fetchJson('/api/v1/block-schedule/');
 
     scheduleBlocks = blocks.slice().sort((a, b) => {
       if (a.day !== b.day) return a.day.localeCompare(b.day);
       return new Date(a.start_time) - new Date(b.start_time);
     });
-    window.allPresentations = presentations;
 
-    renderPresentationTable(presentations);
+    if (presentationTable) {
+      presentationTable.ajax.reload(null, false); // keep the current page after edits
+      return;
+    }
+    renderPresentationTable();
 
   } catch (err) {
     console.error('Failed to load presentations', err);
@@ -138,7 +146,7 @@ async function loadPresentations() {
   }
 }
 
-function renderPresentationTable(presentations) {
+function renderPresentationTable() {
   const container = document.getElementById('presentation-container');
   if (!container) return;
 
@@ -169,7 +177,12 @@ function renderPresentationTable(presentations) {
   }
 
   presentationTable = new DataTable('#presentation-table', {
-    data: presentations,
+    serverSide: true,
+    processing: true,
+    ajax: {
+      url: PRESENTATIONS_TABLE_URL,
+      data: (params) => Object.assign(params, tableFilterParams()),
+    },
     columns: [
       { data: 'program_identifier', defaultContent: '-' },
       { data: 'title', defaultContent: '-' },
@@ -194,6 +207,7 @@ function renderPresentationTable(presentations) {
       {
         data: 'presenters',
         defaultContent: '-',
+        orderable: false,
         render: (presenters) => {
           if (!presenters || presenters.length === 0) return '-';
           return presenters.map(p => `${escapeHtml(p.firstname)} ${escapeHtml(p.lastname)}`).join(', ');
@@ -226,6 +240,10 @@ function renderPresentationTable(presentations) {
   });
 }
 
+function reloadPresentationTable() {
+  if (presentationTable) presentationTable.ajax.reload();
+}
+
 window.updatePresentationInline = async function (presentationId, field, value, selectEl) {
   const originalValue = selectEl?.dataset?.originalValue ?? '';
   if (selectEl) selectEl.disabled = true;
@@ -309,6 +327,11 @@ async function editPresentation(presentationId) {
 
 document.addEventListener('DOMContentLoaded', () => {
   loadPresentations();
+
+  ['presentationTypeFilter', 'presentationSubmissionStatusFilter']
+    .map((id) => document.getElementById(id))
+    .filter(Boolean)
+    .forEach((select) => select.addEventListener('change', reloadPresentationTable));
 });
 
 document.getElementById("download-presentations")?.addEventListener("click", async () => {
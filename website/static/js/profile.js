@@ -436,24 +436,16 @@ async function uploadPresentation() {
     return;
   }
 
-  const formData = new FormData();
-  formData.append("file", file);
-
-  const response = await fetch(`/api/v1/presentations/${user.presentation_id}/upload`, {
-    method: "POST",
-    body: formData
-  });
-
-  if (response.ok) {
-    const data = await response.json().catch(() => ({}));
+  try {
+    // Chunked and resumable, so a dropped connection does not restart the whole file.
+    const data = await window.ResumableUpload.upload(user.presentation_id, file);
     const filename = data.filename || file.name;
     localStorage.setItem(`latestPresentationUpload:${user.user_id}`, filename);
     showLatestPresentationUpload(filename);
     alert("Presentation uploaded successfully!");
     fileInput.value = "";
-  } else {
-    const err = await response.json().catch(() => ({ error: "Upload failed" }));
-    alert("Error: " + err.error);
+  } catch (err) {
+    alert("Error: " + (err.message || "Upload failed"));
   }
 }
 
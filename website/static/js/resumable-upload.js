@@ -0,0 +1,86 @@
+(function () {
+  const MAX_RETRIES = 5;
+  const RETRY_DELAY_MS = 1500;
+
+  function delay(ms) {
+    return new Promise((resolve) => setTimeout(resolve, ms));
+  }
+
+  async function errorFrom(response, fallback) {
+    const data = await response.json().catch(() => ({}));
+    const error = new Error(data.error || data.reason || fallback);
+    error.status = response.status;
+    return error;
+  }
+
+  async function currentOffset(sessionUrl) {
+    const response = await fetch(sessionUrl, { cache: 'no-store' });
+    if (!response.ok) throw await errorFrom(response, `Could not check upload progress: ${response.status}`);
+    return (await response.json()).offset;
+  }
+
+  async function sendChunk(sessionUrl, file, offset, chunkSize) {
+    const chunk = file.slice(offset, Math.min(offset + chunkSize, file.size));
+    const response = await fetch(sessionUrl, {
+      method: 'PATCH',
+      headers: {
+        'Content-Type': 'application/octet-stream',
+        'Upload-Offset': String(offset),
+      },
+      body: chunk,
+    });
+    const data = await response.json().catch(() => ({}));
+    if (response.status === 409 && typeof data.offset === 'number') {
+      return data.offset; // the server already has more (or less) than we thought
+    }
+    if (!response.ok) {
+      const error = new Error(data.error || `Upload failed: ${response.status}`);
+      error.status = response.status;
+      throw error;
+    }
+    return data.offset;
+  }
+
+  /**
+   * Upload a presentation file in resumable chunks.
+   * Dropped connections are retried from the offset the server reports.
+   * Resolves with the same JSON as a single-request upload.
+   */
+  async function upload(presentationId, file, options = {}) {
+    const onProgress = options.onProgress || (() => {});
+    const base = `/api/v1/presentations/${presentationId}/upload/sessions`;
+
+    const createResponse = await fetch(base, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ filename: file.name, size: file.size }),
+    });
+    if (!createResponse.ok) throw await errorFrom(createResponse, `Could not start upload: ${createResponse.status}`);
+
+    const session = await createResponse.json();
+    const sessionUrl = `${base}/${session.upload_id}`;
+    let offset = session.offset;
+    let retries = 0;
+
+    while (offset < file.size) {
+      try {
+        offset = await sendChunk(sessionUrl, file, offset, session.chunk_size);
+        retries = 0;
+        onProgress(offset, file.size);
+      } catch (err) {
+        // Client errors (bad type, too large) will not succeed on retry.
+        if (err.status && err.status < 500) throw err;
+        retries += 1;
+        if (retries > MAX_RETRIES) throw err;
+        await delay(RETRY_DELAY_MS * retries);
+        offset = await currentOffset(sessionUrl).catch(() => offset);
+      }
+    }
+
+    const finalizeResponse = await fetch(`${sessionUrl}/finalize`, { method: 'POST' });
+    if (!finalizeResponse.ok) throw await errorFrom(finalizeResponse, `Could not finish upload: ${finalizeResponse.status}`);
+    return finalizeResponse.json();
+  }
+
+  window.ResumableUpload = { upload };
+})();
@@ -55,6 +55,17 @@ function abstractSnippet(source, maxLength = 75) {
   return source && source.length > maxLength ? source.slice(0, maxLength) + '…' : (source || '');
 }
 
+// Every public day's payload from the initial /full load; dropped after edits so later loads are live.
+let scheduleBundle = null;
+
+async function fetchFullSchedule() {
+  const res = await fetch('/api/v1/block-schedule/full');
+  if (!res.ok) {
+    throw new Error(`Failed to load schedule: ${res.status}`);
+  }
+  return await res.json();
+}
+
 async function fetchDays() {
   const res = await fetch('/api/v1/block-schedule/days');
   return await res.json();
@@ -189,7 +200,7 @@ function renderDetails(sessions, detailsContainer, presentations) {
           <div class="card border-0 shadow-xs rounded-4 h-100 p-3" id="poster-${presentation.id}">
             <h6 class="fw-bold mb-1">${presentation.title}</h6>
             <p class="text-sm text-secondary mb-1">${(presentation.presenters || []).map(formatPresenterName).filter(Boolean).join(", ")}</p>
-            <p class="text-sm mb-0">${presentation.abstract ? abstractSnippet(presentation.abstract, 75) : ""}</p>
+            <p class="text-sm mb-0">${presentation.abstract_preview ? abstractSnippet(presentation.abstract_preview, 75) : ""}</p>
           </div>
         `;
       }
@@ -238,6 +249,7 @@ async function saveCurrentOrder() {
       headers: { 'Content-Type': 'application/json' },
       body: JSON.stringify({ orders })
     });
+    scheduleBundle = null;
     return await res.json();
   } catch (err) {
     console.error('Failed to save order', err);
@@ -288,7 +300,8 @@ async function loadForDay(day, overview, details) {
   let presentations;
 
   try {
-    const scheduleData = await fetchScheduleBundle(day);
+    const bundled = scheduleBundle && scheduleBundle.schedule && scheduleBundle.schedule[day];
+    const scheduleData = bundled || await fetchScheduleBundle(day);
     sessions = scheduleData.blocks || [];
     presentations = scheduleData.presentations || [];
   } catch (err) {
@@ -315,7 +328,14 @@ async function initializeScheduleUI() {
   const details = document.getElementById('schedule-details');
   const addBlockBtn = document.getElementById('add-block-btn');
 
-  const days = await fetchDays();
+  let days;
+  try {
+    scheduleBundle = await fetchFullSchedule();
+    days = scheduleBundle.days;
+  } catch (err) {
+    console.warn('Falling back to per-day schedule requests', err);
+    days = await fetchDays();
+  }
 
   if (!Array.isArray(days) || days.length === 0) {
     renderEmptyScheduleState(daySelect, overview, details);
@@ -382,6 +402,7 @@ async function initializeScheduleUI() {
             body: JSON.stringify(payload)
           });
           if (!resp.ok) throw new Error(`Failed to create block: ${resp.status}`);
+          scheduleBundle = null;
 
           if (daySelect.value) {
             await loadForDay(daySelect.value, overview, details);
@@ -396,6 +417,78 @@ async function initializeScheduleUI() {
 
 document.addEventListener('DOMContentLoaded', initializeScheduleUI);
 
+function renderConferenceMode(button, status) {
+  const enabled = Boolean(status && status.enabled);
+  button.dataset.enabled = enabled ? 'true' : 'false';
+  button.textContent = enabled ? 'Disable Conference Mode' : 'Enable Conference Mode';
+  button.title = enabled
+    ? `Schedule edits are frozen; public pages read snapshot ${status.version} built ${status.built_at}.`
+    : 'Freeze schedule and presentation edits and serve public pages from a snapshot.';
+  button.hidden = false;
+}
+
+document.addEventListener('DOMContentLoaded', async () => {
+  const modeBtn = document.getElementById('conference-mode-btn');
+  if (!modeBtn) return;
+
+  try {
+    const response = await fetch('/api/v1/block-schedule/conference-mode', { cache: 'no-store' });
+    renderConferenceMode(modeBtn, await response.json());
+  } catch (err) {
+    console.error('Failed to load conference mode status', err);
+  }
+
+  modeBtn.addEventListener('click', async () => {
+    const enable = modeBtn.dataset.enabled !== 'true';
+    if (enable && !confirm('Freeze schedule and presentation edits for conference day?')) return;
+    modeBtn.disabled = true;
+    try {
+      const response = await fetch('/api/v1/block-schedule/conference-mode', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ enabled: enable })
+      });
+      const status = await response.json().catch(() => ({}));
+      if (!response.ok) {
+        throw new Error(status.error || `Request failed: ${response.status}`);
+      }
+      renderConferenceMode(modeBtn, status);
+    } catch (err) {
+      console.error('Failed to change conference mode', err);
+      alert(`Could not change conference mode. ${err.message || ''}`);
+    } finally {
+      modeBtn.disabled = false;
+    }
+  });
+});
+
+document.addEventListener('DOMContentLoaded', () => {
+  const exportBtn = document.getElementById('export-static-btn');
+  const exportStatus = document.getElementById('export-static-status');
+  if (!exportBtn) return;
+
+  exportBtn.addEventListener('click', async () => {
+    exportBtn.disabled = true;
+    exportBtn.textContent = 'Publishing...';
+    try {
+      const response = await fetch('/api/v1/block-schedule/export-static', { method: 'POST' });
+      const report = await response.json().catch(() => ({}));
+      if (!response.ok) {
+        throw new Error(report.error || `Export failed: ${response.status}`);
+      }
+      if (exportStatus) {
+        exportStatus.textContent = `Published version ${report.version}: ${report.written.length} file(s) updated, ${report.unchanged} unchanged.`;
+      }
+    } catch (err) {
+      console.error('Failed to publish static site', err);
+      alert(`Could not publish the static site. ${err.message || ''}`);
+    } finally {
+      exportBtn.disabled = false;
+      exportBtn.textContent = 'Publish Static Site';
+    }
+  });
+});
+
 async function editBlock(blockId) {
   try {
     const resp = await fetch(`/api/v1/block-schedule/${blockId}`);
@@ -421,6 +514,7 @@ async function editBlock(blockId) {
           body: JSON.stringify(payload)
         });
         if (!putResp.ok) throw new Error(`Failed to save block: ${putResp.status}`);
+        scheduleBundle = null;
 
         const daySelect = document.getElementById('day-select');
         const overview = document.getElementById('schedule-overview');
@@ -434,6 +528,7 @@ async function editBlock(blockId) {
           headers: { 'Content-Type': 'application/json' }
         });
         if (!deleteResp.ok) throw new Error(`Failed to delete block: ${deleteResp.status}`);
+        scheduleBundle = null;
 
         const daySelect = document.getElementById('day-select');
         const overview = document.getElementById('schedule-overview');
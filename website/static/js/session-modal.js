@@ -125,7 +125,9 @@
     card.role = 'button';
 
     const timeDisplay = formatTimeNoYear(item.time);
-    const preview = abstractPreview(item.abstract, 100);
+    // Schedule payloads carry only a stored preview; the modal loads the full abstract on open.
+    const hasAbstract = typeof item.abstract === 'string';
+    const preview = abstractPreview(hasAbstract ? item.abstract : item.abstract_preview, 100);
     const programId = item.program_identifier || '';
     const showGradeButton = options.showGradeButton === true;
 
@@ -136,6 +138,10 @@
     card.dataset.programId = programId;
     card.dataset.presenters = JSON.stringify(item.presenters || []);
     card.dataset.abstract = item.abstract || '';
+    if (!hasAbstract && item.abstract_length) {
+      card.dataset.abstractPreview = item.abstract_preview || '';
+      card.dataset.abstractPending = 'true';
+    }
     card.dataset.id = item.id || '';
 
     card.innerHTML = `
@@ -332,6 +338,21 @@
     totalEl.textContent = o + c + s;
   }
 
+  function renderAbstract(element, source) {
+    if (window.AbstractMarkdownEditor) {
+      window.AbstractMarkdownEditor.renderToElement(element, source);
+    } else {
+      element.textContent = source;
+    }
+  }
+
+  async function loadFullAbstract(cardEl) {
+    const detail = await fetchJson(`/overview/${encodeURIComponent(cardEl.dataset.id)}`, { cache: 'default' });
+    cardEl.dataset.abstract = detail.abstract || '';
+    delete cardEl.dataset.abstractPending;
+    return cardEl.dataset.abstract;
+  }
+
   function fillAndShowModal(cardEl) {
     const m = document.getElementById('sessionModal');
     if (!m) return;
@@ -343,10 +364,20 @@
     const programIdEl = m.querySelector('#mProgramId');
     if (programIdEl) programIdEl.textContent = cardEl.dataset.programId || '';
     const abstractEl = m.querySelector('#mAbstract');
-    if (window.AbstractMarkdownEditor) {
-      window.AbstractMarkdownEditor.renderToElement(abstractEl, cardEl.dataset.abstract || '');
+    m.dataset.presentationId = cardEl.dataset.id || '';
+    if (cardEl.dataset.abstractPending === 'true' && cardEl.dataset.id) {
+      abstractEl.textContent = 'Loading abstract…';
+      loadFullAbstract(cardEl)
+        .catch((err) => {
+          console.error('Failed to load abstract', err);
+          return `${cardEl.dataset.abstractPreview || ''}…`;
+        })
+        .then((abstract) => {
+          // The modal may have been reopened on another card meanwhile.
+          if (m.dataset.presentationId === cardEl.dataset.id) renderAbstract(abstractEl, abstract);
+        });
     } else {
-      abstractEl.textContent = cardEl.dataset.abstract || '';
+      renderAbstract(abstractEl, cardEl.dataset.abstract || '');
     }
 
     const presentersEl = m.querySelector('#mPresenters');
@@ -0,0 +1,28 @@
+(function () {
+  // Only present in pages written by `flask export-static`: maps API URLs to exported JSON files.
+  const FEEDS = window.CUSRR_STATIC_FEEDS;
+  if (!FEEDS || window.__cusrrStaticFeedsInstalled || !window.fetch) return;
+
+  function requestKey(input) {
+    const url = typeof input === 'string' ? input : input && input.url;
+    if (!url) return '';
+    try {
+      const parsed = new URL(url, window.location.origin);
+      return parsed.pathname + parsed.search;
+    } catch (error) {
+      return url;
+    }
+  }
+
+  const originalFetch = window.fetch.bind(window);
+  window.fetch = function staticFeedFetch(input, init) {
+    const method = String((init && init.method) || (input && input.method) || 'GET').toUpperCase();
+    const feedUrl = method === 'GET' ? FEEDS[requestKey(input)] : null;
+    if (!feedUrl) {
+      return originalFetch(input, init);
+    }
+    return originalFetch(feedUrl, { credentials: 'omit' });
+  };
+
+  window.__cusrrStaticFeedsInstalled = true;
+})();
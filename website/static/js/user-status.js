@@ -1,7 +1,8 @@
 let userTable; // store DataTable instance
-let allUsers = []; // keep raw data for clipboard actions
 let allPresentations = []; // keep presentation list for assignment dropdowns
 
+const USERS_TABLE_URL = '/api/v1/users/table';
+
 async function apiErrorMessage(response, fallback) {
   const data = await response.json().catch(() => ({}));
   return data.error || data.reason || fallback;
@@ -38,10 +39,6 @@ function isEmailFilterCandidate(user) {
   return Boolean(user && user.email && (user.presentation_id || userRoles(user).includes('presenter')));
 }
 
-function normalizedValue(value) {
-  return String(value || '').trim().toLowerCase();
-}
-
 function selectedValue(id, fallback = 'all') {
   const element = document.getElementById(id);
   return element ? element.value : fallback;
@@ -80,47 +77,31 @@ function presentationAssignmentDropdown(user) {
   `;
 }
 
-function matchesPresentationTypeFilter(user, selectedType) {
-  if (selectedType === 'all') return true;
-  return normalizedValue(user.presentation_type) === normalizedValue(selectedType);
+function tableFilterParams() {
+  // Filters are applied in SQL by the server-side table endpoint.
+  return {
+    role: selectedValue('userRoleFilter'),
+    presentation_type: selectedValue('userPresentationTypeFilter'),
+    submission_status: selectedValue('userSubmissionStatusFilter'),
+  };
 }
 
-function matchesActivityFilter(user, selectedActivity) {
-  if (selectedActivity === 'all') return true;
-  return normalizedValue(user.activity) === normalizedValue(selectedActivity);
-}
-
-function matchesCompletionStatusFilter(user, selectedStatus) {
-  const abstractSubmitted = Boolean(user.abstract_submitted);
-  const presentationUploaded = Boolean(user.presentation_uploaded);
-
-  if (selectedStatus === 'abstract_only') {
-    return abstractSubmitted && !presentationUploaded;
-  }
-  if (selectedStatus === 'presentation_only') {
-    return presentationUploaded && !abstractSubmitted;
-  }
-  if (selectedStatus === 'both') {
-    return abstractSubmitted && presentationUploaded;
-  }
-  if (selectedStatus === 'neither') {
-    return !abstractSubmitted && !presentationUploaded;
+async function filteredEmailRows() {
+  // The table only holds the visible page, so ask the server for every matching row.
+  const params = new URLSearchParams({
+    draw: '1',
+    start: '0',
+    length: '-1',
+    presentation_type: selectedValue('copyEmailPresentationType'),
+    submission_status: selectedValue('copyEmailCompletionStatus', 'neither'),
+    activity: selectedValue('copyEmailActivity'),
+  });
+  const response = await fetch(`${USERS_TABLE_URL}?${params}`);
+  if (!response.ok) {
+    throw new Error(await apiErrorMessage(response, `Could not load matching users: ${response.status}`));
   }
-  return false;
-}
-
-function filteredEmailRows() {
-  const rows = userTable ? userTable.data().toArray() : allUsers;
-  const selectedType = selectedValue('copyEmailPresentationType');
-  const selectedStatus = selectedValue('copyEmailCompletionStatus', 'neither');
-  const selectedActivity = selectedValue('copyEmailActivity');
-
-  return rows.filter((user) => (
-    isEmailFilterCandidate(user)
-    && matchesPresentationTypeFilter(user, selectedType)
-    && matchesCompletionStatusFilter(user, selectedStatus)
-    && matchesActivityFilter(user, selectedActivity)
-  ));
+  const payload = await response.json();
+  return payload.data.filter(isEmailFilterCandidate);
 }
 
 async function writeToClipboard(text) {
@@ -140,15 +121,15 @@ async function writeToClipboard(text) {
 }
 
 async function copyFilteredEmails() {
-  const matchingRows = filteredEmailRows();
-  const emails = [...new Set(matchingRows.map((user) => user.email).filter(Boolean))];
+  try {
+    const matchingRows = await filteredEmailRows();
+    const emails = [...new Set(matchingRows.map((user) => user.email).filter(Boolean))];
 
-  if (!emails.length) {
-    alert('No matching emails to copy.');
-    return;
-  }
+    if (!emails.length) {
+      alert('No matching emails to copy.');
+      return;
+    }
 
-  try {
     await writeToClipboard(emails.join(', '));
     alert(`Copied ${emails.length} email${emails.length === 1 ? '' : 's'}. Paste into Gmail To/CC/BCC.`);
   } catch (err) {
@@ -165,24 +146,19 @@ async function loadUsers() {
   }
 
   try {
-    const [usersResponse, presentationsResponse] = await Promise.all([
-      fetch('/api/v1/users/'),
-      fetch('/api/v1/presentations/'),
-    ]);
-
-    if (!usersResponse.ok) {
-      throw new Error(await apiErrorMessage(usersResponse, `Network response was not ok: ${usersResponse.status} ${usersResponse.statusText}`));
-    }
+    const presentationsResponse = await fetch('/api/v1/presentations/');
     if (!presentationsResponse.ok) {
       throw new Error(await apiErrorMessage(presentationsResponse, `Could not load presentations: ${presentationsResponse.status}`));
     }
 
-    const users = await usersResponse.json();
     const presentations = await presentationsResponse.json();
-    allUsers = users;
     allPresentations = presentations.slice().sort((a, b) => presentationLabel(a).localeCompare(presentationLabel(b)));
 
-    renderTable(users);
+    if (userTable) {
+      userTable.ajax.reload(null, false); // keep the current page after edits
+      return;
+    }
+    renderTable();
 
   } catch (err) {
     console.error('Failed to load users', err);
@@ -190,7 +166,7 @@ async function loadUsers() {
   }
 }
 
-function renderTable(users) {
+function renderTable() {
   const container = document.getElementById('user-container');
   if (!container) return;
 
@@ -223,7 +199,12 @@ function renderTable(users) {
 
   // Initialize DataTable
   userTable = new DataTable('#user-table', {
-    data: users,
+    serverSide: true,
+    processing: true,
+    ajax: {
+      url: USERS_TABLE_URL,
+      data: (params) => Object.assign(params, tableFilterParams()),
+    },
     columns: [
       { data: 'name', defaultContent: '—' },
       { data: 'email', defaultContent: '—' },
@@ -290,6 +271,10 @@ function renderTable(users) {
   });
 }
 
+function reloadUserTable() {
+  if (userTable) userTable.ajax.reload();
+}
+
 window.updateUserPresentationAssignment = async function(userId, presentationId, selectEl) {
   const originalValue = selectEl?.dataset?.originalValue ?? '';
   if (selectEl) selectEl.disabled = true;
@@ -394,4 +379,9 @@ document.addEventListener('DOMContentLoaded', () => {
   if (copyFilteredBtn) {
     copyFilteredBtn.addEventListener('click', copyFilteredEmails);
   }
+
+  ['userRoleFilter', 'userPresentationTypeFilter', 'userSubmissionStatusFilter']
+    .map((id) => document.getElementById(id))
+    .filter(Boolean)
+    .forEach((select) => select.addEventListener('change', reloadUserTable));
 });
\ No newline at end of file
@@ -0,0 +1,305 @@
+"""
+Static export of the public schedule and program.
+`flask export-static` (or the organizer button on the schedule page) renders the
+public pages and the JSON feeds they read into STATIC_EXPORT_ROOT/versions/<version>
+and points STATIC_EXPORT_ROOT/current at it, so any static web server can serve
+attendees without the app. Exported pages map their API fetches onto the feed files
+through static/js/static-feeds.js.
+
+Each version is complete, but only files whose content changed are written; the
+rest are hard links into the previous version. Once an export exists, commits that
+touch presentations, presenters or schedule blocks queue a new one in the background.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+from datetime import datetime
+from itertools import chain
+from urllib.parse import quote
+
+import click
+from flask import current_app, has_app_context
+from sqlalchemy import event
+
+from website import db
+from website.background import BackgroundJobs
+from website.models import BlockSchedule, Presentation, User
+from website.routes.abstract_images import load_abstract_images
+from website.routes.presentations import VALID_PRESENTATION_TYPES
+
+# (URL, file under the version directory) for each public page.
+STATIC_PAGES = (
+    ('/', 'index.html'),
+    ('/schedule', 'schedule/index.html'),
+    ('/dashboard', 'dashboard/index.html'),
+    ('/poster_page', 'poster_page/index.html'),
+    ('/blitz_page', 'blitz_page/index.html'),
+    ('/presentation_page', 'presentation_page/index.html'),
+)
+FEEDS_DIR = 'feeds'
+ABSTRACT_IMAGE_PATH = 'api/v1/presentations/abstract-images'
+ABSTRACT_IMAGE_RE = re.compile(r'/api/v1/presentations/abstract-images/([A-Za-z0-9_-]+)')
+# Characters encodeURIComponent leaves unescaped beyond those quote() always keeps.
+SCRIPT_SAFE_CHARACTERS = "!'()*"
+MANIFEST_NAME = 'manifest.json'
+CURRENT_LINK = 'current'
+VERSIONS_DIR = 'versions'
+KEEP_VERSIONS = 3
+EXPORTER_KEY = 'static_export_jobs'
+CHANGES_KEY = 'static_export_changed'
+EXPORTED_MODELS = (Presentation, User, BlockSchedule)
+
+_export_lock = threading.Lock()
+
+
+class StaticExportError(RuntimeError):
+    """Raised when a page or feed cannot be rendered for the static export."""
+
+
+def static_export_root():
+    """Directory holding the exported versions and the `current` link."""
+    directory = current_app.config.get('STATIC_EXPORT_ROOT') or os.path.join(
+        current_app.instance_path, 'static-export')
+    return os.path.abspath(directory)
+
+
+def current_export_dir():
+    """Return the directory `current` points at, or None before the first export."""
+    link = os.path.join(static_export_root(), CURRENT_LINK)
+    return os.path.realpath(link) if os.path.isdir(link) else None
+
+
+def _read_manifest(directory):
+    if not directory:
+        return None
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), encoding='utf-8') as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def _fingerprint(data):
+    return 'sha256:' + hashlib.sha256(data).hexdigest()
+
+
+def _day_feed_name(day):
+    slug = re.sub(r'[^a-z0-9]+', '-', day.lower()).strip('-') or 'day'
+    return f"{FEEDS_DIR}/day-{slug}-{hashlib.sha1(day.encode('utf-8')).hexdigest()[:8]}.json"
+
+
+def _fetch(client, url):
+    response = client.get(url)
+    if response.status_code != 200:
+        raise StaticExportError(f"GET {url} returned {response.status_code}")
+    return response.get_data()
+
+
+def _scheduled_presentation_ids(day_feed):
+    payload = json.loads(day_feed)
+    return {row['id'] for group in payload['presentations'] for row in group['presentations']}
+
+
+def _render_feeds(client):
+    """Return ({feed URL: file}, {file: bytes}) for every JSON feed the public pages read."""
+    feed_map = {}
+    files = {}
+
+    def add(url, name):
+        feed_map[url] = '/' + name
+        files[name] = _fetch(client, url)
+
+    add('/api/v1/block-schedule/days', f'{FEEDS_DIR}/block-schedule-days.json')
+    add('/api/v1/block-schedule/full', f'{FEEDS_DIR}/block-schedule-full.json')
+    presentation_ids = set()
+    for day in json.loads(files[f'{FEEDS_DIR}/block-schedule-days.json']):
+        # Keys must match the URLs schedule.js builds with encodeURIComponent.
+        name = _day_feed_name(day)
+        add(f"/api/v1/block-schedule/day/{quote(day, safe=SCRIPT_SAFE_CHARACTERS)}/full", name)
+        presentation_ids.update(_scheduled_presentation_ids(files[name]))
+    # Schedule cards carry abstract previews; the modal reads full abstracts from these.
+    for presentation_id in sorted(presentation_ids):
+        add(f'/overview/{presentation_id}', f'{FEEDS_DIR}/overview/{presentation_id}.json')
+    add('/program/list', f'{FEEDS_DIR}/program-list.json')
+    for presentation_type in sorted(VALID_PRESENTATION_TYPES):
+        add(f'/program/list?type={presentation_type}',
+            f'{FEEDS_DIR}/program-list-{presentation_type.lower()}.json')
+    return feed_map, files
+
+
+def _render_pages(client, feed_map):
+    """Render the public pages with the feed map and fetch rewriter injected into <head>."""
+    mapping = json.dumps(feed_map, sort_keys=True).replace('</', '<\\/')
+    head = (
+        f'<script>window.CUSRR_STATIC_FEEDS = {mapping};</script>\n'
+        '<script src="/static/js/static-feeds.js"></script>\n'
+    )
+    files = {}
+    for url, name in STATIC_PAGES:
+        html = _fetch(client, url).decode('utf-8')
+        if '</head>' not in html:
+            raise StaticExportError(f"GET {url} did not return an HTML page")
+        files[name] = html.replace('</head>', head + '</head>', 1).encode('utf-8')
+    return files
+
+
+def _abstract_image_files(feed_files, previous):
+    """Return image files referenced by the feeds; images are immutable, so only new ids are read."""
+    image_ids = set()
+    for data in feed_files.values():
+        image_ids.update(ABSTRACT_IMAGE_RE.findall(data.decode('utf-8', errors='ignore')))
+    paths = {f'{ABSTRACT_IMAGE_PATH}/{image_id}': image_id for image_id in image_ids}
+    files = {path: None for path in paths if path in previous}
+    missing = [image_id for path, image_id in paths.items() if path not in previous]
+    for image_id, data in load_abstract_images(missing, size='web').items():
+        files[f'{ABSTRACT_IMAGE_PATH}/{image_id}'] = data
+    return files
+
+
+def _static_assets():
+    """Yield (file under the version, source path, fingerprint) for the app's static folder."""
+    static_folder = current_app.static_folder
+    for directory, _subdirectories, filenames in os.walk(static_folder):
+        for filename in filenames:
+            source = os.path.join(directory, filename)
+            relative = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            stat = os.stat(source)
+            yield f'static/{relative}', source, f'stat:{stat.st_size}:{stat.st_mtime_ns}'
+
+
+def _link_or_copy(source, target):
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def _write(target, data):
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, 'wb') as handle:
+        handle.write(data)
+
+
+def _publish(root, version):
+    """Point `current` at a finished version in one atomic rename."""
+    temp_link = os.path.join(root, f'.{CURRENT_LINK}-{version}')
+    os.symlink(os.path.join(VERSIONS_DIR, version), temp_link)
+    os.replace(temp_link, os.path.join(root, CURRENT_LINK))
+
+
+def _prune_versions(root, current):
+    versions_dir = os.path.join(root, VERSIONS_DIR)
+    versions = sorted(entry for entry in os.listdir(versions_dir) if not entry.endswith('.tmp'))
+    for entry in versions[:-KEEP_VERSIONS]:
+        if entry != current:
+            shutil.rmtree(os.path.join(versions_dir, entry), ignore_errors=True)
+
+
+def export_static_site():
+    """
+    Write a new export version and publish it. Returns a report naming the files
+    that changed since the previous version; unchanged files are hard-linked.
+    """
+    with _export_lock:
+        root = static_export_root()
+        previous_dir = current_export_dir()
+        previous = (_read_manifest(previous_dir) or {}).get('files', {})
+
+        client = current_app.test_client()
+        feed_map, generated = _render_feeds(client)
+        generated.update(_render_pages(client, feed_map))
+        images = _abstract_image_files(generated, previous)
+
+        version = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+        build_dir = os.path.join(root, VERSIONS_DIR, version + '.tmp')
+        os.makedirs(build_dir)
+        files, written = {}, []
+
+        def carry_forward(name, fingerprint):
+            if previous.get(name) == fingerprint and previous_dir:
+                _link_or_copy(os.path.join(previous_dir, name), os.path.join(build_dir, name))
+                return True
+            return False
+
+        for name, data in generated.items():
+            files[name] = _fingerprint(data)
+            if not carry_forward(name, files[name]):
+                _write(os.path.join(build_dir, name), data)
+                written.append(name)
+        for name, data in images.items():
+            if data is None:
+                files[name] = previous[name]
+                carry_forward(name, files[name])
+            else:
+                files[name] = _fingerprint(data)
+                _write(os.path.join(build_dir, name), data)
+                written.append(name)
+        for name, source, fingerprint in _static_assets():
+            files[name] = fingerprint
+            if not carry_forward(name, fingerprint):
+                _link_or_copy(source, os.path.join(build_dir, name))
+                written.append(name)
+
+        manifest = {
+            'version': version,
+            'built_at': datetime.utcnow().isoformat(timespec='seconds'),
+            'feeds': feed_map,
+            'files': files,
+        }
+        _write(os.path.join(build_dir, MANIFEST_NAME), json.dumps(manifest, indent=2).encode('utf-8'))
+        os.rename(build_dir, os.path.join(root, VERSIONS_DIR, version))
+        _publish(root, version)
+        _prune_versions(root, current=version)
+
+        return {
+            'version': version,
+            'path': os.path.join(root, CURRENT_LINK),
+            'files': len(files),
+            'written': sorted(written),
+            'unchanged': len(files) - len(written),
+        }
+
+
+def schedule_static_export():
+    """Queue a background export; a no-op before the first export or where not installed."""
+    jobs = current_app.extensions.get(EXPORTER_KEY)
+    if jobs is not None and current_export_dir():
+        jobs.schedule(CURRENT_LINK, export_static_site)
+
+
+def _note_export_changes(session, _flush_context):
+    if any(isinstance(obj, EXPORTED_MODELS) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info[CHANGES_KEY] = True
+
+
+def _export_after_commit(session):
+    if session.info.pop(CHANGES_KEY, False) and has_app_context():
+        schedule_static_export()
+
+
+def install_static_export(app):
+    """Refresh a published export in the background after commits that may change it."""
+    if app.config.get('TESTING', False):
+        return
+
+    app.extensions[EXPORTER_KEY] = BackgroundJobs(app, 'static-export')
+    if not event.contains(db.session, 'after_flush', _note_export_changes):
+        event.listen(db.session, 'after_flush', _note_export_changes)
+        event.listen(db.session, 'after_commit', _export_after_commit)
+
+
+def register_static_export_commands(app):
+    """Add `flask export-static` to the Flask CLI."""
+
+    @app.cli.command('export-static')
+    def export_static_command():
+        """Render the public schedule and program into a static site."""
+        try:
+            report = export_static_site()
+        except StaticExportError as exc:
+            raise click.ClickException(str(exc)) from exc
+        click.echo(json.dumps(report, indent=2, sort_keys=True))